@@ -0,0 +1,115 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import io
+import os
+import random
+import struct
+from PIL import Image, ImageDraw, ImageFilter
+
+# Common phone/camera resolutions by megapixel count.
+RESOLUTIONS = {
+    1: (1152, 864),
+    4: (2304, 1728),
+    12: (4000, 3000),
+    48: (8000, 6000),
+}
+
+
+def synthetic_photo(width, height, seed):
+    """
+    Build a deterministic, photo-like image: a gradient background with
+    blurred shapes and fine texture, so JPEG sizes and decode costs resemble
+    real photos rather than flat colour.
+    """
+    rng = random.Random(seed)
+    small = (max(1, width // 8), max(1, height // 8))
+    base = Image.merge("RGB", [
+        Image.linear_gradient("L").rotate(rng.randrange(360)).resize(small),
+        Image.radial_gradient("L").resize(small),
+        Image.linear_gradient("L").transpose(Image.FLIP_TOP_BOTTOM).resize(small),
+    ])
+    draw = ImageDraw.Draw(base)
+    for _ in range(24):
+        x, y = rng.randrange(small[0]), rng.randrange(small[1])
+        r = rng.randrange(4, max(5, min(small) // 3))
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=colour)
+    img = base.filter(ImageFilter.GaussianBlur(2)).resize((width, height), Image.BICUBIC)
+
+    texture = Image.effect_noise((width, height), 24).convert("RGB")
+    return Image.blend(img, texture, 0.15)
+
+
+def exif_with_thumbnail(img, size=(160, 120)):
+    """
+    Build an EXIF block holding a JPEG thumbnail of img in IFD1, the way
+    cameras and phones embed their previews.
+    """
+    thumbnail = io.BytesIO()
+    img.resize(size).save(thumbnail, "JPEG", quality=80)
+    data = thumbnail.getvalue()
+    # Little-endian TIFF header, an empty IFD0 and an IFD1 pointing at the thumbnail.
+    ifd1 = 8 + 2 + 4
+    offset = ifd1 + 2 + 2 * 12 + 4
+    tiff = b"II*\x00" + struct.pack("<I", 8)
+    tiff += struct.pack("<HI", 0, ifd1)
+    tiff += struct.pack("<H", 2)
+    tiff += struct.pack("<HHII", 0x0201, 4, 1, offset)
+    tiff += struct.pack("<HHII", 0x0202, 4, 1, len(data))
+    tiff += struct.pack("<I", 0)
+    return b"Exif\x00\x00" + tiff + data
+
+
+def make_photo_corpus(folder, count, megapixels=1, fmt="JPEG", seed=0, exif_thumbnail=False):
+    """
+    Write count synthetic photos of the given size; returns their sorted paths.
+
+    With exif_thumbnail, JPEGs carry an embedded 160x120 preview.
+    """
+    os.makedirs(folder, exist_ok=True)
+    width, height = RESOLUTIONS[megapixels]
+    ext = ".jpg" if fmt == "JPEG" else ".png"
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"IMG_{seed:03d}_{i:05d}{ext}")
+        if not os.path.exists(path):
+            options = {"quality": 90} if fmt == "JPEG" else {}
+            photo = synthetic_photo(width, height, seed * 100003 + i)
+            if exif_thumbnail and fmt == "JPEG":
+                options["exif"] = exif_with_thumbnail(photo)
+            photo.save(path, fmt, **options)
+        paths.append(path)
+    return sorted(paths)
+
+
+def make_listing_corpus(folder, count, seed=0):
+    """
+    Write count tiny files with image extensions, for benchmarks that only
+    list folders. A share of non-image files is mixed in, as in phone dumps.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    extensions = (".jpg", ".jpeg", ".png", ".JPG", ".mp4", ".aae")
+    for i in range(count):
+        path = os.path.join(folder, f"IMG_{i:06d}{rng.choice(extensions)}")
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(b"\xff\xd8")
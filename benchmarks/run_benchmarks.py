@@ -0,0 +1,719 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+# Quick and full runs measure different corpus sizes, so each mode keeps
+# its own baseline.
+DEFAULT_BASELINES = {
+    True: os.path.join(BENCH_DIR, "baseline.quick.json"),
+    False: os.path.join(BENCH_DIR, "baseline.full.json"),
+}
+
+# A metric regresses when it is this much worse than the baseline...
+DEFAULT_TOLERANCE = 0.25
+# ...and worse by more than this absolute amount for its kind of metric,
+# matched on the end of its name (first match wins), so jitter on fast
+# paths and on disk throughput is not reported.
+MIN_REGRESSION = (
+    ("_ms_per_mp", 2.0),
+    ("_ms", 10.0),
+    ("_mb_per_s", 30.0),
+    ("_per_s", 2000.0),
+    ("_mb", 4.0),
+    ("_per_step", 0.25),
+)
+
+# Every scenario runs this many times and each metric keeps its best value;
+# a single run on a busy machine is often 30-50% off.
+DEFAULT_REPEAT = 3
+
+# Absolute limits, checked on every run regardless of the baseline.
+TARGETS = {
+    "startup_import_ms": 150.0,
+    "startup_resume_ms": 50.0,
+}
+
+# Startup must not pull these in before the window is shown.
+STARTUP_DEFERRED_MODULES = ("PIL", "numpy", "ui")
+
+SCENARIOS = []
+
+
+def scenario(func):
+    """Register a benchmark. It receives the run context and returns {metric: value}."""
+    SCENARIOS.append(func)
+    return func
+
+
+def higher_is_better(metric):
+    return metric.endswith("_per_s")
+
+
+def min_regression(metric):
+    for suffix, amount in MIN_REGRESSION:
+        if metric.endswith(suffix):
+            return amount
+    return 0.0
+
+
+def best_of(runs):
+    """Merge the results of several runs, keeping the best value of each metric."""
+    merged = {}
+    for results in runs:
+        for metric, value in results.items():
+            if metric not in merged:
+                merged[metric] = value
+            elif higher_is_better(metric):
+                merged[metric] = max(merged[metric], value)
+            else:
+                merged[metric] = min(merged[metric], value)
+    return merged
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def timed(func, repeat):
+    """Run func repeat times and return the per-call durations in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+class Context:
+    def __init__(self, workdir, quick):
+        self.workdir = workdir
+        self.quick = quick
+
+    def path(self, *parts):
+        return os.path.join(self.workdir, *parts)
+
+
+@scenario
+def bench_load_images(ctx):
+    from corpus import make_listing_corpus
+    from file_manager import FileManager
+
+    results = {}
+    for count in ((10_000,) if ctx.quick else (10_000, 100_000)):
+        folder = ctx.path(f"listing_{count}")
+        make_listing_corpus(folder, count)
+        fm = FileManager()
+        samples = timed(lambda: fm.load_images(folder), 3)
+        results[f"load_images_{count // 1000}k_ms"] = statistics.median(samples)
+    return results
+
+
+@scenario
+def bench_reopen(ctx):
+    """
+    Reopen a camera-style tree of 100 folders after a few files were added to
+    one of them: full rescan versus the snapshot diff.
+    """
+    from corpus import make_listing_corpus
+    from file_manager import FileManager
+    from folder_snapshot import FolderSnapshot
+
+    root = ctx.path("reopen")
+    for i in range(100):
+        make_listing_corpus(os.path.join(root, f"{100 + i}CANON"), 100, seed=i)
+    # Backdate the folders so the snapshot trusts their mtimes.
+    old = time.time() - 3600
+    for directory, _, _ in os.walk(root):
+        os.utime(directory, (old, old))
+
+    snapshot = FolderSnapshot(ctx.path("snapshots.db"))
+    FileManager(snapshot=snapshot).load_images(root, recursive=True)
+    rescan = timed(lambda: FileManager().load_images(root, recursive=True), 3)
+
+    def reopen():
+        changed = os.path.join(root, f"{100 + len(added) % 100}CANON")
+        for _ in range(3):
+            path = os.path.join(changed, f"NEW_{len(added):06d}.jpg")
+            with open(path, "wb") as f:
+                f.write(b"\xff\xd8")
+            added.append(path)
+        fm = FileManager(snapshot=snapshot)
+        start = time.perf_counter()
+        fm.load_images(root, recursive=True)
+        return (time.perf_counter() - start) * 1000
+
+    added = []
+    samples = [reopen() for _ in range(3)]
+    snapshot.close()
+    return {
+        "reopen_rescan_10k_ms": statistics.median(rescan),
+        "reopen_snapshot_10k_ms": statistics.median(samples),
+    }
+
+
+@scenario
+def bench_process_image(ctx):
+    from corpus import make_photo_corpus
+    from image_processor import ImageProcessor
+
+    processor = ImageProcessor()
+    results = {}
+    # Warm up Pillow's lazily loaded codecs so the first size measured is not penalised.
+    warmup = make_photo_corpus(ctx.path("warmup"), 1, 1, "JPEG")[0]
+    processor.process_image(warmup)
+    processor.process_preview(warmup)
+    for megapixels in ((1, 12) if ctx.quick else (1, 4, 12, 48)):
+        for fmt in ("JPEG", "PNG"):
+            if fmt == "PNG" and megapixels > 12:
+                continue
+            paths = make_photo_corpus(ctx.path(f"photos_{megapixels}mp_{fmt.lower()}"), 3, megapixels, fmt)
+            name = f"{fmt.lower()}_{megapixels}mp"
+            full = [s for path in paths for s in timed(lambda: processor.process_image(path), 1)]
+            preview = [s for path in paths for s in timed(lambda: processor.process_preview(path), 1)]
+            results[f"process_image_{name}_ms_per_mp"] = statistics.median(full) / megapixels
+            results[f"process_preview_{name}_ms_per_mp"] = statistics.median(preview) / megapixels
+    return results
+
+
+@scenario
+def bench_first_paint(ctx):
+    """
+    First paint of a camera JPEG: the embedded EXIF thumbnail read from the
+    header, against the draft preview and the full decode of the same photo.
+    """
+    from corpus import make_photo_corpus
+    from image_processor import ImageProcessor, read_embedded_thumbnail
+
+    processor = ImageProcessor()
+    results = {}
+    for megapixels in ((12,) if ctx.quick else (12, 48)):
+        with_thumbnail = make_photo_corpus(ctx.path(f"exif_{megapixels}mp"), 3, megapixels, exif_thumbnail=True)
+        plain = make_photo_corpus(ctx.path(f"plain_{megapixels}mp"), 3, megapixels)
+        processor.process_preview(with_thumbnail[0])
+        header = [s for path in with_thumbnail for s in timed(lambda: read_embedded_thumbnail(path), 5)]
+        exif = [s for path in with_thumbnail for s in timed(lambda: processor.process_preview(path), 3)]
+        draft = [s for path in plain for s in timed(lambda: processor.process_preview(path), 1)]
+        full = [s for path in plain for s in timed(lambda: processor.process_image(path), 1)]
+        results[f"exif_header_read_{megapixels}mp_ms"] = statistics.median(header)
+        results[f"first_paint_exif_{megapixels}mp_ms"] = statistics.median(exif)
+        results[f"first_paint_draft_{megapixels}mp_ms"] = statistics.median(draft)
+        results[f"full_decode_{megapixels}mp_ms"] = statistics.median(full)
+    return results
+
+
+@scenario
+def bench_zoom(ctx):
+    """
+    Zoom a 48 MP JPEG (12 MP with --quick) to 100% in a 1920x1080 view: the
+    coarse stand-in level, the first full screen of tiles, and one tile
+    column cut while panning once the level is decoded.
+    """
+    from corpus import make_photo_corpus
+    from image_processor import MemoryBudget
+    from zoom_view import TilePyramid, level_count, level_size, tile_range
+
+    megapixels = 12 if ctx.quick else 48
+    view = (1920, 1080)
+    results = {"coarse": [], "screen": [], "pan": []}
+    for path in make_photo_corpus(ctx.path(f"zoom_{megapixels}mp"), 3, megapixels, "JPEG"):
+        pyramid = TilePyramid(MemoryBudget(), 512 * 1024 * 1024)
+        source = pyramid.open(path)
+        coarsest = level_count(source.width, source.height, *view) - 1
+        results["coarse"] += timed(lambda: pyramid.request_level(source, coarsest).result(), 1)
+
+        width, height = level_size(source.width, source.height, 0)
+        left, top = (width - view[0]) // 2, (height - view[1]) // 2
+        first_column, first_row, last_column, last_row = tile_range(left, top, *view, width, height)
+
+        def screen():
+            futures = [
+                pyramid.request(source, 0, column, row)
+                for row in range(first_row, last_row)
+                for column in range(first_column, last_column)
+            ]
+            for future in futures:
+                future.result()
+
+        def pan():
+            for row in range(first_row, last_row):
+                pyramid.request(source, 0, last_column, row).result()
+
+        results["screen"] += timed(screen, 1)
+        results["pan"] += timed(pan, 1)
+        pyramid.shutdown()
+    return {
+        f"zoom_coarse_{megapixels}mp_ms": statistics.median(results["coarse"]),
+        f"zoom_first_screen_{megapixels}mp_ms": statistics.median(results["screen"]),
+        "zoom_pan_column_ms": statistics.median(results["pan"]),
+    }
+
+
+@scenario
+def bench_navigation(ctx):
+    """
+    The non-Tk part of show_next: advance the FileManager, fetch the image
+    from the prefetcher and schedule the next window. Tk itself is not
+    exercised so this runs on headless machines.
+    """
+    from corpus import make_photo_corpus
+    from file_manager import FileManager
+    from image_processor import ImageProcessor
+    from prefetcher import Prefetcher
+
+    folder = ctx.path("navigation")
+    make_photo_corpus(folder, 20 if ctx.quick else 60, 4)
+    fm = FileManager()
+    fm.load_images(folder)
+    fm.reset()
+    prefetcher = Prefetcher(ImageProcessor(), ahead=3, behind=1, workers=2)
+
+    cold, warm = [], []
+    for _ in range(len(fm.images) - 1):
+        start = time.perf_counter()
+        fm.next_image()
+        prefetcher.get_image(fm.get_current_image())
+        prefetcher.prefetch(fm.images, fm.index)
+        cold.append((time.perf_counter() - start) * 1000)
+        # Give the pool a typical reviewer's think time before the next key.
+        time.sleep(0.15)
+    for _ in range(3):
+        fm.previous_image()
+        warm.extend(timed(lambda: prefetcher.get_image(fm.get_current_image()), 1))
+    prefetcher.shutdown()
+
+    return {
+        "navigation_p50_ms": percentile(cold, 0.50),
+        "navigation_p95_ms": percentile(cold, 0.95),
+        "navigation_warm_ms": statistics.median(warm),
+    }
+
+
+@scenario
+def bench_key_repeat(ctx):
+    """
+    Hold the arrow key at 30 steps a second over camera JPEGs with no cached
+    previews. Each step used to decode its image on the UI thread before the
+    next key was handled; the decode scheduler skips the images passed over
+    while one decodes. Latency runs from a key press to the paint of the
+    image it led to (passed-over images are never painted), and
+    "settle" from the last press to the paint of the image the user stopped on.
+    """
+    from corpus import make_photo_corpus
+    from decode_scheduler import DecodeScheduler
+    from image_processor import ImageProcessor
+
+    paths = make_photo_corpus(ctx.path("key_repeat"), 10, 4 if ctx.quick else 12)
+    processor = ImageProcessor()
+    processor.process_preview(paths[0])
+    steps = 30 if ctx.quick else 60
+    interval = 1 / 30
+
+    sequential = []
+    start = time.perf_counter()
+    for step in range(steps):
+        pressed = start + step * interval
+        time.sleep(max(0.0, pressed - time.perf_counter()))
+        processor.process_preview(paths[step % len(paths)])
+        sequential.append((time.perf_counter() - pressed) * 1000)
+
+    decoded = []
+
+    def decode(path):
+        decoded.append(path)
+        return processor.process_preview(path)
+
+    scheduler = DecodeScheduler(decode)
+    latest = []
+    in_flight = {}
+    pressed = 0
+    settle = None
+    start = time.perf_counter()
+    while settle is None:
+        # Presses that arrived since the last pass are handled together, as
+        # the UI does when it coalesces key repeats into one paint.
+        due = min(steps, int((time.perf_counter() - start) / interval) + 1)
+        if due > pressed:
+            pressed = due
+            path = paths[(pressed - 1) % len(paths)]
+            scheduler.set_target(path)
+            in_flight[path] = scheduler.decode_target()
+        for path, future in list(in_flight.items()):
+            if not future.done():
+                continue
+            del in_flight[path]
+            # A decode the user already passed is still painted, unless a newer image was.
+            if future.cancelled() or not scheduler.wanted(path):
+                continue
+            latest.append(scheduler.painted(path))
+            if pressed == steps and path == scheduler.target:
+                settle = (time.perf_counter() - start - (steps - 1) * interval) * 1000
+        time.sleep(0.002)
+    scheduler.shutdown()
+
+    return {
+        "key_repeat_sequential_p95_ms": percentile(sequential, 0.95),
+        "key_repeat_sequential_settle_ms": sequential[-1],
+        "key_repeat_latest_p50_ms": percentile(latest, 0.50),
+        "key_repeat_latest_p95_ms": percentile(latest, 0.95),
+        "key_repeat_latest_settle_ms": settle,
+        "key_repeat_decodes_per_step": len(decoded) / steps,
+    }
+
+
+@scenario
+def bench_startup(ctx):
+    """
+    Cold start up to the point where the window is painted (importing main
+    in a fresh interpreter) and the last session's image is back on screen
+    (state store open, last session read, preview cache hit).
+    """
+    from corpus import make_photo_corpus
+    from file_manager import FileManager
+    from image_processor import ImageProcessor
+    from preview_cache import PreviewCache
+    from state_store import StateStore
+
+    probe = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import main\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        f"loaded = [m for m in {STARTUP_DEFERRED_MODULES!r} if m in sys.modules]\n"
+        "print(elapsed, ','.join(loaded))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(SRC_DIR))
+    imports = []
+    for _ in range(3 if ctx.quick else 7):
+        output = subprocess.run([sys.executable, "-c", probe], cwd=ctx.workdir, env=env,
+                                capture_output=True, text=True, check=True).stdout.split()
+        if len(output) > 1:
+            raise RuntimeError(f"Importing main loaded {output[1]} before the window is shown")
+        imports.append(float(output[0]))
+
+    folder = ctx.path("startup")
+    paths = make_photo_corpus(folder, 3, 4)
+    processor = ImageProcessor(preview_cache=PreviewCache(ctx.path("startup_cache")))
+    state_path = ctx.path("startup_state.db")
+    fm = FileManager(StateStore(state_path))
+    fm.load_images(folder)
+    fm.next_image()
+    processor.process_image(fm.get_current_image())
+    fm.save_session()
+    fm.state_store.close()
+
+    def resume():
+        store = StateStore(state_path)
+        session = FileManager(store).last_session()
+        img = processor.preview_cache.get(session["image"], (processor.max_width, processor.max_height))
+        store.close()
+        if img is None:
+            raise RuntimeError("Last image was not served from the preview cache")
+
+    return {
+        "startup_import_ms": statistics.median(imports),
+        "startup_resume_ms": statistics.median(timed(resume, 5)),
+    }
+
+
+@scenario
+def bench_bursts(ctx):
+    """Burst grouping over synthetic capture times; no files are needed."""
+    import random
+    from metadata_index import find_bursts
+
+    count = 100_000
+    rng = random.Random(0)
+    metadata = {}
+    clock = datetime(2024, 1, 1).timestamp()
+    for i in range(count):
+        # Mostly bursts of a few frames a second apart, separated by longer pauses.
+        clock += 1 if rng.random() < 0.7 else rng.randint(10, 600)
+        captured = datetime.fromtimestamp(clock).strftime("%Y-%m-%d %H:%M:%S")
+        metadata[f"/photos/IMG_{i:06d}.jpg"] = {"captured": captured}
+    paths = list(metadata)
+    rng.shuffle(paths)
+
+    samples = timed(lambda: find_bursts(paths, metadata), 3)
+    return {"find_bursts_100k_ms": statistics.median(samples)}
+
+
+@scenario
+def bench_delete(ctx):
+    from corpus import make_listing_corpus
+    from file_manager import FileManager
+
+    count = 1000 if ctx.quick else 5000
+    folder = ctx.path("delete")
+    make_listing_corpus(folder, count, seed=1)
+    fm = FileManager()
+    fm.load_images(folder)
+    total = len(fm.images)
+
+    start = time.perf_counter()
+    latencies = timed(fm.delete_image, total)
+    fm.delete_queue.flush()
+    applied = time.perf_counter() - start
+    fm.close()
+
+    return {
+        "delete_call_p95_ms": percentile(latencies, 0.95),
+        "delete_applied_per_s": total / applied,
+    }
+
+
+@scenario
+def bench_export(ctx):
+    """
+    Back up a folder of camera-sized files to another folder on the same
+    disk, against copying each file through Python (read it, hash it, write
+    it). "python_peak" is the largest Python allocation during the copy,
+    traced by tracemalloc; "resume" is a second export with nothing to copy.
+    """
+    import hashlib
+    import tracemalloc
+    from exporter import Exporter
+
+    count, size = (16, 4) if ctx.quick else (64, 8)
+    folder = ctx.path("export", "photos")
+    os.makedirs(folder)
+    block = os.urandom(1024 * 1024)
+    for i in range(count):
+        with open(os.path.join(folder, f"IMG_{i:04d}.jpg"), "wb") as f:
+            for _ in range(size):
+                f.write(block)
+    paths = sorted(os.path.join(folder, name) for name in os.listdir(folder))
+    total_mb = count * size
+
+    def copy_through_python(destination):
+        os.makedirs(destination)
+        for path in paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            with open(os.path.join(destination, os.path.basename(path)), "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            with open(os.path.join(destination, os.path.basename(path)), "rb") as f:
+                if hashlib.blake2b(f.read()).digest() != hashlib.blake2b(data).digest():
+                    raise RuntimeError(f"copy of {path} differs")
+
+    def traced(func):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return seconds, peak / (1024 * 1024)
+
+    loop_seconds, loop_peak = traced(lambda: copy_through_python(ctx.path("export", "loop")))
+    exporter = Exporter()
+    destination = ctx.path("export", "backup")
+    export_seconds, export_peak = traced(lambda: exporter.export(folder, destination, paths))
+    resume_ms = timed(lambda: exporter.export(folder, destination, paths), 1)[0]
+
+    return {
+        "copy_loop_mb_per_s": total_mb / loop_seconds,
+        "copy_loop_python_peak_mb": loop_peak,
+        "export_mb_per_s": total_mb / export_seconds,
+        "export_python_peak_mb": export_peak,
+        "export_resume_ms": resume_ms,
+    }
+
+
+@scenario
+def bench_catalog(ctx):
+    """
+    Memory and lookup speed of the image catalog against a plain list of
+    path strings, for a library of a million photos in day folders. No files
+    are needed.
+    """
+    import random
+    from image_catalog import ImageCatalog
+
+    count = 100_000 if ctx.quick else 1_000_000
+    label = f"{count // 1000}k" if count < 1_000_000 else f"{count // 1_000_000}m"
+    paths = [
+        f"/home/user/Pictures/{2010 + i // 100_000}/{2010 + i // 100_000}-{i // 8300 % 12 + 1:02d}-"
+        f"{i // 1000 % 28 + 1:02d}/IMG_{i:07d}.JPG"
+        for i in range(count)
+    ]
+    rng = random.Random(0)
+    probes = rng.sample(paths, 1000)
+
+    start = time.perf_counter()
+    catalog = ImageCatalog(paths)
+    catalog.sort()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # Buffers of the catalog's columns, versus one str object per path plus the list.
+    catalog_bytes = sum(sys.getsizeof(value) for value in vars(catalog).values())
+    catalog_bytes += sum(sys.getsizeof(directory) for directory in catalog.folders())
+    list_bytes = sys.getsizeof(paths) + sum(sys.getsizeof(path) for path in paths)
+
+    results = {
+        f"catalog_build_{label}_ms": build_ms,
+        f"catalog_memory_{label}_mb": catalog_bytes / (1024 * 1024),
+        f"path_list_memory_{label}_mb": list_bytes / (1024 * 1024),
+        f"catalog_index_1k_{label}_ms": statistics.median(timed(lambda: [catalog.index(p) for p in probes], 3)),
+        f"catalog_contains_1k_{label}_ms": statistics.median(timed(lambda: [p in catalog for p in probes], 3)),
+        # A list scans for the path; ten lookups are enough to show it.
+        f"path_list_index_10_{label}_ms": statistics.median(timed(lambda: [paths.index(p) for p in probes[:10]], 3)),
+    }
+
+    positions = [rng.randrange(count - 1000) for _ in range(1000)]
+    results[f"catalog_delete_1k_{label}_ms"] = timed(lambda: [catalog.__delitem__(i) for i in positions], 1)[0]
+    results[f"catalog_get_1k_{label}_ms"] = statistics.median(timed(lambda: [catalog[i] for i in positions], 3))
+    results[f"path_list_delete_1k_{label}_ms"] = timed(lambda: [paths.__delitem__(i) for i in positions], 1)[0]
+    return results
+
+
+def run(selected, quick):
+    workdir = tempfile.mkdtemp(prefix="photosorter_bench_")
+    previous_cwd = os.getcwd()
+    # Work inside the scratch folder so logs, state and caches land there.
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.abspath(SRC_DIR))
+    sys.path.insert(0, BENCH_DIR)
+    # Importing logger configures logging at INFO; keep per-image messages
+    # out of the measurements and the console.
+    importlib.import_module("logger")
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {}
+    try:
+        ctx = Context(workdir, quick)
+        for func in SCENARIOS:
+            name = func.__name__[len("bench_"):]
+            if selected and name not in selected:
+                continue
+            print(f"Running {name}...", flush=True)
+            results.update(func(ctx))
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table and return the metrics that regressed."""
+    regressions = []
+    print(f"\n{'metric':<44} {'baseline':>12} {'current':>12} {'change':>9}")
+    for metric, value in sorted(results.items()):
+        reference = baseline.get(metric)
+        if reference is None or reference == 0:
+            print(f"{metric:<44} {'-':>12} {value:12.3f} {'new':>9}")
+            continue
+        change = (value - reference) / reference
+        worse = -change if higher_is_better(metric) else change
+        regressed = worse > tolerance and abs(value - reference) > min_regression(metric)
+        marker = "  REGRESSED" if regressed else ""
+        print(f"{metric:<44} {reference:12.3f} {value:12.3f} {change:+8.0%}{marker}")
+        if regressed:
+            regressions.append(metric)
+    return regressions
+
+
+def check_targets(results):
+    """Print and return the metrics that exceed their absolute target."""
+    missed = []
+    for metric, limit in TARGETS.items():
+        value = results.get(metric)
+        if value is not None and value > limit:
+            print(f"{metric} is {value:.1f}, over its target of {limit:.1f}")
+            missed.append(metric)
+    return missed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PhotoSorter's hot paths on synthetic photos.")
+    parser.add_argument("scenarios", nargs="*", help="Scenarios to run (default: all).")
+    parser.add_argument("--quick", action="store_true", help="Smaller corpora for a fast check.")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    parser.add_argument("--baseline",
+                        help="Baseline JSON to compare against (default: baseline.quick.json or baseline.full.json).")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown before a metric counts as a regression (0.25 = 25%%).")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Runs of each scenario; the best value of each metric counts (default: {DEFAULT_REPEAT}).")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline.")
+    args = parser.parse_args(argv)
+    baseline_path = args.baseline or DEFAULT_BASELINES[args.quick]
+
+    results = best_of(run(set(args.scenarios), args.quick) for _ in range(max(1, args.repeat)))
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            stored = json.load(f)
+        if stored.get("quick", False) == args.quick:
+            baseline = stored.get("results", {})
+        else:
+            print(f"\nThe baseline was recorded {'with' if stored.get('quick') else 'without'} --quick; "
+                  f"not comparing against it.")
+    else:
+        print(f"\nNo baseline at {baseline_path}; record one with --update-baseline.")
+    regressions = compare(results, baseline, args.tolerance)
+    missed = check_targets(results)
+
+    if args.update_baseline:
+        merged = {**baseline, **results}
+        with open(baseline_path, "w") as f:
+            json.dump({**report, "results": merged}, f, indent=4)
+        print(f"\nBaseline updated: {baseline_path}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%} and their absolute margin: "
+              f"{', '.join(regressions)}")
+    if regressions or missed:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
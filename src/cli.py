@@ -0,0 +1,231 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from delete_queue import DeleteQueue
+from duplicate_finder import DuplicateFinder
+from exporter import DEFAULT_EXPORT_WORKERS, Exporter
+from file_manager import DELETED_FOLDER, IMAGE_EXTENSIONS, scan_images
+from image_processor import open_header
+from quality_scorer import QualityScorer
+from reports_manager import ReportsManager
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Long side / short side of common phone screens (16:9 up to 21:9).
+SCREENSHOT_RATIOS = (16 / 9, 18 / 9, 18.5 / 9, 19 / 9, 19.5 / 9, 20 / 9, 21 / 9)
+ASPECT_TOLERANCE = 0.01
+INSPECT_CHUNKSIZE = 64
+
+# EXIF tags written by cameras but not by screenshot tools.
+EXIF_MAKE = 0x010F
+EXIF_MODEL = 0x0110
+
+
+def inspect_file(image_path):
+    """
+    Read dimensions and camera tags from the header only. Runs in worker processes.
+
+    No pixels are decoded, so images over Pillow's size limit are inspected too.
+
+    Returns:
+        tuple: (path, width, height, has_camera_exif); width and height are None on failure.
+    """
+    try:
+        with open_header(image_path) as img:
+            width, height = img.size
+            exif = img.getexif()
+            has_camera = bool(exif.get(EXIF_MAKE) or exif.get(EXIF_MODEL))
+        return image_path, width, height, has_camera
+    except Exception as e:
+        logger.warning("Could not inspect '%s': %s", image_path, e)
+        return image_path, None, None, False
+
+
+def is_screenshot_shape(width, height):
+    ratio = max(width, height) / max(1, min(width, height))
+    return any(abs(ratio - target) <= target * ASPECT_TOLERANCE for target in SCREENSHOT_RATIOS)
+
+
+def parse_extensions(value):
+    extensions = tuple(
+        ext if ext.startswith(".") else f".{ext}"
+        for ext in (part.strip().lower() for part in value.split(",")) if ext
+    )
+    if not extensions:
+        raise argparse.ArgumentTypeError("at least one extension is required")
+    return extensions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Flag or delete unwanted photos without the GUI.")
+    parser.add_argument("folder", help="Root of the photo tree to triage.")
+    parser.add_argument("--no-recursive", dest="recursive", action="store_false",
+                        help="Only look at the top-level folder.")
+    parser.add_argument("--extensions", type=parse_extensions, default=IMAGE_EXTENSIONS,
+                        help="Comma-separated extensions to consider (default: .png,.jpg,.jpeg).")
+    parser.add_argument("--min-width", type=int, default=0, help="Flag images narrower than this.")
+    parser.add_argument("--min-height", type=int, default=0, help="Flag images shorter than this.")
+    parser.add_argument("--screenshots", action="store_true",
+                        help="Flag images with a phone-screen aspect ratio and no camera EXIF.")
+    parser.add_argument("--duplicates", type=int, metavar="DISTANCE",
+                        help="Flag near-duplicates within this Hamming distance, keeping the largest.")
+    parser.add_argument("--blur", type=float, metavar="SHARPNESS",
+                        help="Flag images whose Laplacian variance is below this value.")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count).")
+    parser.add_argument("--report-folder", default="reports", help="Where to write the report CSV.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only write the report; do not move anything into 'deleted'.")
+    parser.add_argument("--export", metavar="DESTINATION",
+                        help="Copy the images that were not flagged to this folder, verifying each copy. "
+                             "Running it again only copies new or changed images.")
+    parser.add_argument("--export-workers", type=int, default=DEFAULT_EXPORT_WORKERS,
+                        help=f"Files copied at the same time (default: {DEFAULT_EXPORT_WORKERS}).")
+    return parser
+
+
+def collect_images(folder, recursive, extensions):
+    return sorted(path for batch in scan_images(folder, recursive, extensions=extensions) for path in batch)
+
+
+def triage(paths, args, timings):
+    """
+    Apply the configured rules.
+
+    Returns:
+        dict: path -> list of reasons, for every flagged image.
+    """
+    reasons = {}
+
+    def flag(path, reason):
+        reasons.setdefault(path, []).append(reason)
+
+    dimensions = {}
+    if args.min_width or args.min_height or args.screenshots or args.duplicates is not None:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for path, width, height, has_camera in pool.map(inspect_file, paths, chunksize=INSPECT_CHUNKSIZE):
+                if width is None:
+                    continue
+                dimensions[path] = (width, height)
+                if width < args.min_width or height < args.min_height:
+                    flag(path, f"too small ({width}x{height})")
+                if args.screenshots and not has_camera and is_screenshot_shape(width, height):
+                    flag(path, f"screenshot shape ({width}x{height})")
+        timings["inspect"] = time.perf_counter() - start
+
+    if args.blur is not None:
+        start = time.perf_counter()
+        scores = QualityScorer(workers=args.workers).score_images(paths)
+        for path, score in scores.items():
+            if score["sharpness"] < args.blur:
+                flag(path, f"blurred (sharpness {score['sharpness']:.1f})")
+        timings["blur"] = time.perf_counter() - start
+
+    if args.duplicates is not None:
+        start = time.perf_counter()
+        finder = DuplicateFinder(workers=args.workers, max_distance=args.duplicates)
+
+        def keep_rank(path):
+            width, height = dimensions.get(path, (0, 0))
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                # Gone since it was hashed; any other copy is kept instead.
+                size = 0
+            return width * height, size
+
+        for group in finder.find_groups(paths):
+            keep = max(group, key=keep_rank)
+            for path in group:
+                if path != keep:
+                    flag(path, f"duplicate of {keep}")
+        timings["duplicates"] = time.perf_counter() - start
+
+    return reasons
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.folder):
+        print(f"Not a folder: {args.folder}", file=sys.stderr)
+        return 2
+
+    total_start = time.perf_counter()
+    timings = {}
+
+    start = time.perf_counter()
+    paths = collect_images(args.folder, args.recursive, args.extensions)
+    timings["scan"] = time.perf_counter() - start
+
+    flagged = triage(paths, args, timings)
+
+    reports_manager = ReportsManager(args.report_folder)
+    deleted_folder = os.path.join(args.folder, DELETED_FOLDER)
+    failed = {}
+    if args.dry_run:
+        for path in sorted(flagged):
+            reports_manager.record_action("Would Delete", path, "; ".join(flagged[path]))
+    else:
+        delete_queue = DeleteQueue()
+        for path in sorted(flagged):
+            delete_queue.submit(path, deleted_folder)
+        # Moves run in the background; record them once their outcome is known.
+        delete_queue.close()
+        failed = {job.source: job.error for job in delete_queue.take_failed()}
+        for path in sorted(flagged):
+            if path in failed:
+                reports_manager.record_action("Delete Failed", path, str(failed[path]))
+            else:
+                reports_manager.record_action("Delete", path, "; ".join(flagged[path]))
+    reports_manager.generate_report()
+    reports_manager.close()
+
+    export = None
+    if args.export:
+        start = time.perf_counter()
+        kept = [path for path in paths if path not in flagged]
+        export = Exporter(workers=args.export_workers).export(args.folder, args.export, kept)
+        timings["export"] = time.perf_counter() - start
+
+    elapsed = time.perf_counter() - total_start
+    throughput = len(paths) / elapsed if elapsed > 0 else 0.0
+    print(f"Scanned {len(paths)} images, flagged {len(flagged)} "
+          f"({'dry run' if args.dry_run else 'moved to ' + deleted_folder}).")
+    if failed:
+        print(f"{len(failed)} flagged images could not be moved; see the report.")
+    for stage, seconds in timings.items():
+        rate = len(paths) / seconds if seconds > 0 else 0.0
+        print(f"  {stage:<10} {seconds:8.2f} s  {rate:10.1f} images/s")
+    if export is not None:
+        rate = export["bytes_copied"] / (1024 * 1024) / export["seconds"] if export["seconds"] > 0 else 0.0
+        print(f"Exported {export['copied']} images to {args.export} ({rate:.1f} MB/s), "
+              f"{export['skipped']} already there, {export['failed']} failed.")
+    print(f"Total {elapsed:.2f} s, {throughput:.1f} images/s. Report: {reports_manager.report_file}")
+    return 1 if failed or (export is not None and export["failed"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logger import get_logger
+from metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class DecodeScheduler:
+    def __init__(self, decode, clock=time.perf_counter):
+        """
+        Decode the image navigation is heading to, latest target first.
+
+        One decode runs at a time and at most one waits behind it. Moving on
+        cancels the waiting decode, so holding an arrow key finishes the image
+        in flight and then goes straight to the newest target instead of
+        working through every image passed on the way. The image in flight
+        is still worth painting as feedback, until a newer one is painted.
+
+        The time from the key press that made an image the target to its
+        paint is recorded as the "input_to_paint" metric.
+
+        Args:
+            decode (callable): Takes a path and returns the image to show, or None.
+            clock (callable): Seconds as a float; replaceable in tests.
+        """
+        self._decode = decode
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="navigate")
+        self._lock = threading.Lock()
+        self._target = None
+        self._future = None
+        self._future_path = None
+        # When each image navigated to since the last paint became the target.
+        self._pressed = {}
+        self.superseded = 0
+
+    @property
+    def target(self):
+        return self._target
+
+    def set_target(self, image_path):
+        """Record that the user moved to image_path; a waiting decode of another image is cancelled."""
+        with self._lock:
+            self._pressed.setdefault(image_path, self._clock())
+            self._target = image_path
+            if self._future_path != image_path and self._future is not None and self._future.cancel():
+                self.superseded += 1
+                metrics.increment("decodes_superseded")
+                self._future = None
+
+    def decode_target(self):
+        """
+        Return a Future of the target's image, submitting its decode unless one is already queued or running.
+
+        Returns:
+            Future: Resolves to the decoded image, or None.
+        """
+        with self._lock:
+            future = self._future
+            if future is None or future.cancelled() or self._future_path != self._target:
+                future = self._future = self._executor.submit(self._decode, self._target)
+                self._future_path = self._target
+            return future
+
+    def wanted(self, image_path):
+        """True if image_path is the target, or was navigated to after the last paint."""
+        with self._lock:
+            return image_path == self._target or image_path in self._pressed
+
+    def painted(self, image_path):
+        """
+        Note that image_path was painted; images navigated to before it are no longer wanted.
+
+        Returns:
+            float: Milliseconds since image_path became the target, or None
+                if it was not navigated to since the last paint.
+        """
+        with self._lock:
+            pressed = self._pressed.pop(image_path, None)
+            if pressed is None:
+                return None
+            self._pressed = {path: time for path, time in self._pressed.items() if time > pressed}
+            latency = (self._clock() - pressed) * 1000
+        metrics.record("input_to_paint", latency)
+        return latency
+
+    def shutdown(self):
+        """Cancel the waiting decode and stop the worker."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Decode scheduler stopped (%s decodes superseded).", self.superseded)
@@ -0,0 +1,193 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import atexit
+import errno
+import os
+import shutil
+import threading
+from collections import deque
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+DELETE_BATCH_SIZE = 64
+
+PENDING = "pending"
+MOVING = "moving"
+APPLIED = "applied"
+CANCELLED = "cancelled"
+RESTORED = "restored"
+FAILED = "failed"
+
+
+def unique_destination(folder, filename):
+    """Return a path in folder for filename that does not clash with an existing file."""
+    destination = os.path.join(folder, filename)
+    stem, ext = os.path.splitext(filename)
+    counter = 1
+    while os.path.exists(destination):
+        destination = os.path.join(folder, f"{stem}_{counter}{ext}")
+        counter += 1
+    return destination
+
+
+def move_file(source, destination):
+    """Rename within a filesystem; fall back to copy-and-delete across devices."""
+    try:
+        os.rename(source, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(source, destination)
+
+
+class DeleteJob:
+    __slots__ = ("source", "target_folder", "destination", "state", "error")
+
+    def __init__(self, source, target_folder):
+        self.source = source
+        self.target_folder = target_folder
+        self.destination = None
+        self.state = PENDING
+        self.error = None
+
+
+class DeleteQueue:
+    def __init__(self, batch_size=DELETE_BATCH_SIZE):
+        """
+        Applies image deletions (moves into a 'deleted' folder) on a background thread.
+
+        submit() returns immediately; the worker moves pending files in
+        batches. restore() undoes a job whether it is still pending or
+        already applied.
+        """
+        self.batch_size = batch_size
+        self.failed = []
+        self._pending = deque()
+        self._busy = False
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._worker = threading.Thread(target=self._work_loop, name="delete-worker", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def submit(self, image_path, target_folder):
+        """Queue image_path to be moved into target_folder and return its DeleteJob."""
+        job = DeleteJob(image_path, target_folder)
+        with self._condition:
+            self._pending.append(job)
+            self._condition.notify_all()
+        return job
+
+    def restore(self, job):
+        """
+        Undo a delete: drop it if still pending, otherwise move the file back.
+
+        Returns:
+            bool: True if the image is back at its original path.
+        """
+        with self._condition:
+            while job.state == MOVING:
+                self._condition.wait()
+            if job.state == PENDING:
+                self._pending.remove(job)
+                job.state = CANCELLED
+                return True
+            if job.state != APPLIED:
+                return False
+
+        try:
+            if os.path.exists(job.source):
+                raise FileExistsError(f"'{job.source}' already exists")
+            move_file(job.destination, job.source)
+            job.state = RESTORED
+            logger.info("Restored deleted image: %s", job.source)
+            return True
+        except Exception as e:
+            logger.error("Failed to restore '%s': %s", job.source, e)
+            return False
+
+    def take_failed(self):
+        """Return the jobs whose move failed since the last call, oldest first."""
+        with self._condition:
+            failed, self.failed = self.failed, []
+        return failed
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending) + (1 if self._busy else 0)
+
+    def flush(self):
+        """Block until every submitted delete has been applied."""
+        with self._condition:
+            while self._pending or self._busy:
+                self._condition.wait()
+
+    def close(self):
+        """Apply outstanding deletes and stop the worker."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._worker.join()
+        atexit.unregister(self.close)
+
+    def _work_loop(self):
+        created_folders = set()
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                self._busy = True
+
+            moved = 0
+            while True:
+                with self._condition:
+                    if not self._pending or moved >= self.batch_size:
+                        break
+                    job = self._pending.popleft()
+                    job.state = MOVING
+                self._apply(job, created_folders)
+                moved += 1
+                with self._condition:
+                    self._condition.notify_all()
+
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+            logger.debug("Applied %d deletes.", moved)
+
+    def _apply(self, job, created_folders):
+        try:
+            if job.target_folder not in created_folders:
+                os.makedirs(job.target_folder, exist_ok=True)
+                created_folders.add(job.target_folder)
+            job.destination = unique_destination(job.target_folder, os.path.basename(job.source))
+            move_file(job.source, job.destination)
+            job.state = APPLIED
+            logger.info("Deleted image moved to: %s", job.destination)
+        except Exception as e:
+            job.error = e
+            with self._condition:
+                job.state = FAILED
+                self.failed.append(job)
+            logger.error("Error deleting image '%s': %s", job.source, e)
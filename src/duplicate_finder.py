@@ -0,0 +1,244 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from PIL import Image
+from file_index import FileIndex
+from image_processor import DECODE_BUDGET_MB, open_header, pool_decode_budget, within_decode_budget
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+HASH_KINDS = ("dhash", "phash")
+DEFAULT_MAX_DISTANCE = 6
+HASH_CHUNKSIZE = 32
+
+# pHash keeps the 8x8 lowest frequencies of a 32x32 DCT.
+_PHASH_SIZE = 32
+_PHASH_KEEP = 8
+_DCT_COS = [
+    [math.cos(math.pi * (2 * x + 1) * u / (2 * _PHASH_SIZE)) for x in range(_PHASH_SIZE)]
+    for u in range(_PHASH_KEEP)
+]
+
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits:
+        value = (value << 1) | bit
+    return value
+
+
+def dhash(gray):
+    """
+    64-bit difference hash: whether each pixel is brighter than its right neighbour.
+
+    Args:
+        gray (Image): Grayscale ("L") image of any size.
+    """
+    pixels = gray.resize((9, 8), Image.BILINEAR).tobytes()
+    return _bits_to_int(
+        int(pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+        for row in range(8) for col in range(8)
+    )
+
+
+def phash(gray):
+    """
+    64-bit perceptual hash from the low frequencies of a 2D DCT.
+
+    Args:
+        gray (Image): Grayscale ("L") image of any size.
+    """
+    pixels = gray.resize((_PHASH_SIZE, _PHASH_SIZE), Image.BILINEAR).tobytes()
+    rows = [pixels[y * _PHASH_SIZE:(y + 1) * _PHASH_SIZE] for y in range(_PHASH_SIZE)]
+
+    # Separable DCT: transform the rows, then the columns, keeping only the
+    # frequencies that end up in the hash.
+    row_dct = [[sum(c * p for c, p in zip(cos_u, row)) for cos_u in _DCT_COS] for row in rows]
+    coefficients = [
+        sum(cos_v[y] * row_dct[y][u] for y in range(_PHASH_SIZE))
+        for cos_v in _DCT_COS for u in range(_PHASH_KEEP)
+    ]
+
+    # The DC term only reflects overall brightness, so leave it out of the median.
+    median = sorted(coefficients[1:])[len(coefficients) // 2 - 1]
+    return _bits_to_int(int(c > median) for c in coefficients)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def hash_file(image_path, decode_budget=DECODE_BUDGET_MB * 1024 * 1024):
+    """
+    Compute both hashes for an image file. Runs in worker processes.
+
+    Images that would need more than decode_budget bytes even after drafting
+    are refused.
+
+    Returns:
+        tuple: (path, size, mtime_ns, {"dhash": hex, "phash": hex}), or the
+        path and None values if the file could not be hashed.
+    """
+    try:
+        st = os.stat(image_path)
+        with open_header(image_path) as img:
+            original_size = img.size
+            # Hashes only need a tiny image, so let JPEGs decode at 1/8 scale.
+            img.draft("L", (_PHASH_SIZE * 2, _PHASH_SIZE * 2))
+            if not within_decode_budget(image_path, img, original_size, decode_budget):
+                return image_path, None, None, None
+            gray = img.convert("L")
+        return image_path, st.st_size, st.st_mtime_ns, {
+            "dhash": format(dhash(gray), "016x"),
+            "phash": format(phash(gray), "016x"),
+        }
+    except Exception as e:
+        logger.warning("Could not hash '%s': %s", image_path, e)
+        return image_path, None, None, None
+
+
+class BKTree:
+    def __init__(self):
+        """
+        Burkhard-Keller tree over 64-bit hashes with Hamming distance.
+
+        Each node is [hash, items, children] where children maps the distance
+        to the parent onto a subtree, so range queries can skip every subtree
+        whose distance band cannot contain a match.
+        """
+        self.root = None
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """Return (distance, item) for every item within max_distance of value."""
+        if self.root is None:
+            return []
+        matches = []
+        pending = [self.root]
+        while pending:
+            node = pending.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                matches.extend((distance, item) for item in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            pending.extend(child for d, child in node[2].items() if low <= d <= high)
+        return matches
+
+
+class DuplicateFinder:
+    def __init__(self, index=None, workers=None, max_distance=DEFAULT_MAX_DISTANCE, hash_kind="dhash"):
+        """
+        Find clusters of near-identical images.
+
+        Args:
+            index (FileIndex): Persistent hash store; only new or changed files are rehashed.
+            workers (int): Size of the hashing process pool (defaults to the CPU count).
+            max_distance (int): Largest Hamming distance treated as a duplicate.
+            hash_kind (str): "dhash" or "phash".
+        """
+        if hash_kind not in HASH_KINDS:
+            raise ValueError(f"Unknown hash kind: {hash_kind}")
+        self.index = index if index is not None else FileIndex(table="image_hashes")
+        self.workers = workers
+        self.max_distance = max_distance
+        self.hash_kind = hash_kind
+
+    def compute_hashes(self, paths):
+        """
+        Return {path: {"dhash": hex, "phash": hex}}, hashing only files not already indexed.
+        """
+        start = time.perf_counter()
+        hashes, missing = self.index.lookup(paths)
+        if missing:
+            computed = []
+            hash_one = partial(hash_file, decode_budget=pool_decode_budget(self.workers))
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                for path, size, mtime_ns, data in pool.map(hash_one, missing, chunksize=HASH_CHUNKSIZE):
+                    if data is not None:
+                        hashes[path] = data
+                        computed.append((path, size, mtime_ns, data))
+            self.index.put_many(computed)
+        logger.info(
+            "Hashes ready for %s images (%s computed) in %.1f s.",
+            len(hashes), len(missing), time.perf_counter() - start
+        )
+        return hashes
+
+    def find_groups(self, paths):
+        """
+        Cluster images whose hashes are within max_distance of each other.
+
+        Returns:
+            list: Groups of two or more paths, each sorted, ordered by their first path.
+        """
+        hashes = self.compute_hashes(paths)
+
+        # Identical hashes collapse into one tree node, so the tree is only as
+        # big as the number of distinct hashes.
+        by_hash = {}
+        for path, data in hashes.items():
+            by_hash.setdefault(int(data[self.hash_kind], 16), []).append(path)
+
+        tree = BKTree()
+        for value in by_hash:
+            tree.add(value, value)
+
+        parent = {value: value for value in by_hash}
+
+        def find(value):
+            while parent[value] != value:
+                parent[value] = parent[parent[value]]
+                value = parent[value]
+            return value
+
+        for value in by_hash:
+            for _, other in tree.search(value, self.max_distance):
+                root_a, root_b = find(value), find(other)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+
+        clusters = {}
+        for value, members in by_hash.items():
+            clusters.setdefault(find(value), []).extend(members)
+
+        groups = sorted(sorted(group) for group in clusters.values() if len(group) > 1)
+        logger.info("Found %s duplicate groups among %s images.", len(groups), len(hashes))
+        return groups
@@ -0,0 +1,413 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import errno
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from file_manager import is_within, scan_images
+from logger import get_logger
+from metrics import metrics
+
+logger = get_logger(__name__)
+
+# Kept in the destination; one JSON line per verified copy.
+EXPORT_MANIFEST = ".export_manifest.jsonl"
+
+# Copies are written under this suffix and renamed once verified.
+PARTIAL_SUFFIX = ".part"
+
+DEFAULT_EXPORT_WORKERS = 4
+
+# Bytes handed to the kernel per copy_file_range/sendfile call.
+COPY_CHUNK = 64 * 1024 * 1024
+
+# Each worker's buffer for checksums and the read/write fallback, so memory
+# stays at workers x BUFFER_SIZE however large the photos are.
+BUFFER_SIZE = 1024 * 1024
+
+# The progress readout is updated at most this often.
+PROGRESS_INTERVAL = 0.5
+
+# Reasons the kernel cannot copy between two files, e.g. different
+# filesystems or a platform where sendfile needs a socket.
+NO_KERNEL_COPY = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP,
+    errno.EBADF, errno.ENOTSOCK, errno.ETXTBSY,
+}
+
+
+def _copy_file_range(src_fd, dst_fd, offset, count):
+    # Filesystems with reflinks (Btrfs, XFS) share the blocks instead of copying them.
+    return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+
+
+def _sendfile(src_fd, dst_fd, offset, count):
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
+KERNEL_COPIES = [
+    copy for name, copy in (("copy_file_range", _copy_file_range), ("sendfile", _sendfile)) if hasattr(os, name)
+]
+
+
+def _drop_cache(fd):
+    """Let the kernel evict the file's pages, so a backup run does not flush everything else out of memory."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def _hash_range(src, view, digest, start, end):
+    """Feed bytes start to end of src to digest through view; returns where it stopped."""
+    src.seek(start)
+    while start < end:
+        read = src.readinto(view[:min(len(view), end - start)])
+        if not read:
+            break
+        digest.update(view[:read])
+        start += read
+    return start
+
+
+def copy_file(source, destination, buffer=None, digest=None):
+    """
+    Copy a file's contents without passing them through Python where the platform allows.
+
+    Tries copy_file_range, then sendfile, then reads and writes through
+    buffer. Each step carries on from where the previous one stopped. The
+    copy is flushed to disk before returning.
+
+    If digest is given, the source is fed to it during the copy, so it is
+    read from the disk only once: the read/write loop hashes what it reads,
+    and the kernel copies hash each chunk first and then copy it from the
+    page cache.
+
+    Returns:
+        int: Bytes copied.
+    """
+    with open(source, "rb", buffering=0) as src, open(destination, "wb", buffering=0) as dst:
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        size = os.fstat(src_fd).st_size
+        view = memoryview(buffer if buffer is not None else bytearray(BUFFER_SIZE))
+        offset = hashed = 0
+        for copy in KERNEL_COPIES:
+            try:
+                while offset < size:
+                    count = min(COPY_CHUNK, size - offset)
+                    if digest is not None and hashed < offset + count:
+                        hashed = _hash_range(src, view, digest, hashed, offset + count)
+                    sent = copy(src_fd, dst_fd, offset, count)
+                    if not sent:
+                        # The source shrank since it was stat'ed.
+                        size = offset
+                    offset += sent
+                break
+            except OSError as e:
+                if e.errno not in NO_KERNEL_COPY:
+                    raise
+        else:
+            src.seek(offset)
+            dst.seek(offset)
+            while True:
+                read = src.readinto(view)
+                if not read:
+                    break
+                if digest is not None and offset + read > hashed:
+                    # A kernel copy that gave up may have hashed part of this already.
+                    digest.update(view[max(0, hashed - offset):read])
+                    hashed = offset + read
+                written = 0
+                while written < read:
+                    written += dst.write(view[written:read])
+                offset += read
+        os.fsync(dst_fd)
+        _drop_cache(src_fd)
+        _drop_cache(dst_fd)
+    return offset
+
+
+def file_digest(path, buffer=None):
+    """
+    BLAKE2b of a file, read through buffer.
+
+    Pages that are not dirty are dropped first, so a file that was just
+    written and flushed is read back from the disk rather than from memory.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.blake2b()
+    view = memoryview(buffer if buffer is not None else bytearray(BUFFER_SIZE))
+    with open(path, "rb", buffering=0) as f:
+        _drop_cache(f.fileno())
+        while True:
+            read = f.readinto(view)
+            if not read:
+                break
+            digest.update(view[:read])
+        _drop_cache(f.fileno())
+    return digest.hexdigest()
+
+
+def describe_export(export):
+    """One-line readout of the progress stored by Exporter, e.g. for a window title."""
+    done_mb = export["bytes_done"] / (1024 * 1024)
+    total_mb = export["bytes_total"] / (1024 * 1024)
+    text = f"{export['files_done']}/{export['files_total']} photos, {done_mb:.0f}/{total_mb:.0f} MB"
+    if export["bytes_per_second"]:
+        text += f", {export['bytes_per_second'] / (1024 * 1024):.0f} MB/s"
+    if export["eta_seconds"] is not None:
+        minutes, seconds = divmod(int(export["eta_seconds"]), 60)
+        text += f", {minutes}:{seconds:02d} left"
+    return text
+
+
+class ExportManifest:
+    def __init__(self, destination):
+        """
+        Record of the files already copied to destination and verified.
+
+        Entries are appended as JSON lines, each one written after its copy
+        is on disk, so an interrupted export loses at most the line being
+        written and the next run carries on.
+        """
+        self.path = os.path.join(destination, EXPORT_MANIFEST)
+        self.entries = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry["path"]] = (entry["size"], entry["mtime_ns"], entry["blake2b"])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except FileNotFoundError:
+            pass
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def is_current(self, relative, size, mtime_ns, target):
+        """True if relative was copied from a source of this size and mtime and target is still there."""
+        entry = self.entries.get(relative)
+        if entry is None or entry[:2] != (size, mtime_ns):
+            return False
+        try:
+            return os.stat(target).st_size == size
+        except OSError:
+            return False
+
+    def record(self, relative, size, mtime_ns, digest):
+        line = json.dumps({"path": relative, "size": size, "mtime_ns": mtime_ns, "blake2b": digest})
+        with self._lock:
+            self.entries[relative] = (size, mtime_ns, digest)
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Exporter:
+    def __init__(self, workers=DEFAULT_EXPORT_WORKERS):
+        """
+        Copy the photos kept in a folder to a backup destination and verify every copy.
+
+        Files are copied on a thread pool by copy_file(), which checksums the
+        source as it copies, and the copy is read back from the disk and
+        compared with that checksum before it gets its final name. A
+        manifest in the destination lists the verified copies, so running the
+        export again only copies what is new or changed. Files, bytes,
+        throughput and ETA can be read from any thread with progress() while
+        the export runs, e.g. by the UI to pass on to its ProgressManager.
+
+        Args:
+            workers (int): Files copied at the same time.
+        """
+        self.workers = workers
+        self._stopping = threading.Event()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._progress = None
+        self._snapshot = None
+        self._started = 0.0
+        self._reported = 0.0
+
+    def progress(self):
+        """
+        The progress of the running or last export, as of at most PROGRESS_INTERVAL ago.
+
+        Returns:
+            dict: Files and bytes done and in total, "bytes_per_second" and
+                "eta_seconds" (None while unknown), or None before the first export.
+        """
+        with self._lock:
+            return dict(self._snapshot) if self._snapshot is not None else None
+
+    def stop(self):
+        """Finish the copies in progress and skip the rest; the next export resumes from there."""
+        self._stopping.set()
+
+    def export(self, folder, destination, paths=None, recursive=True):
+        """
+        Copy images below folder to the same relative paths below destination.
+
+        Args:
+            folder (str): Root of the photos to export.
+            destination (str): Root of the copies; created if missing.
+            paths (list): Images below folder to export. Defaults to every
+                image found by scan_images, which skips 'deleted' folders.
+            recursive (bool): Whether the default scan descends into subfolders.
+
+        Returns:
+            dict: "copied", "skipped" and "failed" file counts, "bytes_copied",
+                "seconds" and whether the export was "stopped".
+        """
+        folder = os.path.abspath(folder)
+        destination = os.path.abspath(destination)
+        if is_within(destination, folder):
+            raise ValueError(f"Cannot export '{folder}' into itself ('{destination}').")
+        if paths is None:
+            paths = [path for batch in scan_images(folder, recursive) for path in batch]
+        os.makedirs(destination, exist_ok=True)
+
+        self._stopping.clear()
+        self._started = time.perf_counter()
+        manifest = ExportManifest(destination)
+        todo = []
+        skipped = 0
+        skipped_bytes = 0
+        total_bytes = 0
+        for path in paths:
+            path = os.path.abspath(path)
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                logger.warning("Skipping '%s' in export: %s", path, e)
+                continue
+            relative = os.path.relpath(path, folder)
+            target = os.path.join(destination, relative)
+            total_bytes += st.st_size
+            if manifest.is_current(relative, st.st_size, st.st_mtime_ns, target):
+                skipped += 1
+                skipped_bytes += st.st_size
+            else:
+                todo.append((path, relative, target, st.st_size, st.st_mtime_ns))
+
+        self._progress = {
+            "destination": destination,
+            "files_done": skipped,
+            "files_total": skipped + len(todo),
+            "bytes_done": skipped_bytes,
+            "bytes_total": total_bytes,
+            "bytes_copied": 0,
+            "failed": 0,
+            "bytes_per_second": 0.0,
+            "eta_seconds": None,
+        }
+        logger.info(
+            "Exporting %s photos from '%s' to '%s' (%s already copied).",
+            len(todo), folder, destination, skipped
+        )
+        self._report(force=True)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export") as pool:
+                results = list(pool.map(lambda job: self._export_file(manifest, *job), todo))
+        finally:
+            manifest.close()
+        self._report(force=True)
+
+        progress = self._progress
+        summary = {
+            "copied": results.count(True),
+            "skipped": skipped,
+            "failed": progress["failed"],
+            "bytes_copied": progress["bytes_copied"],
+            "seconds": time.perf_counter() - self._started,
+            "stopped": self._stopping.is_set(),
+        }
+        logger.info(
+            "Export to '%s' finished: %s copied, %s already there, %s failed in %.1f s.",
+            destination, summary["copied"], skipped, summary["failed"], summary["seconds"]
+        )
+        return summary
+
+    def _buffer(self):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = bytearray(BUFFER_SIZE)
+        return buffer
+
+    def _export_file(self, manifest, source, relative, target, size, mtime_ns):
+        """Copy, verify and rename one file; returns True once it is recorded in the manifest."""
+        if self._stopping.is_set():
+            return False
+        partial = target + PARTIAL_SUFFIX
+        buffer = self._buffer()
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            source_digest = hashlib.blake2b()
+            with metrics.timer("export_copy"):
+                copied = copy_file(source, partial, buffer, source_digest)
+            os.utime(partial, ns=(mtime_ns, mtime_ns))
+            with metrics.timer("export_verify"):
+                digest = file_digest(partial, buffer)
+                if digest != source_digest.hexdigest():
+                    raise OSError(errno.EIO, "Checksum of the copy does not match", source)
+            os.replace(partial, target)
+            manifest.record(relative, size, mtime_ns, digest)
+        except Exception as e:
+            logger.error("Failed to export '%s': %s", source, e)
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            with self._lock:
+                self._progress["failed"] += 1
+            return False
+
+        metrics.increment("export_bytes", copied)
+        with self._lock:
+            progress = self._progress
+            progress["files_done"] += 1
+            progress["bytes_done"] += size
+            progress["bytes_copied"] += copied
+        self._report()
+        return True
+
+    def _report(self, force=False):
+        """Update throughput and ETA and publish them for progress(), at most every PROGRESS_INTERVAL."""
+        now = time.perf_counter()
+        with self._lock:
+            if not force and now - self._reported < PROGRESS_INTERVAL:
+                return
+            self._reported = now
+            progress = self._progress
+            elapsed = now - self._started
+            # Files found already copied say nothing about the copy speed.
+            rate = progress["bytes_copied"] / elapsed if elapsed > 0 else 0.0
+            progress["bytes_per_second"] = rate
+            remaining = progress["bytes_total"] - progress["bytes_done"]
+            progress["eta_seconds"] = remaining / rate if rate else (0.0 if not remaining else None)
+            self._snapshot = dict(progress)
@@ -0,0 +1,188 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_INDEX_PATH = os.path.join("cache", "index.db")
+
+# Paths looked up per query; older SQLite builds allow at most 999 parameters.
+LOOKUP_BATCH = 500
+
+
+class FileIndex:
+    def __init__(self, db_path=DEFAULT_INDEX_PATH, table="entries"):
+        """
+        Persistent per-file results (hashes, scores, metadata) in SQLite.
+
+        Each row is keyed by absolute path and stores the file's size and
+        mtime alongside the data, so an entry is only trusted while the file
+        is unchanged. Several indexes can share one database via `table`.
+        """
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", table):
+            raise ValueError(f"Invalid index table name: {table}")
+        self.db_path = db_path
+        self.table = table
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, data TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def lookup(self, paths):
+        """
+        Split paths into those with a valid entry and those needing (re)computation.
+
+        Returns:
+            tuple: (dict of path -> data for valid entries, list of missing or stale paths)
+        """
+        # The database is shared by every folder ever opened, so only the
+        # requested rows are read.
+        keys = list(dict.fromkeys(os.path.abspath(path) for path in paths))
+        rows = {}
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[start:start + LOOKUP_BATCH]
+                placeholders = ", ".join("?" * len(batch))
+                for row in self._conn.execute(
+                    f"SELECT path, size, mtime_ns, data FROM {self.table} WHERE path IN ({placeholders})", batch
+                ):
+                    rows[row[0]] = row[1:]
+
+        found = {}
+        missing = []
+        for path in paths:
+            row = rows.get(os.path.abspath(path))
+            if row is not None:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if st.st_size == row[0] and st.st_mtime_ns == row[1]:
+                    found[path] = json.loads(row[2])
+                    continue
+            missing.append(path)
+        return found, missing
+
+    def get(self, path):
+        """Return the data stored for an unchanged file, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT size, mtime_ns, data FROM {self.table} WHERE path = ?", (os.path.abspath(path),)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if st.st_size != row[0] or st.st_mtime_ns != row[1]:
+            return None
+        return json.loads(row[2])
+
+    def put_many(self, items):
+        """
+        Store results for several files in one transaction.
+
+        Args:
+            items: Iterable of (path, size, mtime_ns, data) tuples, where size
+                and mtime_ns were taken from the file the data was computed from.
+        """
+        rows = [
+            (os.path.abspath(path), size, mtime_ns, json.dumps(data))
+            for path, size, mtime_ns, data in items
+        ]
+        if not rows:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (path, size, mtime_ns, data) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+            logger.debug("Stored %d entries in index '%s'.", len(rows), self.table)
+        except sqlite3.Error as e:
+            logger.error("Failed to update index '%s': %s", self.table, e)
+
+    def put(self, path, data):
+        """Store the data for a file, stamped with its current size and mtime."""
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            logger.error("Cannot index '%s': %s", path, e)
+            return
+        self.put_many([(path, st.st_size, st.st_mtime_ns, data)])
+
+    def remove(self, paths):
+        rows = [(os.path.abspath(path),) for path in paths]
+        with self._lock, self._conn:
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE path = ?", rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+
+def update_index_paths(renamed=(), removed=(), db_path=DEFAULT_INDEX_PATH):
+    """
+    Follow renamed files and forget removed ones in every index table of a database.
+
+    A rename keeps a file's size and mtime, so its entries stay valid under the
+    new path. Nothing is created if the database does not exist yet.
+
+    Args:
+        renamed: Iterable of (old_path, new_path) pairs.
+        removed: Iterable of paths.
+    """
+    renamed = [(os.path.abspath(new), os.path.abspath(old)) for old, new in renamed]
+    removed = [(os.path.abspath(path),) for path in removed]
+    if not (renamed or removed) or not os.path.exists(db_path):
+        return
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            with conn:
+                tables = [
+                    row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                    if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", row[0])
+                ]
+                for table in tables:
+                    conn.executemany(f"DELETE FROM {table} WHERE path = ?", removed)
+                    conn.executemany(f"UPDATE OR REPLACE {table} SET path = ? WHERE path = ?", renamed)
+        finally:
+            conn.close()
+        logger.debug("Index paths updated: %d renamed, %d removed.", len(renamed), len(removed))
+    except sqlite3.Error as e:
+        logger.error("Failed to update index paths: %s", e)
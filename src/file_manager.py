@@ -18,37 +18,442 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import bisect
 import os
-import shutil
+import queue
 import json
+import threading
+from collections import deque
 from datetime import datetime
+from delete_queue import DeleteQueue
+from file_index import update_index_paths
+from image_catalog import ImageCatalog
 from logger import get_logger
+from metrics import metrics
+from state_store import GLOBAL_SCOPE, get_default_store
 
 logger = get_logger(__name__)
 
-SESSION_FILE = "session.json"
+# Sessions used to live in this file; it is still read once for folders
+# that have no session in the state store yet.
+LEGACY_SESSION_FILE = "session.json"
 DELETED_FOLDER = "deleted"
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+SCAN_BATCH_SIZE = 256
+UNDO_LIMIT = 1000
+
+# Up to this many new images are inserted at their place in filename order;
+# more are appended and the list re-sorted.
+SORTED_INSERT_MAX = 64
+
+# Sort keys over MetadataIndex entries; images without the field go last.
+METADATA_SORT_KEYS = {
+    "captured": lambda data: (data.get("captured") is None, data.get("captured") or ""),
+    "camera": lambda data: (not data.get("camera"), (data.get("camera") or "").lower(), data.get("captured") or ""),
+    "pixels": lambda data: (not data.get("width"), (data.get("width") or 0) * (data.get("height") or 0)),
+}
+
+
+def scan_images(folder, recursive=False, batch_size=SCAN_BATCH_SIZE, extensions=IMAGE_EXTENSIONS, listing=None):
+    """
+    Yield lists of image paths found in a folder, in directory order.
+
+    The first image is yielded on its own so it can be shown straight away;
+    after that paths are batched. The 'deleted' folder is never descended into.
+
+    If listing is a dict it is filled with {directory: (mtime_ns, {path: inode},
+    subdirectories)} for every directory read, as stored by FolderSnapshot.
+    The mtime is taken before the directory is read, so a change made during
+    the scan shows up as a changed directory next time.
+    """
+    pending = [folder]
+    batch = []
+    first = True
+    while pending:
+        current = pending.pop()
+        try:
+            if listing is not None:
+                files = {}
+                subdirs = []
+                listing[current] = (os.stat(current).st_mtime_ns, files, subdirs)
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name != DELETED_FOLDER:
+                                if recursive:
+                                    pending.append(entry.path)
+                                if listing is not None:
+                                    subdirs.append(entry.path)
+                            continue
+                        if not entry.name.lower().endswith(extensions) or not entry.is_file():
+                            continue
+                        if listing is not None:
+                            files[entry.path] = entry.inode()
+                    except OSError:
+                        continue
+                    batch.append(entry.path)
+                    if first or len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                        first = False
+        except OSError as e:
+            logger.warning("Skipping unreadable folder '%s': %s", current, e)
+            if listing is not None:
+                listing.pop(current, None)
+    if batch:
+        yield batch
+
+
+def is_within(path, folder):
+    """True if path is folder itself or anything below it."""
+    folder = os.path.join(folder, "")
+    return path.startswith(folder) or os.path.join(path, "") == folder
+
+
+def detect_changes(snapshot, folder, recursive):
+    """
+    Find the images added, removed and renamed since a folder's snapshot.
+
+    Only directories whose mtime differs from the snapshot are relisted; every
+    other directory costs one stat. A removed and an added path with the same
+    inode are reported as a rename. The snapshot is updated to the new state.
+
+    Returns:
+        tuple: (added, removed, renamed) with renamed as (old, new) pairs, or
+            None if the folder has no snapshot.
+    """
+    stored = snapshot.dirs(folder, recursive)
+    if not stored:
+        return None
+
+    changed = []
+    gone = []
+    for directory, mtime_ns in stored.items():
+        try:
+            if os.stat(directory).st_mtime_ns != mtime_ns:
+                changed.append(directory)
+        except OSError:
+            gone.append(directory)
+    if not changed and not gone:
+        return [], [], []
+
+    listing = {}
+    for directory in changed:
+        for _ in scan_images(directory, recursive=False, listing=listing):
+            pass
+    if recursive:
+        new_dirs = [sub for entry in list(listing.values()) for sub in entry[2] if sub not in stored]
+        for directory in new_dirs:
+            for _ in scan_images(directory, recursive=True, listing=listing):
+                pass
+    gone.extend(directory for directory in changed if directory not in listing)
+
+    old = snapshot.files(folder, recursive, [*changed, *gone])
+    new = {path: inode for entry in listing.values() for path, inode in entry[1].items()}
+    removed = [path for path in old if path not in new]
+    added = [path for path in new if path not in old]
+
+    by_inode = {old[path]: path for path in removed}
+    renamed = []
+    for path in added:
+        source = by_inode.pop(new[path], None)
+        if source is not None:
+            renamed.append((source, path))
+    if renamed:
+        moved = {path for pair in renamed for path in pair}
+        removed = [path for path in removed if path not in moved]
+        added = [path for path in added if path not in moved]
+
+    snapshot.update(folder, recursive, listing, removed_dirs=gone)
+    return added, removed, renamed
+
 
 class FileManager:
-    def __init__(self):
+    def __init__(self, state_store=None, delete_queue=None, snapshot=None):
+        """
+        Args:
+            state_store (StateStore): Where sessions are kept.
+            delete_queue (DeleteQueue): Moves deleted images in the background.
+            snapshot (FolderSnapshot): Folder listings from earlier scans. With
+                one, reopening a folder only relists the directories that
+                changed and check_changes() can pick up edits made meanwhile.
+        """
+        self.state_store = state_store or get_default_store()
+        self.delete_queue = delete_queue or DeleteQueue()
+        self.snapshot = snapshot
+        self.undo_stack = deque(maxlen=UNDO_LIMIT)
         self.folder = ""
-        self.images = []
+        self.recursive = False
+        # Further (folder, recursive) pairs shown together with self.folder.
+        self.extra_folders = []
+        self.images = ImageCatalog()
         self.index = 0
+        self.scanning = False
+        self._scan_queue = None
+        self.groups = []
+        self.group_index = 0
+        self._unfiltered = None
+        self._removed = set()
+        self._name_order = True
+        self._resume_image = None
 
-    def load_images(self, folder):
+    def load_images(self, folder, recursive=False):
         """Load image files from the selected folder and prepare session tracking."""
         try:
             self.folder = folder
+            self.recursive = recursive
+            self.extra_folders = []
+            self._resume_image = None
             self.index = 0
-            self.images = [os.path.join(folder, f) for f in os.listdir(folder)
-                           if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-            self.images.sort()
-            logger.info(f"{len(self.images)} images loaded from folder: {folder}")
+            self._unfiltered = None
+            self._name_order = True
+            with metrics.timer("scan"):
+                self.images = ImageCatalog(self.scan_folder(folder, recursive))
+            logger.info("%s images loaded from folder: %s", len(self.images), folder)
 
             # Load session if exists
             self.load_session()
         except Exception as e:
-            logger.error(f"Error loading images: {e}")
+            logger.error("Error loading images: %s", e)
+
+    def start_scan(self, folder, recursive=False):
+        """
+        Start loading image files from a folder on a background thread.
+
+        Call poll_scan() from the UI thread to merge the images found so far.
+        """
+        self.folder = folder
+        self.recursive = recursive
+        self.extra_folders = []
+        self._resume_image = None
+        self.index = 0
+        self.images = ImageCatalog()
+        self._unfiltered = None
+        self._name_order = True
+        self.scanning = True
+        self._scan_queue = queue.Queue()
+        threading.Thread(
+            target=self._scan_worker,
+            args=(folder, recursive, self._scan_queue),
+            name="folder-scan",
+            daemon=True
+        ).start()
+        logger.info("Scanning folder: %s (recursive=%s)", folder, recursive)
+
+    def _scan_worker(self, folder, recursive, results):
+        try:
+            with metrics.timer("scan"):
+                images = self._snapshot_images(folder, recursive)
+                if images is not None:
+                    results.put(images)
+                    return
+                listing = {} if self.snapshot is not None else None
+                for batch in scan_images(folder, recursive, listing=listing):
+                    results.put(batch)
+                if listing is not None:
+                    self.snapshot.save(folder, recursive, listing)
+        except Exception as e:
+            logger.error("Error scanning folder: %s", e)
+        finally:
+            results.put(None)
+
+    def scan_folder(self, folder, recursive=False):
+        """
+        List a folder's images in filename order, from its snapshot when there is one.
+
+        Only does I/O, so it can run off the UI thread.
+        """
+        images = self._snapshot_images(folder, recursive)
+        if images is None:
+            listing = {} if self.snapshot is not None else None
+            images = sorted(path for batch in scan_images(folder, recursive, listing=listing) for path in batch)
+            if listing is not None:
+                self.snapshot.save(folder, recursive, listing)
+        return images
+
+    def add_folder(self, folder, recursive, images):
+        """
+        Show another folder's images, as listed by scan_folder(), together with the loaded ones.
+
+        Each folder keeps its own 'deleted' folder and session. Images are
+        merged in filename order, or appended when the list is in another
+        order; an active filter is cleared first. The current image stays
+        current, unless the session being resumed was on an image of this
+        folder.
+
+        Returns:
+            int: Number of images added.
+        """
+        self.clear_filter()
+        current = self.get_current_image() if self.images else None
+        if any(is_within(folder, root) or is_within(root, folder) for root, _ in self._folders()):
+            present = set(self.images)
+            images = [path for path in images if path not in present]
+        if not self.folder:
+            self.folder = folder
+            self.recursive = recursive
+        elif (folder, recursive) not in self._folders():
+            self.extra_folders.append((folder, recursive))
+        self._insert_images(self.images, images)
+
+        if self._resume_image in self.images:
+            current = self._resume_image
+            self._resume_image = None
+        if current is not None:
+            self.index = self.images.index(current)
+        self.save_session()
+        logger.info("%s images added from folder: %s", len(images), folder)
+        return len(images)
+
+    def _folders(self):
+        return [(self.folder, self.recursive), *self.extra_folders]
+
+    def _root_of(self, image_path):
+        """The loaded folder an image belongs to, the innermost one if they nest."""
+        roots = [folder for folder, _ in self._folders() if is_within(image_path, folder)]
+        return max(roots, key=len) if roots else self.folder
+
+    def _insert_images(self, images, new):
+        """Add paths not in images, at their filename place while the list is in filename order."""
+        if not new:
+            return
+        if not self._name_order:
+            images.extend(sorted(new))
+        elif len(new) <= SORTED_INSERT_MAX:
+            for path in new:
+                images.insert(bisect.bisect_left(images, path), path)
+        else:
+            images.extend(new)
+            images.sort()
+
+    def _snapshot_images(self, folder, recursive):
+        """Return the folder's sorted image list from its snapshot brought up to date, or None without one."""
+        if self.snapshot is None:
+            return None
+        changes = detect_changes(self.snapshot, folder, recursive)
+        if changes is None:
+            return None
+        added, removed, renamed = changes
+        update_index_paths(renamed, removed)
+        logger.info(
+            "Folder snapshot reused: %s added, %s removed, %s renamed.", len(added), len(removed), len(renamed)
+        )
+        return self.snapshot.paths(folder, recursive)
+
+    def check_changes(self):
+        """
+        Compare the loaded folders with their snapshots and update the snapshots.
+
+        Only does I/O, so it can run off the UI thread; hand the result to
+        apply_changes(). Entries of renamed and removed files are moved or
+        dropped in the file index as well.
+
+        Returns:
+            tuple: (added, removed, renamed) lists, all empty when nothing
+                changed or there is no snapshot.
+        """
+        added, removed, renamed = [], [], []
+        if self.snapshot is None or not self.folder or self.scanning:
+            return added, removed, renamed
+        for folder, recursive in self._folders():
+            changes = detect_changes(self.snapshot, folder, recursive)
+            if changes is None:
+                continue
+            update_index_paths(changes[2], changes[1])
+            added += changes[0]
+            removed += changes[1]
+            renamed += changes[2]
+        return added, removed, renamed
+
+    def apply_changes(self, added, removed, renamed):
+        """
+        Bring the loaded list up to date with a check_changes() result.
+
+        Renamed images keep their place and removed ones are dropped. New
+        images are merged in filename order, or appended when the list is in
+        another order; while a filter is active they wait behind it. The
+        current image stays current if it is still there.
+
+        Returns:
+            bool: True if the list changed.
+        """
+        moves = dict(renamed)
+        gone = set(removed)
+        current = self.get_current_image() if self.images else None
+        changed = False
+        for images in (self.images, self._unfiltered):
+            if images is None:
+                continue
+            new = []
+            for path in gone:
+                if path in images:
+                    images.remove(path)
+                    changed = True
+            for source, target in moves.items():
+                if source not in images:
+                    continue
+                changed = True
+                if self._name_order or target in images:
+                    images.remove(source)
+                    new.append(target)
+                else:
+                    images[images.index(source)] = target
+            if added and (images is self._unfiltered or self._unfiltered is None):
+                new.extend(added)
+            new = [path for path in dict.fromkeys(new) if path not in images]
+            if new:
+                self._insert_images(images, new)
+                changed = True
+        if not changed:
+            return False
+
+        self._removed = {moves.get(path, path) for path in self._removed if path not in gone}
+        for group in self.groups:
+            group[:] = [moves.get(path, path) for path in group]
+        current = moves.get(current, current)
+        if current in self.images:
+            self.index = self.images.index(current)
+        elif self.index >= len(self.images):
+            self.index = 0
+        self.save_session()
+        logger.info("Folder changed: %s added, %s removed, %s renamed.", len(added), len(removed), len(renamed))
+        return True
+
+    def poll_scan(self):
+        """
+        Append the images found since the last call.
+
+        Once the scan completes the list is sorted, the current image keeps
+        its place and a saved session is resumed if the user has not moved.
+
+        Returns:
+            bool: True while the scan is still running.
+        """
+        if not self.scanning:
+            return False
+
+        while True:
+            try:
+                batch = self._scan_queue.get_nowait()
+            except queue.Empty:
+                return True
+            if batch is None:
+                break
+            self.images.extend(batch)
+
+        self.scanning = False
+        self._scan_queue = None
+        self.groups = []
+        self.group_index = 0
+        current = self.get_current_image() if self.images else None
+        self.images.sort()
+        logger.info("%s images loaded from folder: %s", len(self.images), self.folder)
+        if self.index == 0:
+            self.load_session()
+        elif current is not None:
+            self.index = self.images.index(current)
+        return False
 
     def get_current_image(self):
         """Return the current image path."""
@@ -77,24 +482,300 @@ class FileManager:
         else:
             logger.warning("No images available to navigate.")
 
+    def sort_images(self, key=None, reverse=False):
+        """Reorder the loaded images (filename order by default) and start from the first one."""
+        self.images.sort(key=key, reverse=reverse)
+        self._name_order = key is None and not reverse
+        self.index = 0
+        self.save_session()
+        logger.info("Images reordered (%s order).", "custom" if key else "filename")
+
+    def set_order(self, ordered_paths):
+        """Reorder the loaded images to follow ordered_paths; images not listed keep their order at the end."""
+        rank = {path: position for position, path in enumerate(ordered_paths)}
+        self.sort_images(key=lambda path: rank.get(path, len(rank)))
+
+    def all_images(self):
+        """Every loaded image, including those hidden by a filter."""
+        if self._unfiltered is None:
+            return list(self.images)
+        return [path for path in self._unfiltered if path not in self._removed]
+
+    def images_by_folder(self):
+        """Every loaded image grouped under the loaded folder it belongs to, as {folder: [paths]}."""
+        groups = {folder: [] for folder, _ in self._folders()}
+        for path in self.all_images():
+            groups[self._root_of(path)].append(path)
+        return groups
+
+    def sort_by_metadata(self, metadata, field="captured"):
+        """
+        Order images by a MetadataIndex field: "captured", "camera" or "pixels".
+
+        Images without metadata keep their relative order at the end.
+        """
+        field_key = METADATA_SORT_KEYS[field]
+        self.sort_images(key=lambda path: (path not in metadata, field_key(metadata.get(path, {}))))
+
+    def filter_images(self, metadata, camera=None, date_from=None, date_to=None, min_width=0, min_height=0):
+        """
+        Narrow the list to images whose metadata matches every given condition.
+
+        Args:
+            metadata (dict): path -> MetadataIndex entry.
+            camera (str): Case-insensitive substring of the camera name.
+            date_from (str): Earliest capture date, "YYYY-MM-DD" or any prefix of
+                "YYYY-MM-DD HH:MM:SS"; inclusive.
+            date_to (str): Latest capture date in the same form; inclusive.
+            min_width (int): Smallest displayed width.
+            min_height (int): Smallest displayed height.
+
+        Returns:
+            int: Number of images left. clear_filter() brings the rest back.
+        """
+        camera = camera.lower() if camera else None
+
+        def matches(path):
+            data = metadata.get(path)
+            if data is None:
+                return False
+            if camera and camera not in (data.get("camera") or "").lower():
+                return False
+            captured = data.get("captured")
+            if (date_from or date_to) and captured is None:
+                return False
+            if date_from and captured < date_from:
+                return False
+            if date_to and captured[:len(date_to)] > date_to:
+                return False
+            return (data.get("width") or 0) >= min_width and (data.get("height") or 0) >= min_height
+
+        current = self.get_current_image() if self.images else None
+        if self._unfiltered is None:
+            self._unfiltered = self.images
+            self._removed = set()
+        self.images = ImageCatalog(path for path in self._unfiltered if path not in self._removed and matches(path))
+        self._restore_position(current)
+        logger.info("Filter applied: %s of %s images shown.", len(self.images), len(self._unfiltered))
+        return len(self.images)
+
+    def clear_filter(self):
+        """Show every image again, minus the ones deleted while filtered."""
+        if self._unfiltered is None:
+            return
+        current = self.get_current_image() if self.images else None
+        for path in self._removed:
+            if path in self._unfiltered:
+                self._unfiltered.remove(path)
+        self.images = self._unfiltered
+        self._unfiltered = None
+        self._removed = set()
+        self._restore_position(current)
+        logger.info("Filter cleared.")
+
+    def _restore_position(self, current):
+        self.groups = []
+        self.group_index = 0
+        self.index = self.images.index(current) if current in self.images else 0
+        self.save_session()
+
+    def set_groups(self, groups):
+        """
+        Set clusters of related images (e.g. near-duplicates) to step through.
+
+        Only groups with at least two currently loaded images are kept. Moves
+        to the first image of the first group.
+        """
+        loaded = set(self.images)
+        self.groups = [group for group in ([p for p in g if p in loaded] for g in groups) if len(group) > 1]
+        self.group_index = 0
+        logger.info("%s image groups available for review.", len(self.groups))
+        self._jump_to_group()
+
+    def get_current_group(self):
+        """Return the paths of the current group, or an empty list."""
+        if self.groups:
+            return self.groups[self.group_index]
+        return []
+
+    def next_group(self):
+        """Move to the first image of the next group."""
+        if self.groups:
+            self.group_index = (self.group_index + 1) % len(self.groups)
+            self._jump_to_group()
+        else:
+            logger.warning("No image groups available to navigate.")
+
+    def previous_group(self):
+        """Move to the first image of the previous group."""
+        if self.groups:
+            self.group_index = (self.group_index - 1) % len(self.groups)
+            self._jump_to_group()
+        else:
+            logger.warning("No image groups available to navigate.")
+
+    def keep_one_in_group(self):
+        """
+        Keep one image of the current group and delete the others, then move to the next group.
+
+        The current image is kept if it belongs to the group, otherwise the
+        group's first image is. Each deletion can be undone separately.
+
+        Returns:
+            list: The deleted paths.
+        """
+        group = self.get_current_group()
+        if not group:
+            logger.warning("No image group to resolve.")
+            return []
+        current = self.get_current_image()
+        keep = current if current in group else group[0]
+        deleted = self.delete_images([path for path in group if path != keep])
+        self._jump_to_group()
+        return deleted
+
+    def _jump_to_group(self):
+        """Point index at the first still-loaded image of the current group, pruning deleted ones."""
+        while self.groups:
+            group = self.groups[self.group_index]
+            loaded = [path for path in group if path in self.images]
+            if len(loaded) > 1:
+                group[:] = loaded
+                self.index = self.images.index(loaded[0])
+                self.save_session()
+                return
+            del self.groups[self.group_index]
+            if self.group_index >= len(self.groups):
+                self.group_index = 0
+
     def delete_image(self):
-        """Move the current image to a 'deleted' folder."""
+        """
+        Remove the current image from the list and queue its move to a 'deleted' folder.
+
+        The move happens on the delete queue's worker thread, so this returns
+        immediately. Returns the deleted path, or None.
+        """
         if self.images:
             try:
                 image_path = self.images[self.index]
-                deleted_path = os.path.join(self.folder, DELETED_FOLDER)
-                os.makedirs(deleted_path, exist_ok=True)
-                shutil.move(image_path, deleted_path)
-                logger.info(f"Deleted image moved to: {deleted_path}")
+                deleted_path = os.path.join(self._root_of(image_path), DELETED_FOLDER)
+                job = self.delete_queue.submit(image_path, deleted_path)
+                metrics.increment("deletes")
+                self.undo_stack.append((job, self.index))
+                if self._unfiltered is not None:
+                    self._removed.add(image_path)
 
                 del self.images[self.index]
                 if self.index >= len(self.images):
                     self.index = 0
                 self.save_session()
+                return image_path
             except Exception as e:
-                logger.error(f"Error deleting image: {e}")
+                logger.error("Error deleting image: %s", e)
         else:
             logger.warning("No images to delete.")
+        return None
+
+    def delete_images(self, image_paths):
+        """
+        Remove several images at once, e.g. a selection in the grid view.
+
+        Each one can be undone separately with undo_delete(), newest first.
+        The current image stays current if it is kept, otherwise the next
+        kept image becomes current.
+
+        Returns:
+            list: The deleted paths, in list order.
+        """
+        positions = sorted(self.images.index(path) for path in set(image_paths) if path in self.images)
+        if not positions:
+            return []
+        deleted = []
+        removed = []
+        for position in positions:
+            image_path = self.images[position]
+            try:
+                job = self.delete_queue.submit(image_path, os.path.join(self._root_of(image_path), DELETED_FOLDER))
+            except Exception as e:
+                logger.error("Error deleting image: %s", e)
+                continue
+            metrics.increment("deletes")
+            # Undo runs newest first, so each position is relative to the
+            # list with all earlier deletions still applied.
+            self.undo_stack.append((job, position - len(removed)))
+            if self._unfiltered is not None:
+                self._removed.add(image_path)
+            removed.append(position)
+            deleted.append(image_path)
+
+        for position in reversed(removed):
+            del self.images[position]
+        self.index -= sum(1 for position in removed if position < self.index)
+        if self.index >= len(self.images):
+            self.index = 0
+        self.save_session()
+        logger.info("Deleted %s images.", len(deleted))
+        return deleted
+
+    def undo_delete(self):
+        """
+        Bring back the most recently deleted image and make it current.
+
+        Returns:
+            str: The restored path, or None if there was nothing to undo.
+        """
+        if not self.undo_stack:
+            logger.warning("Nothing to undo.")
+            return None
+
+        job, position = self.undo_stack.pop()
+        if not self.delete_queue.restore(job):
+            logger.error("Could not undo delete of: %s", job.source)
+            return None
+
+        self.index = min(position, len(self.images))
+        self.images.insert(self.index, job.source)
+        self._removed.discard(job.source)
+        self.save_session()
+        logger.info("Undid delete of: %s", job.source)
+        return job.source
+
+    def poll_failed_deletes(self):
+        """
+        Put back the images whose move into 'deleted' failed since the last call.
+
+        Each one returns to the position it was deleted from, as undo would
+        put it, and can no longer be undone. The current image stays current.
+
+        Returns:
+            list: The failed DeleteJobs; job.error holds the reason.
+        """
+        failed = self.delete_queue.take_failed()
+        if not failed:
+            return []
+        current = self.get_current_image() if self.images else None
+        failed_jobs = set(failed)
+        positions = {job: position for job, position in self.undo_stack if job in failed_jobs}
+        self.undo_stack = deque(
+            ((job, position) for job, position in self.undo_stack if job not in failed_jobs), maxlen=UNDO_LIMIT
+        )
+        # Newest first, the order undo runs in, so each position is relative
+        # to the list with the earlier deletions still applied.
+        for job in reversed(failed):
+            if job.source in self.images or not os.path.exists(job.source):
+                continue
+            position = positions.get(job, len(self.images))
+            self.images.insert(min(position, len(self.images)), job.source)
+            self._removed.discard(job.source)
+        if current is not None:
+            self.index = self.images.index(current)
+        self.save_session()
+        logger.warning("%s images could not be moved to '%s' and were put back.", len(failed), DELETED_FOLDER)
+        return failed
+
+    def close(self):
+        """Apply outstanding deletes before exit."""
+        self.delete_queue.close()
 
     def reset(self):
         """Reset session to start over from the beginning."""
@@ -103,31 +784,87 @@ class FileManager:
         logger.info("Session reset to start over.")
 
     def save_session(self):
-        """Save the current session progress to a file."""
+        """
+        Record the current session progress in the state store (flushed in the background).
+
+        With several folders loaded, the session of the folder holding the
+        current image is updated too, so opening that folder on its own later
+        resumes at the same image.
+        """
         try:
+            image = self.get_current_image()
+            timestamp = datetime.now().isoformat()
             session_data = {
                 "folder": self.folder,
                 "index": self.index,
-                "timestamp": datetime.now().isoformat()
+                "image": image,
+                "recursive": self.recursive,
+                "folders": [[folder, recursive] for folder, recursive in self.extra_folders],
+                "timestamp": timestamp
             }
-            with open(SESSION_FILE, "w") as f:
-                json.dump(session_data, f)
-            logger.info("Session saved successfully.")
+            root = self._root_of(image) if image and self.extra_folders else self.folder
+            with metrics.timer("state_save"):
+                self.state_store.put(self._scope(), "session", session_data)
+                self.state_store.put(GLOBAL_SCOPE, "last_folder", self.folder)
+                if root != self.folder:
+                    recursive = dict(self.extra_folders).get(root, False)
+                    self.state_store.put(self._scope(root), "session", {
+                        "folder": root,
+                        "index": 0,
+                        "image": image,
+                        "recursive": recursive,
+                        "timestamp": timestamp
+                    })
+            logger.debug("Session saved successfully.")
         except Exception as e:
-            logger.error(f"Error saving session: {e}")
+            logger.error("Error saving session: %s", e)
 
     def load_session(self):
         """Load previous session if it matches the current folder."""
-        if os.path.exists(SESSION_FILE):
-            try:
-                with open(SESSION_FILE, "r") as f:
-                    session_data = json.load(f)
-                if session_data.get("folder") == self.folder:
-                    self.index = session_data.get("index", 0)
-                    logger.info(f"Resuming session from index {self.index}.")
-                else:
-                    logger.info("Different folder detected. Starting fresh session.")
-            except Exception as e:
-                logger.error(f"Error loading session: {e}")
-        else:
-            logger.info("No previous session found. Starting fresh.")
+        try:
+            session_data = self.state_store.get(self._scope(), "session") or self._load_legacy_session()
+            if session_data and session_data.get("folder") == self.folder:
+                self.index = session_data.get("index", 0)
+                image = session_data.get("image")
+                if image and self.get_current_image() != image:
+                    if image in self.images:
+                        self.index = self.images.index(image)
+                    else:
+                        # The image may be in one of the session's other folders.
+                        self._resume_image = image
+                logger.info("Resuming session from index %s.", self.index)
+            else:
+                logger.info("No previous session found for this folder. Starting fresh.")
+        except Exception as e:
+            logger.error("Error loading session: %s", e)
+
+    def last_session(self):
+        """
+        Return the session of the most recently opened folder without scanning it.
+
+        Returns:
+            dict: With "folder", "index" and, for newer sessions, "image" and
+                "recursive"; None if there is none or the folder is gone.
+        """
+        try:
+            folder = self.state_store.get(GLOBAL_SCOPE, "last_folder")
+            if not folder or not os.path.isdir(folder):
+                return None
+            session_data = self.state_store.get(os.path.abspath(folder), "session")
+            if session_data and session_data.get("folder") == folder:
+                return session_data
+            return {"folder": folder, "index": 0}
+        except Exception as e:
+            logger.error("Error reading last session: %s", e)
+            return None
+
+    def _scope(self, folder=None):
+        folder = self.folder if folder is None else folder
+        return os.path.abspath(folder) if folder else GLOBAL_SCOPE
+
+    @staticmethod
+    def _load_legacy_session():
+        if not os.path.exists(LEGACY_SESSION_FILE):
+            return None
+        with open(LEGACY_SESSION_FILE, "r") as f:
+            return json.load(f)
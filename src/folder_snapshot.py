@@ -0,0 +1,153 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sqlite3
+import threading
+import time
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = os.path.join("cache", "snapshots.db")
+
+# A directory modified this recently when its listing is stored may still
+# change within the same mtime tick, so it is stored as unknown and relisted
+# next time.
+MTIME_SETTLE_NS = 2 * 1000 * 1000 * 1000
+UNKNOWN_MTIME = -1
+
+
+class FolderSnapshot:
+    def __init__(self, db_path=DEFAULT_SNAPSHOT_PATH):
+        """
+        Persistent listing of scanned folders: every directory's mtime and the
+        inode of every image in it.
+
+        Directory mtimes change whenever an entry is added, removed or renamed,
+        so comparing them tells which directories need relisting; inodes pair
+        up the removed and added paths of a rename. Listings come from
+        scan_images(listing=...) as {directory: (mtime_ns, {path: inode}, subdirectories)}.
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dirs ("
+            "root TEXT NOT NULL, recursive INTEGER NOT NULL, dir TEXT NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "PRIMARY KEY (root, recursive, dir))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "root TEXT NOT NULL, recursive INTEGER NOT NULL, path TEXT NOT NULL, dir TEXT NOT NULL, "
+            "inode INTEGER NOT NULL, PRIMARY KEY (root, recursive, path))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_by_dir ON files (root, recursive, dir)")
+        self._conn.commit()
+
+    @staticmethod
+    def _scope(folder, recursive):
+        return os.path.abspath(folder), int(bool(recursive))
+
+    def dirs(self, folder, recursive):
+        """Return {directory: mtime_ns} as stored, empty if the folder has no snapshot."""
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT dir, mtime_ns FROM dirs WHERE root = ? AND recursive = ?", self._scope(folder, recursive)
+            ))
+
+    def files(self, folder, recursive, directories):
+        """Return {path: inode} of the stored images in the given directories."""
+        found = {}
+        with self._lock:
+            for directory in directories:
+                found.update(self._conn.execute(
+                    "SELECT path, inode FROM files WHERE root = ? AND recursive = ? AND dir = ?",
+                    (*self._scope(folder, recursive), directory)
+                ))
+        return found
+
+    def paths(self, folder, recursive):
+        """
+        Return every stored image path in sorted order.
+
+        SQLite's binary collation orders UTF-8 like Python orders str, so the
+        list comes back sorted straight from the primary key.
+        """
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT path FROM files WHERE root = ? AND recursive = ? ORDER BY path",
+                self._scope(folder, recursive)
+            )]
+
+    def save(self, folder, recursive, listing):
+        """Replace the folder's snapshot with a complete listing."""
+        self.update(folder, recursive, listing, clear=True)
+
+    def update(self, folder, recursive, listing, removed_dirs=(), clear=False):
+        """
+        Store fresh listings of some directories and forget removed ones.
+
+        Args:
+            listing (dict): {directory: (mtime_ns, {path: inode}, subdirectories)}.
+            removed_dirs (iterable): Directories that no longer exist.
+            clear (bool): Drop everything stored for the folder first.
+        """
+        scope = self._scope(folder, recursive)
+        settled = time.time_ns() - MTIME_SETTLE_NS
+        try:
+            with self._lock, self._conn:
+                if clear:
+                    self._conn.execute("DELETE FROM dirs WHERE root = ? AND recursive = ?", scope)
+                    self._conn.execute("DELETE FROM files WHERE root = ? AND recursive = ?", scope)
+                for directory in (*listing, *removed_dirs):
+                    self._conn.execute(
+                        "DELETE FROM dirs WHERE root = ? AND recursive = ? AND dir = ?", (*scope, directory)
+                    )
+                    self._conn.execute(
+                        "DELETE FROM files WHERE root = ? AND recursive = ? AND dir = ?", (*scope, directory)
+                    )
+                self._conn.executemany(
+                    "INSERT INTO dirs (root, recursive, dir, mtime_ns) VALUES (?, ?, ?, ?)",
+                    [
+                        (*scope, directory, mtime_ns if mtime_ns < settled else UNKNOWN_MTIME)
+                        for directory, (mtime_ns, _, _) in listing.items()
+                    ]
+                )
+                self._conn.executemany(
+                    "INSERT INTO files (root, recursive, path, dir, inode) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (*scope, path, directory, inode)
+                        for directory, (_, files, _) in listing.items()
+                        for path, inode in files.items()
+                    ]
+                )
+        except sqlite3.Error as e:
+            logger.error("Failed to store folder snapshot: %s", e)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,295 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import tkinter as tk
+from PIL import Image, ImageTk
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Thumbnails are letterboxed into squares of this size so every tile's
+# PhotoImage has the same dimensions and can be repainted in place.
+THUMB_SIZE = 160
+TILE_PADDING = 8
+TILE_PITCH = THUMB_SIZE + TILE_PADDING
+
+# Thumbnail decode threads and the memory budget of decoded thumbnails.
+THUMB_WORKERS = 4
+THUMB_CACHE_MB = 64
+
+# How often to paint thumbnails that finished decoding.
+TILE_POLL_MS = 30
+
+# Pixels scrolled per mouse wheel notch or scrollbar arrow click.
+SCROLL_STEP = TILE_PITCH // 2
+
+TILE_BACKGROUND = (32, 32, 32)
+SELECTED_OUTLINE = "#3399ff"
+
+
+def column_count(width):
+    return max(1, width // TILE_PITCH)
+
+
+def content_height(count, columns):
+    return -(-count // columns) * TILE_PITCH
+
+
+def visible_range(top, height, columns, count):
+    """Return the (first, last) image indices, last exclusive, of the rows overlapping the viewport."""
+    first_row = max(0, top // TILE_PITCH)
+    last_row = (top + height) // TILE_PITCH + 1
+    return min(count, first_row * columns), min(count, last_row * columns)
+
+
+def index_at(x, y, top, columns, count):
+    """Return the image index under a viewport position, or None for the gaps and empty space."""
+    column = x // TILE_PITCH
+    if x < 0 or column >= columns:
+        return None
+    index = (y + top) // TILE_PITCH * columns + column
+    return index if 0 <= index < count else None
+
+
+class _Tile:
+    __slots__ = ("photo", "image_item", "outline_item", "index", "path", "loaded")
+
+    def __init__(self, canvas, placeholder):
+        self.photo = ImageTk.PhotoImage(placeholder)
+        self.image_item = canvas.create_image(0, 0, anchor="nw", image=self.photo)
+        self.outline_item = canvas.create_rectangle(0, 0, 0, 0, outline="", width=3)
+        self.index = None
+        self.path = None
+        self.loaded = False
+
+
+class ThumbnailGrid:
+    def __init__(self, parent, thumbnails, on_open=None, on_delete=None):
+        """
+        Contact-sheet view that only materialises the tiles in the viewport.
+
+        Scrolling is virtual: the canvas never holds more than one screen of
+        tiles, and tiles leaving the viewport are recycled, PhotoImage and
+        canvas items included, for the ones coming into view. Decoded
+        thumbnails live in the thumbnail prefetcher's byte-bounded cache.
+
+        Args:
+            parent (tk.Widget): Container for the grid frame.
+            thumbnails (Prefetcher): Decodes thumbnails on its worker pool.
+            on_open (callable): Called with an image index on double-click.
+            on_delete (callable): Called with the selected paths, in list order, on Delete.
+        """
+        self.thumbnails = thumbnails
+        self.on_open = on_open
+        self.on_delete = on_delete
+        self.images = []
+        self.selected = set()
+        self.anchor = None
+        self.top = 0
+        self.columns = 1
+        self._tiles = {}
+        self._free = []
+        self._futures = {}
+        self._polling = False
+        self._placeholder = Image.new("RGB", (THUMB_SIZE, THUMB_SIZE), TILE_BACKGROUND)
+
+        self.frame = tk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, bg="black", highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<Configure>", lambda event: self._layout())
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_by(-SCROLL_STEP))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_by(SCROLL_STEP))
+        self.canvas.bind("<Button-1>", lambda event: self._click(event, extend=False, toggle=False))
+        self.canvas.bind("<Control-Button-1>", lambda event: self._click(event, extend=False, toggle=True))
+        self.canvas.bind("<Shift-Button-1>", lambda event: self._click(event, extend=True, toggle=False))
+        self.canvas.bind("<Double-Button-1>", self._double_click)
+        self.canvas.bind("<Delete>", lambda event: self.delete_selected())
+        self.canvas.bind("<Prior>", lambda event: self.scroll_by(-self.canvas.winfo_height()))
+        self.canvas.bind("<Next>", lambda event: self.scroll_by(self.canvas.winfo_height()))
+        self.canvas.bind("<Home>", lambda event: self.scroll_to(0))
+        self.canvas.bind("<End>", lambda event: self.scroll_to(content_height(len(self.images), self.columns)))
+
+    def set_images(self, images, current_index=0):
+        """Show a new image list, keeping the selection of paths that are still present."""
+        self.images = images
+        if self.selected:
+            self.selected &= set(images)
+        self.columns = column_count(self.canvas.winfo_width())
+        if images:
+            self.reveal(min(current_index, len(images) - 1))
+        self._layout()
+
+    def reveal(self, index):
+        """Scroll just enough to bring an image's row into view."""
+        row_top = index // self.columns * TILE_PITCH
+        height = self.canvas.winfo_height()
+        if row_top < self.top:
+            self.scroll_to(row_top)
+        elif row_top + TILE_PITCH > self.top + height:
+            self.scroll_to(row_top + TILE_PITCH - height)
+
+    def scroll_by(self, pixels):
+        self.scroll_to(self.top + pixels)
+
+    def scroll_to(self, top):
+        limit = max(0, content_height(len(self.images), self.columns) - self.canvas.winfo_height())
+        top = int(min(max(0, top), limit))
+        if top != self.top:
+            self.top = top
+            self._layout()
+
+    def delete_selected(self):
+        if self.selected and self.on_delete:
+            paths = [path for path in self.images if path in self.selected]
+            self.selected.clear()
+            self.anchor = None
+            self.on_delete(paths)
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS small raw deltas.
+        notches = event.delta / 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+        self.scroll_by(int(-notches * SCROLL_STEP))
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        height = self.canvas.winfo_height()
+        if action == "moveto":
+            self.scroll_to(float(amount) * content_height(len(self.images), self.columns))
+        elif unit == "pages":
+            self.scroll_by(int(amount) * height)
+        else:
+            self.scroll_by(int(amount) * SCROLL_STEP)
+
+    def _layout(self):
+        """Place, recycle and request tiles for the current scroll position."""
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        columns = column_count(width)
+        if columns != self.columns:
+            # Keep the first visible image in view when the window is resized.
+            first = self.top // TILE_PITCH * self.columns
+            self.columns = columns
+            self.top = first // columns * TILE_PITCH
+
+        count = len(self.images)
+        total = content_height(count, columns)
+        self.top = min(self.top, max(0, total - height))
+        first, last = visible_range(self.top, height, columns, count)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + height) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        for index in [i for i in self._tiles if not first <= i < last]:
+            tile = self._tiles.pop(index)
+            self.canvas.itemconfigure(tile.image_item, state="hidden")
+            self.canvas.itemconfigure(tile.outline_item, state="hidden")
+            self._free.append(tile)
+
+        missing = []
+        for index in range(first, last):
+            path = self.images[index]
+            tile = self._tiles.get(index)
+            if tile is None:
+                tile = self._free.pop() if self._free else _Tile(self.canvas, self._placeholder)
+                self._tiles[index] = tile
+                tile.index = index
+                tile.path = None
+            if tile.path != path:
+                tile.path = path
+                tile.loaded = False
+                img = self.thumbnails.get_cached(path)
+                self._paint(tile, img)
+                if img is None:
+                    missing.append(path)
+
+            x = index % columns * TILE_PITCH + TILE_PADDING // 2
+            y = index // columns * TILE_PITCH - self.top + TILE_PADDING // 2
+            self.canvas.coords(tile.image_item, x, y)
+            self.canvas.coords(tile.outline_item, x - 2, y - 2, x + THUMB_SIZE + 1, y + THUMB_SIZE + 1)
+            self.canvas.itemconfigure(tile.image_item, state="normal")
+            self.canvas.itemconfigure(
+                tile.outline_item, state="normal", outline=SELECTED_OUTLINE if path in self.selected else ""
+            )
+
+        self.thumbnails.retain([tile.path for tile in self._tiles.values()])
+        for path in missing:
+            self._futures[path] = self.thumbnails.submit(path)
+        if self._futures and not self._polling:
+            self._polling = True
+            self.canvas.after(TILE_POLL_MS, self._poll_tiles)
+
+    def _paint(self, tile, img):
+        if img is None:
+            tile.photo.paste(self._placeholder)
+            return
+        square = self._placeholder.copy()
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        square.paste(img, ((THUMB_SIZE - img.width) // 2, (THUMB_SIZE - img.height) // 2))
+        tile.photo.paste(square)
+        tile.loaded = True
+
+    def _poll_tiles(self):
+        by_path = {tile.path: tile for tile in self._tiles.values() if not tile.loaded}
+        for path, future in list(self._futures.items()):
+            if not future.done():
+                continue
+            del self._futures[path]
+            tile = by_path.get(path)
+            if tile is None or future.cancelled():
+                continue
+            try:
+                self._paint(tile, future.result())
+            except Exception as e:
+                logger.error("Failed to load thumbnail for '%s': %s", path, e)
+
+        if self._futures:
+            self.canvas.after(TILE_POLL_MS, self._poll_tiles)
+        else:
+            self._polling = False
+
+    def _click(self, event, extend, toggle):
+        self.canvas.focus_set()
+        index = index_at(event.x, event.y, self.top, self.columns, len(self.images))
+        if index is None:
+            return
+        path = self.images[index]
+        if extend and self.anchor is not None:
+            low, high = sorted((min(self.anchor, len(self.images) - 1), index))
+            self.selected.update(self.images[low:high + 1])
+        elif toggle:
+            self.selected.symmetric_difference_update((path,))
+            self.anchor = index
+        else:
+            self.selected = {path}
+            self.anchor = index
+        for tile in self._tiles.values():
+            self.canvas.itemconfigure(
+                tile.outline_item, outline=SELECTED_OUTLINE if tile.path in self.selected else ""
+            )
+
+    def _double_click(self, event):
+        index = index_at(event.x, event.y, self.top, self.columns, len(self.images))
+        if index is not None and self.on_open:
+            self.on_open(index)
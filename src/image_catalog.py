@@ -0,0 +1,456 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import bisect
+import itertools
+import os
+from array import array
+from collections.abc import MutableSequence
+
+# Entry status.
+LIVE = 0
+DELETED = 1
+
+# Size and mtime of an entry that has not been stat'ed yet.
+UNKNOWN = -1
+
+# Tombstones are dropped from the order once there are more of them than live
+# images, and at least this many.
+COMPACT_MIN = 1024
+
+# Extending by up to this many paths keeps the lookup index and inserts into
+# it; larger batches (a folder scan) rebuild it on the next lookup instead.
+LOOKUP_INSERT_MAX = 1024
+
+# Marks an entry without a place in the order, and a place whose entry moved.
+_NONE = 0xFFFFFFFF
+
+# File names are stored encoded; these error handlers round-trip the names
+# os.scandir() returns on each platform.
+_NAME_ERRORS = "surrogatepass" if os.name == "nt" else "surrogateescape"
+
+
+def split_path(path):
+    """Split a path after its last separator, so that directory + name == path."""
+    cut = path.rfind(os.sep)
+    if os.altsep:
+        cut = max(cut, path.rfind(os.altsep))
+    return path[:cut + 1], path[cut + 1:]
+
+
+class ImageCatalog(MutableSequence):
+    def __init__(self, paths=()):
+        """
+        Ordered list of image paths in a compact column layout, sized for
+        libraries of a million photos.
+
+        Each path is kept as an interned directory and its file name in a
+        shared byte buffer, with size, mtime and status in typed arrays next to
+        it, instead of one str object per path.
+
+        The catalog behaves like a list of path strings without duplicates.
+        Deleting leaves a tombstone that a Fenwick tree over the order counts
+        out, so deletes and positional lookups are O(log n), and undoing a
+        delete at the same position revives the tombstone. Membership tests and
+        index() binary-search a path-sorted index instead of scanning.
+        """
+        self._reset(paths)
+
+    def _reset(self, paths=()):
+        self._dirs = []
+        self._dir_ids = {}
+        self._dir_of = array("I")
+        self._names = bytearray()
+        self._name_start = array("Q", [0])
+        self._sizes = array("q")
+        self._mtimes = array("q")
+        self._status = bytearray()
+        # Entry ids in list order, tombstones included, and each entry's
+        # place in it.
+        self._order = array("I")
+        self._place = array("I")
+        # Entry ids that have a place, sorted by path; None until needed.
+        self._lookup = array("I")
+        # Live count per Fenwick range over the order; None while nothing in
+        # the order is a tombstone, when positions and places coincide.
+        self._tree = None
+        self._live = 0
+        self.extend(paths)
+
+    # List interface
+
+    def __len__(self):
+        return self._live
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._live))]
+        return self._path(self._order[self._place_at(index)])
+
+    def __iter__(self):
+        status = self._status
+        path = self._path
+        for entry in self._order:
+            if entry != _NONE and status[entry] == LIVE:
+                yield path(entry)
+
+    def __contains__(self, path):
+        entry = self._find(path) if isinstance(path, str) else None
+        return entry is not None and self._status[entry] == LIVE
+
+    def __eq__(self, other):
+        if not isinstance(other, (ImageCatalog, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f"ImageCatalog({len(self)} images in {len(self._dirs)} folders)"
+
+    def index(self, path, start=0, stop=None):
+        entry = self._find(path)
+        if entry is None or self._status[entry] != LIVE:
+            raise ValueError(f"'{path}' is not in the catalog")
+        position = self._rank(self._place[entry])
+        start, stop, _ = slice(start, stop).indices(self._live)
+        if not start <= position < stop:
+            raise ValueError(f"'{path}' is not in the catalog")
+        return position
+
+    def count(self, path):
+        return 1 if path in self else 0
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            for i in sorted(range(*index.indices(self._live)), reverse=True):
+                del self[i]
+            return
+        place = self._place_at(index)
+        if self._tree is None:
+            # Nothing is a tombstone yet, so every Fenwick range is full.
+            self._tree = array("I", [i & -i for i in range(len(self._order) + 1)])
+        self._status[self._order[place]] = DELETED
+        self._live -= 1
+        self._add(place, -1)
+        tombstones = len(self._order) - self._live
+        if tombstones > self._live and tombstones >= COMPACT_MIN:
+            self._compact()
+
+    def __setitem__(self, index, path):
+        if isinstance(index, slice):
+            paths = list(self)
+            paths[index] = path
+            self._reset(paths)
+            return
+        place = self._place_at(index)
+        old = self._order[place]
+        if self._path(old) == path:
+            return
+        if path in self:
+            raise ValueError(f"'{path}' is already in the catalog")
+        entry = self._claim(path)
+        self._order[place] = entry
+        self._place[entry] = place
+        self._drop(old)
+
+    def insert(self, index, path):
+        """
+        Insert a path before index, as list.insert() does.
+
+        A path deleted at that very position comes back in its tombstone, in
+        O(log n); anywhere else the order is compacted and shifted, in O(n).
+
+        Raises:
+            ValueError: If the path is already in the catalog.
+        """
+        index = max(0, min(index + self._live if index < 0 else index, self._live))
+        entry = self._find(path)
+        if entry is not None and self._status[entry] == LIVE:
+            raise ValueError(f"'{path}' is already in the catalog")
+        if entry is not None and self._rank(self._place[entry]) == index:
+            self._status[entry] = LIVE
+            self._live += 1
+            self._add(self._place[entry], 1)
+            return
+
+        if index == self._live:
+            self._append(self._claim(path))
+            return
+        self._compact()
+        entry = self._claim(path)
+        self._order.insert(index, entry)
+        self._live += 1
+        place = self._place
+        for position in range(index, len(self._order)):
+            place[self._order[position]] = position
+
+    def extend(self, paths):
+        """
+        Append paths in bulk. Unlike insert(), paths are not checked against
+        the catalog, so they must not be in it already.
+        """
+        dirs = self._dirs
+        dir_ids = self._dir_ids
+        dir_of = []
+        names = []
+        for path in paths:
+            directory, name = split_path(path)
+            dir_id = dir_ids.get(directory)
+            if dir_id is None:
+                dir_id = dir_ids[directory] = len(dirs)
+                dirs.append(directory)
+            dir_of.append(dir_id)
+            names.append(name.encode("utf-8", _NAME_ERRORS))
+        if not names:
+            return
+
+        count = len(names)
+        first = len(self._status)
+        self._dir_of.extend(dir_of)
+        self._name_start.extend(
+            itertools.islice(itertools.accumulate(map(len, names), initial=len(self._names)), 1, None)
+        )
+        self._names += b"".join(names)
+        self._sizes.extend(array("q", [UNKNOWN]) * count)
+        self._mtimes.extend(array("q", [UNKNOWN]) * count)
+        self._status += bytes(count)
+        self._place.extend(range(len(self._order), len(self._order) + count))
+        self._live += count
+        if self._tree is None:
+            self._order.extend(range(first, first + count))
+        else:
+            for entry in range(first, first + count):
+                self._append_place(entry)
+
+        if self._lookup is not None:
+            if count > LOOKUP_INSERT_MAX:
+                self._lookup = None
+            else:
+                for entry in range(first, first + count):
+                    bisect.insort(self._lookup, entry, key=self._path)
+
+    def append(self, path):
+        self.extend((path,))
+
+    def clear(self):
+        self._reset()
+
+    def reverse(self):
+        self._compact()
+        self._order.reverse()
+        self._set_order(self._order)
+
+    def sort(self, key=None, reverse=False):
+        """Sort in place like list.sort(); tombstones are dropped."""
+        path = self._path
+        status = self._status
+        entries = [entry for entry in self._order if entry != _NONE and status[entry] == LIVE]
+        entries.sort(key=path if key is None else (lambda entry: key(path(entry))), reverse=reverse)
+        self._forget_tombstones()
+        self._set_order(array("I", entries))
+        if key is None:
+            # Filename order is the lookup order, so the index comes for free.
+            self._lookup = array("I", reversed(entries) if reverse else entries)
+        self._repack_if_sparse()
+
+    # Per-image records
+
+    def stat(self, path):
+        """
+        Return (size, mtime_ns) of an image in the catalog, read from disk the first time.
+
+        Raises:
+            ValueError: If the path is not in the catalog.
+            OSError: If the file cannot be stat'ed.
+        """
+        entry = self._find(path)
+        if entry is None or self._status[entry] != LIVE:
+            raise ValueError(f"'{path}' is not in the catalog")
+        if self._sizes[entry] == UNKNOWN:
+            info = os.stat(path)
+            self._sizes[entry] = info.st_size
+            self._mtimes[entry] = info.st_mtime_ns
+        return self._sizes[entry], self._mtimes[entry]
+
+    def folders(self):
+        """Return the interned directories, each ending in a separator."""
+        return list(self._dirs)
+
+    # Entries
+
+    def _path(self, entry):
+        start = self._name_start
+        name = self._names[start[entry]:start[entry + 1]].decode("utf-8", _NAME_ERRORS)
+        return self._dirs[self._dir_of[entry]] + name
+
+    def _new_entry(self, path):
+        """Add the columns of a path, without a place in the order yet."""
+        directory, name = split_path(path)
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = self._dir_ids[directory] = len(self._dirs)
+            self._dirs.append(directory)
+        self._dir_of.append(dir_id)
+        self._names += name.encode("utf-8", _NAME_ERRORS)
+        self._name_start.append(len(self._names))
+        self._sizes.append(UNKNOWN)
+        self._mtimes.append(UNKNOWN)
+        self._status.append(DELETED)
+        self._place.append(_NONE)
+        return len(self._status) - 1
+
+    def _claim(self, path):
+        """Return the deleted entry of a path, taken out of its place, or a new one in the lookup index."""
+        entry = self._find(path)
+        if entry is not None:
+            self._order[self._place[entry]] = _NONE
+            self._place[entry] = _NONE
+        else:
+            entry = self._new_entry(path)
+            if self._lookup is not None:
+                bisect.insort(self._lookup, entry, key=self._path)
+        self._status[entry] = LIVE
+        return entry
+
+    def _drop(self, entry):
+        """Retire an entry that lost its place; its columns stay until the next repack."""
+        self._status[entry] = DELETED
+        self._place[entry] = _NONE
+        if self._lookup is not None:
+            i = bisect.bisect_left(self._lookup, self._path(entry), key=self._path)
+            while self._lookup[i] != entry:
+                i += 1
+            del self._lookup[i]
+
+    def _find(self, path):
+        """Return the entry id of a path that has a place, live or tombstone, or None."""
+        lookup = self._lookup
+        if lookup is None:
+            lookup = self._lookup = array(
+                "I", sorted((entry for entry in self._order if entry != _NONE), key=self._path)
+            )
+        # A path deleted and then extended again has a tombstone besides its
+        # live entry; the live one wins.
+        found = None
+        i = bisect.bisect_left(lookup, path, key=self._path)
+        while i < len(lookup) and self._path(lookup[i]) == path:
+            found = lookup[i]
+            if self._status[found] == LIVE:
+                break
+            i += 1
+        return found
+
+    # Order
+
+    def _append(self, entry):
+        self._status[entry] = LIVE
+        self._live += 1
+        self._append_place(entry)
+
+    def _append_place(self, entry):
+        self._place[entry] = len(self._order)
+        self._order.append(entry)
+        if self._tree is not None:
+            # The new Fenwick range covers the new place and the ones before it.
+            i = len(self._order)
+            self._tree.append(1 + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+
+    def _set_order(self, order):
+        self._order = order
+        place = self._place = array("I", [_NONE]) * len(self._status)
+        for position, entry in enumerate(order):
+            place[entry] = position
+        self._tree = None
+
+    def _forget_tombstones(self):
+        status = self._status
+        place = self._place
+        for entry in self._order:
+            if entry != _NONE and status[entry] != LIVE:
+                place[entry] = _NONE
+        if self._lookup is not None:
+            self._lookup = array("I", (entry for entry in self._lookup if status[entry] == LIVE))
+
+    def _compact(self):
+        """Drop tombstones from the order, so positions are places again."""
+        if self._tree is None:
+            return
+        status = self._status
+        live = array("I", (entry for entry in self._order if entry != _NONE and status[entry] == LIVE))
+        self._forget_tombstones()
+        self._set_order(live)
+        self._repack_if_sparse()
+
+    def _repack_if_sparse(self):
+        """Rebuild the columns once retired entries outnumber the live ones."""
+        retired = len(self._status) - self._live
+        if retired <= self._live or retired < COMPACT_MIN:
+            return
+        order = self._order
+        paths = list(self)
+        sizes = array("q", (self._sizes[entry] for entry in order))
+        mtimes = array("q", (self._mtimes[entry] for entry in order))
+        self._reset(paths)
+        self._sizes = sizes
+        self._mtimes = mtimes
+
+    # Fenwick tree over the order, 1-based: tree[i] counts the live places in
+    # (i - lowbit(i), i].
+
+    def _place_at(self, index):
+        if index < 0:
+            index += self._live
+        if not 0 <= index < self._live:
+            raise IndexError("catalog index out of range")
+        return index if self._tree is None else self._select(index)
+
+    def _rank(self, place):
+        """Number of live images before a place."""
+        return place if self._tree is None else self._prefix(place)
+
+    def _prefix(self, i):
+        tree = self._tree
+        total = 0
+        while i:
+            total += tree[i]
+            i &= i - 1
+        return total
+
+    def _add(self, place, delta):
+        tree = self._tree
+        i = place + 1
+        size = len(tree)
+        while i < size:
+            tree[i] += delta
+            i += i & -i
+
+    def _select(self, index):
+        """Place of the index-th live image."""
+        tree = self._tree
+        size = len(tree) - 1
+        position = 0
+        remaining = index + 1
+        step = 1 << (size.bit_length() - 1)
+        while step:
+            following = position + step
+            if following <= size and tree[following] < remaining:
+                position = following
+                remaining -= tree[following]
+            step >>= 1
+        return position
@@ -18,39 +18,489 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import io
+import mmap
+import os
+import struct
+import threading
+import time
 from PIL import Image
 from logger import get_logger
+from metrics import metrics
 
 logger = get_logger(__name__)
 
+# Largest decode a single image may allocate, and the most that all decodes
+# in flight may hold together. Bigger images are decoded at a reduced scale
+# where the format allows it and refused otherwise.
+DECODE_BUDGET_MB = 512
+LIVE_BUDGET_MB = 1024
+
+# How long a decode waits for others to free their share of the live budget.
+BUDGET_WAIT_SECONDS = 2.0
+
+# Values of img.info["decode_path"], recording how an image was produced.
+DECODE_FULL = "full"
+DECODE_DRAFT = "draft"
+DECODE_REDUCE = "reduce"
+DECODE_RESAMPLE = "resample"
+DECODE_DISK = "disk"
+DECODE_EXIF = "exif"
+
+# JPEG start-of-frame markers, which carry the image size; C4, C8 and CC
+# share the range but are other segments.
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# EXIF IFD1 tags locating the embedded JPEG thumbnail.
+_EXIF_THUMBNAIL_OFFSET = 0x0201
+_EXIF_THUMBNAIL_LENGTH = 0x0202
+
+# An embedded thumbnail whose aspect ratio differs from the photo's by more
+# than this is letterboxed and not used.
+THUMBNAIL_ASPECT_TOLERANCE = 0.02
+
+
+def _exif_thumbnail(tiff):
+    """Return the JPEG thumbnail stored in IFD1 of an EXIF TIFF block, or None."""
+    order = {b"II": "little", b"MM": "big"}.get(bytes(tiff[:2]))
+    if order is None:
+        return None
+
+    def number(offset, size):
+        if offset + size > len(tiff):
+            raise ValueError("EXIF block is truncated")
+        return int.from_bytes(tiff[offset:offset + size], order)
+
+    ifd0 = number(4, 4)
+    ifd1 = number(ifd0 + 2 + 12 * number(ifd0, 2), 4)
+    if not ifd1:
+        return None
+    offset = length = None
+    for entry in range(ifd1 + 2, ifd1 + 2 + 12 * number(ifd1, 2), 12):
+        tag = number(entry, 2)
+        if tag == _EXIF_THUMBNAIL_OFFSET:
+            offset = number(entry + 8, 4)
+        elif tag == _EXIF_THUMBNAIL_LENGTH:
+            length = number(entry + 8, 4)
+    if not offset or not length or offset + length > len(tiff):
+        return None
+    return bytes(tiff[offset:offset + length])
+
+
+def read_embedded_thumbnail(image_path):
+    """
+    Find the thumbnail a camera or phone embedded in a JPEG's EXIF block.
+
+    Only the header segments before the compressed image data are touched,
+    through a memory map, so this costs a page or two of I/O however large
+    the photo is.
+
+    Returns:
+        tuple: (thumbnail JPEG bytes or None, (width, height) of the photo or None)
+    """
+    with open(image_path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None, None
+    with data:
+        if data[:2] != b"\xff\xd8":
+            return None, None
+        thumbnail = None
+        size = None
+        position = 2
+        while position + 4 <= len(data) and data[position] == 0xFF:
+            marker = data[position + 1]
+            if marker == 0xFF:
+                position += 1
+                continue
+            if marker in (0xDA, 0xD9):
+                break
+            length = int.from_bytes(data[position + 2:position + 4], "big")
+            start = position + 4
+            if marker == 0xE1 and thumbnail is None and data[start:start + 6] == b"Exif\x00\x00":
+                try:
+                    thumbnail = _exif_thumbnail(data[start + 6:position + 2 + length])
+                except ValueError:
+                    pass
+            elif marker in _SOF_MARKERS:
+                size = (
+                    int.from_bytes(data[start + 3:start + 5], "big"),
+                    int.from_bytes(data[start + 1:start + 3], "big"),
+                )
+            if thumbnail is not None and size is not None:
+                break
+            position += 2 + length
+        return thumbnail, size
+
+
+# Modes reduce() rejects even after _reducible(); they are only resampled.
+_NO_REDUCE_MODES = ("I;16", "I;16L", "I;16B", "I;16N")
+
+
+def _reducible(img):
+    """
+    Convert palette and 1-bit images, whose pixels reduce() cannot average,
+    to the colour or greyscale mode they are shown in.
+    """
+    if img.mode in ("P", "PA"):
+        return img.convert("RGBA" if img.mode == "PA" or "transparency" in img.info else "RGB")
+    if img.mode == "1":
+        return img.convert("L")
+    return img
+
+
+def open_header(image_path):
+    """
+    Image.open() that still returns images over Pillow's decompression bomb limit.
+
+    Pillow refuses images over twice Image.MAX_IMAGE_PIXELS (about 179 MP)
+    before their size can even be read, so large panoramas could not be
+    drafted down. Such files are opened again through their format plugin,
+    which reads the header only; Image.open() performs the check, so the
+    limit stays in force for every other caller. Callers size the decode
+    against the decode budgets before loading any pixels.
+    """
+    try:
+        return Image.open(image_path)
+    except Image.DecompressionBombError:
+        pass
+    with open(image_path, "rb") as f:
+        prefix = f.read(16)
+    for format_id in Image.ID:
+        factory, accept = Image.OPEN[format_id]
+        accepted = accept(prefix) if accept else True
+        if not accepted or isinstance(accepted, str):
+            continue
+        try:
+            return factory(image_path)
+        except (SyntaxError, IndexError, TypeError, struct.error):
+            continue
+    raise Image.UnidentifiedImageError(f"cannot identify image file '{image_path}'")
+
+
+def decoded_nbytes(img):
+    """
+    Memory a decode of img will allocate at its current (possibly drafted)
+    size, from the header alone. Pillow keeps RGB and most other multi-band
+    modes at four bytes per pixel.
+    """
+    if img.mode in ("1", "L", "P"):
+        pixel_size = 1
+    elif img.mode.startswith("I;16"):
+        pixel_size = 2
+    else:
+        pixel_size = 4
+    return img.width * img.height * pixel_size
+
+
+def within_decode_budget(image_path, img, original_size, decode_budget):
+    """
+    Check a drafted but not yet loaded image against a single-decode budget.
+
+    Returns:
+        bool: False if the decode would need more (the refusal is counted and logged).
+    """
+    nbytes = decoded_nbytes(img)
+    if nbytes <= decode_budget:
+        return True
+    metrics.increment("decode_refused")
+    logger.warning(
+        "Refused to decode '%s': %s %s image needs %.0f MB, over the %.0f MB decode budget.",
+        image_path, img.format, original_size, nbytes / (1024 * 1024), decode_budget / (1024 * 1024)
+    )
+    return False
+
+
+def pool_decode_budget(workers=None):
+    """
+    Decode budget for each worker of a process pool (workers defaults to the
+    CPU count). Processes cannot share a MemoryBudget, so the live budget is
+    split evenly between them, and no worker gets more than DECODE_BUDGET_MB.
+    """
+    workers = workers or os.cpu_count() or 1
+    return min(DECODE_BUDGET_MB * 1024 * 1024, LIVE_BUDGET_MB * 1024 * 1024 // workers)
+
+
+class MemoryBudget:
+    def __init__(self, max_bytes=LIVE_BUDGET_MB * 1024 * 1024):
+        """
+        Byte budget shared by the decodes running at the same time.
+
+        Each decode reserves its estimated size before loading pixels and
+        releases it when done, so several huge images decoding on the worker
+        pools take turns instead of exhausting memory together.
+        """
+        self.max_bytes = max_bytes
+        self.in_use = 0
+        self.peak = 0
+        self._available = threading.Condition()
+
+    def acquire(self, nbytes, timeout=BUDGET_WAIT_SECONDS):
+        """
+        Reserve nbytes, waiting up to timeout seconds for other decodes to finish.
+
+        Returns:
+            bool: False if the bytes did not become available in time.
+        """
+        with self._available:
+            if not self._available.wait_for(lambda: self.in_use + nbytes <= self.max_bytes, timeout):
+                return False
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+            return True
+
+    def release(self, nbytes):
+        with self._available:
+            self.in_use -= nbytes
+            self._available.notify_all()
+
 
 class ImageProcessor:
-    def __init__(self, max_width=1000, max_height=700):
+    def __init__(self, max_width=1000, max_height=700, fast_preview=False, preview_cache=None,
+                 decode_budget=DECODE_BUDGET_MB * 1024 * 1024, memory_budget=None):
         """
         Initialize the ImageProcessor with max display dimensions.
+
+        When fast_preview is set, callers show process_preview() first and
+        swap in process_image() once the full-quality render is ready. An
+        optional PreviewCache is consulted before the original is opened.
+
+        Decodes are sized from the file header first. One that would need
+        more than decode_budget bytes is drafted down to display size where
+        the format allows it (JPEG) and refused otherwise; memory_budget, a
+        MemoryBudget that can be shared between processors, caps the decodes
+        in flight together.
         """
         self.max_width = max_width
         self.max_height = max_height
-        logger.info(f"ImageProcessor initialized with size {self.max_width}x{self.max_height}.")
+        self.fast_preview = fast_preview
+        self.preview_cache = preview_cache
+        self.memory_budget = memory_budget or MemoryBudget()
+        self.decode_budget = min(decode_budget, self.memory_budget.max_bytes)
+        logger.info("ImageProcessor initialized with size %sx%s.", self.max_width, self.max_height)
+
+    def set_target_size(self, max_width, max_height):
+        """Fit later images into a new box, e.g. the canvas after a window resize."""
+        self.max_width = max_width
+        self.max_height = max_height
+        logger.info("ImageProcessor target size set to %dx%d.", max_width, max_height)
 
-    def process_image(self, image_path):
+    def process_image(self, image_path, max_width=None, max_height=None):
         """
         Open and resize the image to fit within the specified dimensions while maintaining aspect ratio.
 
+        An embedded EXIF thumbnail at least as large as the result is used
+        instead of the photo itself, e.g. for grid thumbnails.
+
         Args:
             image_path (str): The path to the image file.
+            max_width (int): Overrides the processor's width for this call.
+            max_height (int): Overrides the processor's height for this call.
 
         Returns:
             Image: Resized PIL Image object.
         """
+        max_width = max_width or self.max_width
+        max_height = max_height or self.max_height
         try:
-            img = Image.open(image_path)
+            cached = self._from_preview_cache(image_path, max_width, max_height)
+            if cached is not None:
+                return cached
+
+            img = self._from_embedded_thumbnail(image_path, max_width, max_height, upscale=False)
+            if img is not None:
+                return img
+
+            start = time.perf_counter()
+            with metrics.timer("open"):
+                img = open_header(image_path)
             original_size = img.size
-            img.thumbnail((self.max_width, self.max_height), Image.LANCZOS)
+
+            # Request the same reduced-scale decode thumbnail() would (its
+            # default reducing_gap is 2), so decode and resize can be timed apart.
+            # Over budget, settle for the smallest draft that still fills the display.
+            decode_path = DECODE_FULL
+            scale = min(max_width / img.width, max_height / img.height, 1.0)
+            if decoded_nbytes(img) <= self.decode_budget:
+                img.draft(None, (int(img.width * scale * 2), int(img.height * scale * 2)))
+            else:
+                img.draft(None, (max_width, max_height))
+                decode_path = DECODE_DRAFT
+                if img.size != original_size:
+                    logger.info(
+                        "Image '%s' %s is over the decode budget; decoding at %s.", image_path, original_size, img.size
+                    )
+            nbytes = self._reserve(image_path, img, original_size)
+            if nbytes is None:
+                img.close()
+                return None
+            try:
+                with metrics.timer("decode"):
+                    img.load()
+                metrics.increment("decode_bytes", img.width * img.height * len(img.getbands()))
+                with metrics.timer("resize"):
+                    img.thumbnail((max_width, max_height), Image.LANCZOS)
+            finally:
+                self.memory_budget.release(nbytes)
+            img.info["decode_path"] = decode_path
+            if self.preview_cache is not None:
+                self.preview_cache.put(image_path, (max_width, max_height), img)
+            elapsed_ms = (time.perf_counter() - start) * 1000
             logger.info(
-                f"Image '{image_path}' loaded and resized from {original_size} to {img.size}."
+                "Image '%s' loaded and resized from %s to %s in %.1f ms.",
+                image_path, original_size, img.size, elapsed_ms
             )
             return img
+        except Image.DecompressionBombError as e:
+            metrics.increment("decode_refused")
+            logger.warning("Refused to decode '%s': %s", image_path, e)
+            return None
         except Exception as e:
-            logger.error(f"Failed to process image '{image_path}': {e}")
+            logger.error("Failed to process image '%s': %s", image_path, e)
+            return None
+
+    def process_preview(self, image_path, max_width=None, max_height=None):
+        """
+        Produce a coarse preview as cheaply as the file format allows.
+
+        A thumbnail embedded in the EXIF block is used first ("exif"), scaled
+        up to the photo's fitted size; it only needs the file header. Other
+        JPEGs are decoded at a reduced DCT scale (draft), the result is shrunk
+        with an integer reduce() and only the remainder is resampled, with a
+        cheap filter. The steps taken are recorded in img.info["decode_path"],
+        e.g. "draft+reduce", or "resample" when no shortcut applied. A
+        full-quality preview found in the preview cache is returned as "disk".
+
+        Args:
+            image_path (str): The path to the image file.
+            max_width (int): Overrides the processor's width for this call.
+            max_height (int): Overrides the processor's height for this call.
+
+        Returns:
+            Image: Preview PIL Image object, or None on failure.
+        """
+        max_width = max_width or self.max_width
+        max_height = max_height or self.max_height
+        try:
+            cached = self._from_preview_cache(image_path, max_width, max_height)
+            if cached is not None:
+                return cached
+
+            img = self._from_embedded_thumbnail(image_path, max_width, max_height, upscale=True)
+            if img is not None:
+                return img
+
+            start = time.perf_counter()
+            with metrics.timer("open"):
+                img = open_header(image_path)
+            original_size = img.size
+            steps = []
+
+            if img.format == "JPEG":
+                img.draft(img.mode, (max_width, max_height))
+                if img.size != original_size:
+                    steps.append(DECODE_DRAFT)
+            nbytes = self._reserve(image_path, img, original_size)
+            if nbytes is None:
+                img.close()
+                return None
+            try:
+                with metrics.timer("decode"):
+                    img.load()
+                metrics.increment("decode_bytes", img.width * img.height * len(img.getbands()))
+
+                with metrics.timer("resize"):
+                    # Largest integer factor that keeps the image at least as big as
+                    # its final fitted size, so the last resample only ever shrinks.
+                    factor = int(max(img.width / max_width, img.height / max_height))
+                    if factor > 1:
+                        img = _reducible(img)
+                        if img.mode not in _NO_REDUCE_MODES:
+                            img = img.reduce(factor)
+                            steps.append(DECODE_REDUCE)
+
+                    img.thumbnail((max_width, max_height), Image.BILINEAR, reducing_gap=None)
+            finally:
+                self.memory_budget.release(nbytes)
+            decode_path = "+".join(steps) or DECODE_RESAMPLE
+            img.info["decode_path"] = decode_path
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.info(
+                "Preview '%s' decoded via %s from %s to %s in %.1f ms.",
+                image_path, decode_path, original_size, img.size, elapsed_ms
+            )
+            return img
+        except Image.DecompressionBombError as e:
+            metrics.increment("decode_refused")
+            logger.warning("Refused to decode preview '%s': %s", image_path, e)
+            return None
+        except Exception as e:
+            logger.error("Failed to process preview '%s': %s", image_path, e)
+            return None
+
+    def _reserve(self, image_path, img, original_size):
+        """
+        Check a drafted but not yet loaded image against the budgets and reserve its decode.
+
+        Returns:
+            int: The reserved bytes, to release after decoding, or None if the
+                decode was refused (the reason is logged).
+        """
+        if not within_decode_budget(image_path, img, original_size, self.decode_budget):
+            return None
+        nbytes = decoded_nbytes(img)
+        if not self.memory_budget.acquire(nbytes):
+            metrics.increment("decode_refused")
+            logger.warning(
+                "Refused to decode '%s': %.0f MB not available, %.0f of %.0f MB held by other decodes.",
+                image_path, nbytes / (1024 * 1024), self.memory_budget.in_use / (1024 * 1024),
+                self.memory_budget.max_bytes / (1024 * 1024)
+            )
+            return None
+        return nbytes
+
+    def _from_embedded_thumbnail(self, image_path, max_width, max_height, upscale):
+        """
+        Render the embedded EXIF thumbnail at the photo's fitted size.
+
+        Returns None when there is no usable thumbnail, or when it is smaller
+        than the fitted size and upscale is not allowed.
+        """
+        start = time.perf_counter()
+        try:
+            with metrics.timer("exif_thumbnail"):
+                data, size = read_embedded_thumbnail(image_path)
+                if data is None or size is None:
+                    return None
+                scale = min(max_width / size[0], max_height / size[1], 1.0)
+                target = (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+                img = Image.open(io.BytesIO(data))
+                aspect = size[0] / size[1]
+                if abs(img.width / img.height - aspect) > THUMBNAIL_ASPECT_TOLERANCE * aspect:
+                    return None
+                if not upscale and (img.width < target[0] or img.height < target[1]):
+                    return None
+                img.load()
+                if img.mode != "RGB":
+                    img = img.convert("RGB")
+                if img.size != target:
+                    img = img.resize(target, Image.BILINEAR if upscale else Image.LANCZOS)
+        except Exception as e:
+            logger.debug("No usable embedded thumbnail in '%s': %s", image_path, e)
+            return None
+        img.info["decode_path"] = DECODE_EXIF
+        logger.info(
+            "Image '%s' shown from its %s embedded thumbnail in %.1f ms.",
+            image_path, size, (time.perf_counter() - start) * 1000
+        )
+        return img
+
+    def _from_preview_cache(self, image_path, max_width, max_height):
+        if self.preview_cache is None:
             return None
+        img = self.preview_cache.get(image_path, (max_width, max_height))
+        if img is not None:
+            img.info["decode_path"] = DECODE_DISK
+            logger.debug("Image '%s' served from the preview cache.", image_path)
+        return img
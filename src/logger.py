@@ -18,29 +18,159 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import atexit
 import logging
 import os
+import queue
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-# Create logs directory if it doesn't exist
-if not os.path.exists("logs"):
-    os.makedirs("logs")
+LOG_FOLDER = "logs"
+LOG_FORMAT = "%(asctime)s [%(levelname)s] [%(name)s]: %(message)s"
+LOG_LEVEL = logging.INFO
 
-# Define log filename with timestamp
-log_filename = datetime.now().strftime("logs/photo_manager_%Y-%m-%d.log")
+# The log file rolls over at this size, keeping this many old files.
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# Below WARNING, each message template is logged at most this many times per
+# window; the rest are counted and reported with the next one let through.
+RATE_LIMIT_COUNT = 5
+RATE_LIMIT_SECONDS = 1.0
+# Expired windows are dropped once this many templates are being tracked.
+RATE_LIMIT_MAX_KEYS = 1024
+
+# Overrides, e.g. PHOTOSORTER_LOG_LEVEL=DEBUG and
+# PHOTOSORTER_LOG_LEVELS="image_processor=DEBUG,ui=WARNING".
+LOG_LEVEL_ENV = "PHOTOSORTER_LOG_LEVEL"
+MODULE_LEVELS_ENV = "PHOTOSORTER_LOG_LEVELS"
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, count=RATE_LIMIT_COUNT, seconds=RATE_LIMIT_SECONDS, max_level=logging.INFO):
+        """
+        Drop repeats of high-frequency messages.
+
+        Records are grouped by logger and unformatted message template, so
+        this only works for lazily formatted calls such as
+        logger.info("Displayed %s", path). Records above max_level always pass.
+        """
+        super().__init__()
+        self.count = count
+        self.seconds = seconds
+        self.max_level = max_level
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            if len(self._windows) > RATE_LIMIT_MAX_KEYS:
+                self._windows = {k: w for k, w in self._windows.items() if now - w[0] < self.seconds}
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.seconds:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+                return True
+            if window[1] < self.count:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class _LazyRotatingFileHandler(RotatingFileHandler):
+    def __init__(self, filename, **kwargs):
+        # delay=True: nothing is created on disk until the first record is written.
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # The stock prepare() formats the message in the caller's thread so the
+        # record can be pickled. Records never leave this process, so leave the
+        # formatting to the listener thread.
+        return record
+
+
+def parse_levels(value):
+    """Parse "module=LEVEL,module=LEVEL" into {module: level}; bad entries are ignored."""
+    levels = {}
+    for part in (value or "").split(","):
+        name, _, level = part.partition("=")
+        level = logging.getLevelName(level.strip().upper())
+        if name.strip() and isinstance(level, int):
+            levels[name.strip()] = level
+    return levels
+
+
+def configure_logging(level=None, module_levels=None, log_folder=LOG_FOLDER):
+    """
+    Route all logging through a queue to a background listener thread that
+    writes the rotating log file and the console, so a log call on the UI
+    thread costs a queue put. Safe to call more than once.
+    """
+    global _listener
+    root = logging.getLogger()
+    if root.handlers:
+        # Like logging.basicConfig(), leave an already configured root logger alone.
+        return
+
+    if level is None:
+        level = logging.getLevelName(os.environ.get(LOG_LEVEL_ENV, "").upper())
+        if not isinstance(level, int):
+            level = LOG_LEVEL
+    root.setLevel(level)
+    levels = parse_levels(os.environ.get(MODULE_LEVELS_ENV))
+    levels.update(module_levels or {})
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    log_filename = os.path.join(log_folder, datetime.now().strftime("photo_manager_%Y-%m-%d.log"))
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = _LazyRotatingFileHandler(
+        log_filename, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Write out everything still queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] [%(name)s]: %(message)s",
-    handlers=[
-        logging.FileHandler(log_filename, encoding="utf-8"),
-        logging.StreamHandler()
-    ]
-)
 
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance for a given module.
     """
     return logging.getLogger(name)
+
+
+configure_logging()
@@ -18,19 +18,104 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import multiprocessing
+import os
+import time
 import tkinter as tk
-from ui import PhotoManagerUI
-from file_manager import FileManager
-from progress_manager import ProgressManager
-from image_processor import ImageProcessor
-from reports_manager import ReportsManager
+from metrics import metrics
 from logger import get_logger
 
 logger = get_logger(__name__)
 
+# Prefetch tuning: images decoded ahead of/behind the current one, decode
+# threads and the memory budget of the decoded image cache.
+PREFETCH_AHEAD = 3
+PREFETCH_BEHIND = 1
+PREFETCH_WORKERS = 2
+PREFETCH_CACHE_MB = 256
+
+# Paint a draft-decoded preview first and refine it in the background.
+FAST_PREVIEW = True
+
+# Largest single decode and the total held by decodes in flight; larger
+# images are decoded at a reduced scale or refused.
+DECODE_BUDGET_MB = 512
+LIVE_DECODE_BUDGET_MB = 1024
+
+# On-disk cache of screen-size previews, reused across sessions.
+PREVIEW_CACHE_DIR = "cache/previews"
+PREVIEW_CACHE_MB = 1024
+
+# Folder listings kept between sessions so reopening a folder only relists
+# the directories that changed.
+SNAPSHOT_FILE = "cache/snapshots.db"
+
+# Session/progress state is kept in memory and written every few seconds.
+STATE_FILE = "state.db"
+STATE_FLUSH_SECONDS = 2.0
+
+# Collect per-stage timings from startup; can also be toggled from the File menu.
+METRICS_ENABLED = os.environ.get("PHOTOSORTER_METRICS") == "1"
+
+# Reopen the last folder at the last image on startup.
+RESUME_LAST_SESSION = True
+
+
+def create_app(root):
+    """
+    Build the managers and the UI.
+
+    Pillow and the modules that need it are imported here rather than at the
+    top of the file, so the empty window is on screen before they load.
+
+    Returns:
+        tuple: (PhotoManagerUI, StateStore)
+    """
+    from ui import PhotoManagerUI
+    from file_manager import FileManager
+    from progress_manager import ProgressManager
+    from image_processor import ImageProcessor, MemoryBudget
+    from prefetcher import Prefetcher
+    from preview_cache import PreviewCache
+    from state_store import StateStore
+    from reports_manager import ReportsManager
+    from folder_snapshot import FolderSnapshot
+
+    state_store = StateStore(STATE_FILE, flush_interval=STATE_FLUSH_SECONDS)
+    file_manager = FileManager(state_store, snapshot=FolderSnapshot(SNAPSHOT_FILE))
+    progress_manager = ProgressManager(state_store)
+    preview_cache = PreviewCache(PREVIEW_CACHE_DIR, max_bytes=PREVIEW_CACHE_MB * 1024 * 1024)
+    image_processor = ImageProcessor(
+        fast_preview=FAST_PREVIEW,
+        preview_cache=preview_cache,
+        decode_budget=DECODE_BUDGET_MB * 1024 * 1024,
+        memory_budget=MemoryBudget(LIVE_DECODE_BUDGET_MB * 1024 * 1024)
+    )
+    reports_manager = ReportsManager()
+    prefetcher = Prefetcher(
+        image_processor,
+        ahead=PREFETCH_AHEAD,
+        behind=PREFETCH_BEHIND,
+        workers=PREFETCH_WORKERS,
+        cache_bytes=PREFETCH_CACHE_MB * 1024 * 1024
+    )
+
+    app = PhotoManagerUI(
+        root,
+        file_manager,
+        progress_manager,
+        image_processor,
+        reports_manager,
+        prefetcher
+    )
+    return app, state_store
+
 
 def main():
+    start = time.perf_counter()
     logger.info("Photo Manager Application started.")
+    if METRICS_ENABLED:
+        metrics.enable()
 
     try:
         # Initialize the main window
@@ -38,29 +123,26 @@ def main():
         root.title("Photo Manager")
         root.state('zoomed')  # Start maximized for better viewing
 
-        # Initialize all managers
-        file_manager = FileManager()
-        progress_manager = ProgressManager()
-        image_processor = ImageProcessor()
-        reports_manager = ReportsManager()
-
-        # Start the UI
-        app = PhotoManagerUI(
-            root,
-            file_manager,
-            progress_manager,
-            image_processor,
-            reports_manager
-        )
+        # Paint the empty window before the heavy imports in create_app().
+        root.update()
+
+        app, state_store = create_app(root)
+        if RESUME_LAST_SESSION:
+            app.resume_last_session()
+        logger.info("Startup took %.0f ms.", (time.perf_counter() - start) * 1000)
 
         # Start the Tkinter main loop
         root.mainloop()
+        state_store.close()
 
         logger.info("Application closed normally.")
 
     except Exception as e:
-        logger.exception(f"Application encountered an error: {e}")
+        logger.exception("Application encountered an error: %s", e)
 
 
 if __name__ == "__main__":
+    # The frozen executable starts its worker processes by running itself
+    # again; this turns those runs into workers instead of new windows.
+    multiprocessing.freeze_support()
     main()
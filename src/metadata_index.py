@@ -0,0 +1,202 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from PIL import Image
+from file_index import FileIndex
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+METADATA_CHUNKSIZE = 64
+
+# Shots at most this many seconds apart belong to the same burst.
+BURST_GAP_SECONDS = 2.0
+
+# EXIF tags read from the main IFD and the Exif sub-IFD.
+EXIF_MAKE = 0x010F
+EXIF_MODEL = 0x0110
+EXIF_ORIENTATION = 0x0112
+EXIF_DATETIME = 0x0132
+EXIF_IFD = 0x8769
+EXIF_DATETIME_ORIGINAL = 0x9003
+
+# Orientations 5-8 are stored rotated by 90 degrees.
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+_EXIF_DATETIME = re.compile(r"(\d{4}):(\d{2}):(\d{2})[ T](\d{2}):(\d{2}):(\d{2})")
+
+
+def parse_exif_datetime(value):
+    """Turn "YYYY:MM:DD HH:MM:SS" into a sortable "YYYY-MM-DD HH:MM:SS", or None if unset or malformed."""
+    if isinstance(value, bytes):
+        value = value.decode("ascii", "ignore")
+    match = _EXIF_DATETIME.match(str(value or "").strip())
+    if not match or match.group(1) == "0000":
+        return None
+    year, month, day, hour, minute, second = match.groups()
+    return f"{year}-{month}-{day} {hour}:{minute}:{second}"
+
+
+def camera_name(make, model):
+    """Combine make and model, dropping the make when the model already starts with it."""
+    make = str(make or "").strip("\x00 ")
+    model = str(model or "").strip("\x00 ")
+    if make and model.lower().startswith(make.split()[0].lower()):
+        return model
+    return " ".join(part for part in (make, model) if part) or None
+
+
+def read_metadata(image_path):
+    """
+    Read capture time, camera, orientation and dimensions from the file header.
+
+    Pixel data is never decoded. Width and height are as displayed, i.e.
+    swapped for images whose EXIF orientation rotates them. Runs in worker
+    processes.
+
+    Returns:
+        tuple: (path, size, mtime_ns, metadata); metadata is None on failure.
+    """
+    try:
+        st = os.stat(image_path)
+        with Image.open(image_path) as img:
+            width, height = img.size
+            exif = img.getexif()
+            captured = parse_exif_datetime(exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL))
+            captured = captured or parse_exif_datetime(exif.get(EXIF_DATETIME))
+            orientation = exif.get(EXIF_ORIENTATION, 1)
+            camera = camera_name(exif.get(EXIF_MAKE), exif.get(EXIF_MODEL))
+        if orientation in ROTATED_ORIENTATIONS:
+            width, height = height, width
+        return image_path, st.st_size, st.st_mtime_ns, {
+            "captured": captured,
+            "camera": camera,
+            "orientation": orientation,
+            "width": width,
+            "height": height,
+        }
+    except Exception as e:
+        logger.warning("Could not read metadata of '%s': %s", image_path, e)
+        return image_path, None, None, None
+
+
+class MetadataIndex:
+    def __init__(self, index=None, workers=None):
+        """
+        Header metadata for sorting and filtering, read on a process pool.
+
+        Args:
+            index (FileIndex): Persistent metadata store; only new or changed files are read.
+            workers (int): Size of the process pool (defaults to the CPU count).
+        """
+        self.index = index if index is not None else FileIndex(table="image_metadata")
+        self.workers = workers
+
+    def read_all(self, paths):
+        """
+        Return {path: metadata} for every image whose header could be read.
+        """
+        start = time.perf_counter()
+        metadata, missing = self.index.lookup(paths)
+        if missing:
+            computed = []
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                for path, size, mtime_ns, data in pool.map(read_metadata, missing, chunksize=METADATA_CHUNKSIZE):
+                    if data is not None:
+                        metadata[path] = data
+                        computed.append((path, size, mtime_ns, data))
+            self.index.put_many(computed)
+        logger.info(
+            "Metadata ready for %s images (%s read) in %.1f s.",
+            len(metadata), len(missing), time.perf_counter() - start
+        )
+        return metadata
+
+
+def capture_timestamp(data, image_path, day_starts=None):
+    """
+    Seconds since the epoch at which a photo was taken, falling back to the file's mtime.
+
+    day_starts caches the local midnight of each capture date, which is most
+    of the conversion cost when called for a whole folder.
+    """
+    captured = data.get("captured") if data else None
+    if captured:
+        try:
+            day = captured[:10]
+            start = day_starts.get(day) if day_starts is not None else None
+            if start is None:
+                start = datetime(int(day[0:4]), int(day[5:7]), int(day[8:10])).timestamp()
+                if day_starts is not None:
+                    day_starts[day] = start
+            return start + int(captured[11:13]) * 3600 + int(captured[14:16]) * 60 + int(captured[17:19])
+        except (ValueError, OverflowError, OSError):
+            pass
+    try:
+        return os.stat(image_path).st_mtime
+    except OSError:
+        return None
+
+
+def find_bursts(paths, metadata, max_gap=BURST_GAP_SECONDS, min_size=2):
+    """
+    Cluster photos taken in quick succession.
+
+    Photos are sorted by capture time once and swept in order; a new burst
+    starts wherever two consecutive shots are more than max_gap seconds
+    apart, so the cost after the sort is linear.
+
+    Args:
+        paths (list): Images to group.
+        metadata (dict): path -> MetadataIndex entry; paths without one use their mtime.
+        max_gap (float): Largest gap in seconds between shots of one burst.
+        min_size (int): Smallest number of shots that counts as a burst.
+
+    Returns:
+        list: Bursts in capture order, each a list of paths in capture order.
+    """
+    timed = []
+    day_starts = {}
+    for path in paths:
+        timestamp = capture_timestamp(metadata.get(path), path, day_starts)
+        if timestamp is not None:
+            timed.append((timestamp, path))
+    timed.sort()
+
+    bursts = []
+    current = []
+    previous = None
+    for timestamp, path in timed:
+        if previous is not None and timestamp - previous > max_gap:
+            if len(current) >= min_size:
+                bursts.append(current)
+            current = []
+        current.append(path)
+        previous = timestamp
+    if len(current) >= min_size:
+        bursts.append(current)
+
+    logger.info("Found %s bursts among %s images.", len(bursts), len(timed))
+    return bursts
@@ -0,0 +1,237 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from logger import get_logger
+from metrics import metrics
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def image_nbytes(img):
+    """Approximate the memory held by a decoded PIL image."""
+    return img.width * img.height * len(img.getbands())
+
+
+class ImageCache:
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        """
+        Thread-safe LRU cache of decoded images bounded by a byte budget.
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image_path, size):
+        """
+        Build a cache key from the path, its modification time and the target size.
+
+        Returns:
+            tuple: The key, or None if the file cannot be stat'ed.
+        """
+        try:
+            mtime = os.stat(image_path).st_mtime_ns
+        except OSError:
+            return None
+        return (image_path, mtime, size)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                metrics.increment("cache_misses")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.increment("cache_hits")
+            return entry[0]
+
+    def put(self, key, img):
+        nbytes = image_nbytes(img)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (img, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+class Prefetcher:
+    def __init__(self, image_processor, ahead=3, behind=1, workers=2, cache_bytes=DEFAULT_CACHE_BYTES):
+        """
+        Decode the images around the current position on a worker pool.
+
+        Args:
+            image_processor (ImageProcessor): Used to decode and resize images.
+            ahead (int): Number of images after the current one to prefetch.
+            behind (int): Number of images before the current one to prefetch.
+            workers (int): Size of the decode thread pool.
+            cache_bytes (int): Byte budget of the decoded image cache.
+        """
+        self.image_processor = image_processor
+        self.ahead = ahead
+        self.behind = behind
+        self.cache = ImageCache(cache_bytes)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._pending = {}
+        self._lock = threading.Lock()
+        logger.info(
+            "Prefetcher initialized: ahead=%s, behind=%s, workers=%s, cache=%s MB.",
+            ahead, behind, workers, cache_bytes // (1024 * 1024)
+        )
+
+    def _target_size(self):
+        return (self.image_processor.max_width, self.image_processor.max_height)
+
+    def _decode(self, key):
+        try:
+            # Decode at the size in the key; the target may change meanwhile.
+            img = self.image_processor.process_image(key[0], *key[2])
+            if img is not None:
+                self.cache.put(key, img)
+            return img
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def get_cached(self, image_path):
+        """Return the cached full-quality image for a path, or None without decoding."""
+        key = ImageCache.make_key(image_path, self._target_size())
+        if key is None:
+            return None
+        return self.cache.get(key)
+
+    def submit(self, image_path):
+        """
+        Schedule a full-quality decode on the worker pool.
+
+        Returns:
+            Future: Resolves to the resized image (or None if decoding failed).
+        """
+        key = ImageCache.make_key(image_path, self._target_size())
+        if key is None:
+            return self._executor.submit(self.image_processor.process_image, image_path)
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None or future.cancelled():
+                future = self._executor.submit(self._decode, key)
+                self._pending[key] = future
+        return future
+
+    def get_image(self, image_path):
+        """
+        Return the resized image for a path, from the cache when possible.
+
+        Waits for an in-flight prefetch of the same image instead of decoding it twice.
+        """
+        key = ImageCache.make_key(image_path, self._target_size())
+        if key is None:
+            return self.image_processor.process_image(image_path)
+
+        img = self.cache.get(key)
+        if img is not None:
+            return img
+
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None and not future.cancelled():
+            return future.result()
+        return self._decode(key)
+
+    def prefetch(self, images, index):
+        """
+        Schedule decodes for images[index] and its neighbours, nearest first.
+
+        Queued decodes that fell outside the new window are cancelled.
+        """
+        if not images:
+            return
+
+        count = len(images)
+        offsets = [0]
+        for distance in range(1, max(self.ahead, self.behind) + 1):
+            if distance <= self.ahead:
+                offsets.append(distance)
+            if distance <= self.behind:
+                offsets.append(-distance)
+
+        size = self._target_size()
+        wanted = []
+        for offset in offsets:
+            if abs(offset) >= count:
+                continue
+            key = ImageCache.make_key(images[(index + offset) % count], size)
+            if key is not None and key not in wanted:
+                wanted.append(key)
+
+        with self._lock:
+            self._cancel_others(wanted)
+            for key in wanted:
+                if key in self._pending or key in self.cache:
+                    continue
+                self._pending[key] = self._executor.submit(self._decode, key)
+
+    def retain(self, image_paths):
+        """Cancel queued decodes of every image not in image_paths, e.g. tiles scrolled out of view."""
+        size = self._target_size()
+        wanted = {ImageCache.make_key(path, size) for path in image_paths}
+        with self._lock:
+            self._cancel_others(wanted)
+
+    def _cancel_others(self, wanted):
+        # Caller holds self._lock. Decodes already running are left to finish.
+        for key, future in list(self._pending.items()):
+            if key not in wanted and future.cancel():
+                del self._pending[key]
+
+    def shutdown(self):
+        """Cancel queued work and stop the worker pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.cache.clear()
+        logger.info("Prefetcher stopped (cache hits: %s, misses: %s).", self.cache.hits, self.cache.misses)
@@ -0,0 +1,225 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import hashlib
+import os
+import threading
+import time
+from PIL import Image
+from logger import get_logger
+from metrics import metrics
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "previews")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Hits only refresh an entry's LRU timestamp when it is older than this.
+TOUCH_INTERVAL_SECONDS = 60
+
+# Eviction trims the cache down to this fraction of its cap.
+EVICT_TARGET_RATIO = 0.9
+
+HASH_CHUNK_BYTES = 64 * 1024
+JPEG_QUALITY = 90
+
+
+class PreviewCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, content_hash=False):
+        """
+        On-disk cache of screen-size previews shared across sessions.
+
+        Entries are content-addressed files in 256 sharded directories. An
+        entry's file mtime doubles as its last-access time for LRU eviction.
+
+        Args:
+            cache_dir (str): Directory holding the cache.
+            max_bytes (int): Size cap of the cache on disk.
+            content_hash (bool): Also key entries by a hash of the first and
+                last bytes of the source, to survive mtime-preserving edits.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.content_hash = content_hash
+        self.hits = 0
+        self.misses = 0
+        self._current_bytes = None
+        self._lock = threading.Lock()
+
+    def make_key(self, image_path, size):
+        """
+        Build the entry key from the source's path, size and mtime and the target size.
+
+        The source is only stat'ed, never opened, unless content_hash is set.
+
+        Returns:
+            str: Hex digest, or None if the source cannot be stat'ed.
+        """
+        try:
+            st = os.stat(image_path)
+        except OSError:
+            return None
+
+        digest = hashlib.sha1()
+        digest.update(
+            f"{os.path.abspath(image_path)}|{st.st_size}|{st.st_mtime_ns}|{size[0]}x{size[1]}".encode("utf-8")
+        )
+        if self.content_hash:
+            try:
+                with open(image_path, "rb") as f:
+                    digest.update(f.read(HASH_CHUNK_BYTES))
+                    if st.st_size > 2 * HASH_CHUNK_BYTES:
+                        f.seek(-HASH_CHUNK_BYTES, os.SEEK_END)
+                        digest.update(f.read(HASH_CHUNK_BYTES))
+            except OSError:
+                return None
+        return digest.hexdigest()
+
+    def _entry_paths(self, key):
+        shard = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(shard, key + ".jpg"), os.path.join(shard, key + ".png")
+
+    def get(self, image_path, size):
+        """
+        Return the cached preview for an image, or None on a miss.
+        """
+        key = self.make_key(image_path, size)
+        if key is None:
+            return None
+
+        for entry_path in self._entry_paths(key):
+            try:
+                img = Image.open(entry_path)
+                img.load()
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.warning("Discarding unreadable preview cache entry '%s': %s", entry_path, e)
+                self._remove(entry_path)
+                continue
+
+            self._touch(entry_path)
+            self.hits += 1
+            metrics.increment("disk_cache_hits")
+            return img
+
+        self.misses += 1
+        metrics.increment("disk_cache_misses")
+        return None
+
+    def put(self, image_path, size, img):
+        """
+        Store a preview, evicting the least recently used entries when over the cap.
+        """
+        key = self.make_key(image_path, size)
+        if key is None:
+            return
+
+        jpg_path, png_path = self._entry_paths(key)
+        if img.mode in ("RGB", "L", "CMYK"):
+            entry_path, fmt, options = jpg_path, "JPEG", {"quality": JPEG_QUALITY}
+        else:
+            entry_path, fmt, options = png_path, "PNG", {}
+
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            img.save(tmp_path, fmt, **options)
+            nbytes = os.path.getsize(tmp_path)
+            with self._lock:
+                # The same preview may be written twice, e.g. by a prefetch
+                # and a refinement; only the difference is new.
+                try:
+                    nbytes -= os.path.getsize(entry_path)
+                except FileNotFoundError:
+                    pass
+                os.replace(tmp_path, entry_path)
+                if self._current_bytes is not None:
+                    self._current_bytes += nbytes
+        except Exception as e:
+            logger.error("Failed to write preview cache entry for '%s': %s", image_path, e)
+            self._remove(tmp_path)
+            return
+
+        if self.size_on_disk() > self.max_bytes:
+            self.evict()
+
+    def size_on_disk(self):
+        """Total bytes held by the cache, scanned once and tracked incrementally afterwards."""
+        with self._lock:
+            if self._current_bytes is None:
+                self._current_bytes = sum(entry[2] for entry in self._scan())
+            return self._current_bytes
+
+    def evict(self):
+        """Remove least recently used entries until the cache is back under its cap."""
+        with self._lock:
+            entries = sorted(self._scan(), key=lambda entry: entry[1])
+            total = sum(entry[2] for entry in entries)
+            target = self.max_bytes * EVICT_TARGET_RATIO
+            removed = 0
+            for path, _, nbytes in entries:
+                if total <= target:
+                    break
+                if self._remove(path):
+                    total -= nbytes
+                    removed += 1
+            self._current_bytes = total
+        logger.info("Preview cache evicted %s entries, %s MB remain.", removed, total // (1024 * 1024))
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._scan():
+                self._remove(path)
+            self._current_bytes = 0
+
+    def _scan(self):
+        """Yield (path, last_access, bytes) for every entry."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        with os.scandir(self.cache_dir) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as files:
+                    for f in files:
+                        if f.name.endswith(".tmp"):
+                            continue
+                        try:
+                            st = f.stat()
+                        except OSError:
+                            continue
+                        yield f.path, st.st_mtime, st.st_size
+
+    def _touch(self, entry_path):
+        try:
+            now = time.time()
+            if now - os.stat(entry_path).st_mtime > TOUCH_INTERVAL_SECONDS:
+                os.utime(entry_path, (now, now))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
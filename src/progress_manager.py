@@ -18,17 +18,24 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import json
 import os
 from datetime import datetime
 from logger import get_logger
+from metrics import metrics
+from state_store import GLOBAL_SCOPE, get_default_store
 
 logger = get_logger(__name__)
 
 class ProgressManager:
-    def __init__(self):
-        self.progress_file = "progress.json"
-        self.progress_data = {
+    def __init__(self, state_store=None):
+        self.state_store = state_store or get_default_store()
+        self.folder = ""
+        self.progress_data = self._new_progress()
+        self.load_progress()
+
+    @staticmethod
+    def _new_progress():
+        return {
             "session_start": datetime.now().isoformat(),
             "last_index": 0,
             "total_images": 0,
@@ -36,44 +43,61 @@ class ProgressManager:
             "deleted_images": 0,
             "paused": False
         }
-        self.load_progress()
 
-    def load_progress(self):
-        if os.path.exists(self.progress_file):
-            try:
-                with open(self.progress_file, "r") as f:
-                    self.progress_data = json.load(f)
-                logger.info(f"Progress loaded from {self.progress_file}.")
-            except Exception as e:
-                logger.error(f"Failed to load progress: {e}")
-        else:
-            logger.info("No previous progress found. Starting new session.")
+    def _scope(self):
+        return os.path.abspath(self.folder) if self.folder else GLOBAL_SCOPE
+
+    def load_progress(self, folder=None):
+        """Load the stored progress, for the given folder if one is passed."""
+        if folder is not None:
+            self.folder = folder
+        try:
+            progress_data = self.state_store.get(self._scope(), "progress")
+            if progress_data:
+                self.progress_data = dict(progress_data)
+                logger.info("Progress loaded for '%s'.", self.folder or "last session")
+            else:
+                self.progress_data = self._new_progress()
+                logger.info("No previous progress found. Starting new session.")
+        except Exception as e:
+            logger.error("Failed to load progress: %s", e)
 
     def save_progress(self):
+        """Record progress in the state store; it reaches disk on the next background flush."""
         try:
-            with open(self.progress_file, "w") as f:
-                json.dump(self.progress_data, f, indent=4)
-            logger.info(f"Progress saved to {self.progress_file}.")
+            with metrics.timer("state_save"):
+                self.state_store.put(self._scope(), "progress", dict(self.progress_data))
+            logger.debug("Progress saved.")
         except Exception as e:
-            logger.error(f"Failed to save progress: {e}")
+            logger.error("Failed to save progress: %s", e)
 
     def update_progress(self, current_index, total_images):
         self.progress_data["last_index"] = current_index
         self.progress_data["total_images"] = total_images
         self.progress_data["processed_images"] = current_index
         self.save_progress()
-        logger.info(
-            f"Progress updated: {current_index}/{total_images} images processed."
-        )
+        logger.debug("Progress updated: %d/%d images processed.", current_index, total_images)
 
     def increment_deleted(self):
         self.progress_data["deleted_images"] += 1
         self.save_progress()
-        logger.info(f"Deleted images count updated to {self.progress_data['deleted_images']}.")
+        logger.info("Deleted images count updated to %d.", self.progress_data["deleted_images"])
+
+    def decrement_deleted(self):
+        self.progress_data["deleted_images"] = max(0, self.progress_data["deleted_images"] - 1)
+        self.save_progress()
+        logger.info("Deleted images count updated to %d.", self.progress_data["deleted_images"])
+
+    def update_export(self, export):
+        """Record the files and bytes a running export has copied, its throughput and ETA."""
+        self.progress_data["export"] = export
+        self.save_progress()
+        logger.debug("Export progress: %d/%d files.", export["files_done"], export["files_total"])
 
     def pause(self):
         self.progress_data["paused"] = True
         self.save_progress()
+        self.state_store.flush()
         logger.info("Processing paused.")
 
     def resume(self):
@@ -82,13 +106,6 @@ class ProgressManager:
         logger.info("Processing resumed.")
 
     def reset(self):
-        self.progress_data = {
-            "session_start": datetime.now().isoformat(),
-            "last_index": 0,
-            "total_images": 0,
-            "processed_images": 0,
-            "deleted_images": 0,
-            "paused": False
-        }
+        self.progress_data = self._new_progress()
         self.save_progress()
         logger.info("Progress reset for a new session.")
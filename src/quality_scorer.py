@@ -0,0 +1,156 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+from PIL import Image
+from file_index import FileIndex
+from image_processor import DECODE_BUDGET_MB, open_header, pool_decode_budget, within_decode_budget
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# Scores are computed on a grayscale copy no larger than this on its long side,
+# so results are comparable across cameras and cheap to compute.
+ANALYSIS_SIZE = 512
+SCORE_CHUNKSIZE = 16
+
+# Laplacian variance below which an image is considered blurred.
+BLUR_THRESHOLD = 100.0
+
+# Pixel values treated as crushed shadows / blown highlights.
+SHADOW_CLIP = 5
+HIGHLIGHT_CLIP = 250
+
+# A frame this dark and this flat is almost certainly a pocket or lens-cap shot.
+NEAR_BLACK_MEAN = 20.0
+NEAR_BLACK_STD = 10.0
+
+
+def analyze(gray):
+    """
+    Compute quality metrics for a grayscale image.
+
+    Args:
+        gray (numpy.ndarray): 2D uint8 array.
+
+    Returns:
+        dict: sharpness, underexposed, overexposed, mean, near_black and badness.
+    """
+    pixels = gray.astype(np.float32)
+    laplacian = (
+        pixels[1:-1, :-2] + pixels[1:-1, 2:] + pixels[:-2, 1:-1] + pixels[2:, 1:-1]
+        - 4.0 * pixels[1:-1, 1:-1]
+    )
+    sharpness = float(laplacian.var())
+
+    histogram = np.bincount(gray.ravel(), minlength=256)
+    total = float(gray.size)
+    underexposed = float(histogram[:SHADOW_CLIP + 1].sum() / total)
+    overexposed = float(histogram[HIGHLIGHT_CLIP:].sum() / total)
+    mean = float(pixels.mean())
+    near_black = bool(mean < NEAR_BLACK_MEAN and float(pixels.std()) < NEAR_BLACK_STD)
+
+    return {
+        "sharpness": sharpness,
+        "underexposed": underexposed,
+        "overexposed": overexposed,
+        "mean": mean,
+        "near_black": near_black,
+        "badness": badness(sharpness, underexposed, overexposed, near_black),
+    }
+
+
+def badness(sharpness, underexposed, overexposed, near_black):
+    """
+    Combine the metrics into one deletion-candidate score; higher is worse.
+
+    Pocket shots always rank first, then blur contributes up to 1 and each
+    clipped fraction up to 1.
+    """
+    blur = max(0.0, 1.0 - sharpness / BLUR_THRESHOLD)
+    return (3.0 if near_black else 0.0) + blur + underexposed + overexposed
+
+
+def score_file(image_path, decode_budget=DECODE_BUDGET_MB * 1024 * 1024):
+    """
+    Score one image file. Runs in worker processes.
+
+    Images that would need more than decode_budget bytes even after drafting
+    are refused.
+
+    Returns:
+        tuple: (path, size, mtime_ns, scores), or the path and None values on failure.
+    """
+    try:
+        st = os.stat(image_path)
+        with open_header(image_path) as img:
+            original_size = img.size
+            img.draft("L", (ANALYSIS_SIZE, ANALYSIS_SIZE))
+            if not within_decode_budget(image_path, img, original_size, decode_budget):
+                return image_path, None, None, None
+            gray = img.convert("L")
+        gray.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.BILINEAR)
+        return image_path, st.st_size, st.st_mtime_ns, analyze(np.asarray(gray))
+    except Exception as e:
+        logger.warning("Could not score '%s': %s", image_path, e)
+        return image_path, None, None, None
+
+
+class QualityScorer:
+    def __init__(self, index=None, workers=None):
+        """
+        Score images for blur and exposure problems on a process pool.
+
+        Args:
+            index (FileIndex): Persistent score store; only new or changed files are rescored.
+            workers (int): Size of the process pool (defaults to the CPU count).
+        """
+        self.index = index if index is not None else FileIndex(table="quality_scores")
+        self.workers = workers
+
+    def score_images(self, paths):
+        """
+        Return {path: scores} for every image that could be read.
+        """
+        start = time.perf_counter()
+        scores, missing = self.index.lookup(paths)
+        if missing:
+            computed = []
+            score = partial(score_file, decode_budget=pool_decode_budget(self.workers))
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                for path, size, mtime_ns, data in pool.map(score, missing, chunksize=SCORE_CHUNKSIZE):
+                    if data is not None:
+                        scores[path] = data
+                        computed.append((path, size, mtime_ns, data))
+            self.index.put_many(computed)
+        logger.info(
+            "Quality scores ready for %s images (%s computed) in %.1f s.",
+            len(scores), len(missing), time.perf_counter() - start
+        )
+        return scores
+
+    def worst_first(self, paths):
+        """Return the paths ordered from most to least likely junk, unscored images last."""
+        scores = self.score_images(paths)
+        return sorted(paths, key=lambda path: (path not in scores, -scores.get(path, {}).get("badness", 0.0)))
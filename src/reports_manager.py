@@ -18,13 +18,26 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import atexit
 import csv
 import os
+import queue
+import threading
 from datetime import datetime
 from logger import get_logger
+from metrics import metrics
 
 logger = get_logger(__name__)
 
+# Rows waiting for the writer thread; record_* calls block when it is full.
+REPORT_QUEUE_SIZE = 10000
+
+# The open report file is flushed after this many rows or this much idle time.
+REPORT_FLUSH_ROWS = 500
+REPORT_FLUSH_SECONDS = 1.0
+
+_STOP = object()
+
 
 class ReportsManager:
     def __init__(self, report_folder="reports"):
@@ -32,14 +45,12 @@ class ReportsManager:
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.report_file = os.path.join(self.report_folder, f"session_{self.session_id}.csv")
 
-        try:
-            os.makedirs(self.report_folder, exist_ok=True)
-            with open(self.report_file, mode='w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow(["Timestamp", "Action", "Image Path", "Details"])
-            logger.info(f"Report initialized: {self.report_file}")
-        except Exception as e:
-            logger.error(f"Failed to initialize report: {e}")
+        # Entries are written by a background thread that keeps the file open.
+        # The file itself is only created once the first entry arrives.
+        self._queue = queue.Queue(maxsize=REPORT_QUEUE_SIZE)
+        self._writer = threading.Thread(target=self._write_loop, name="report-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
 
     def record_deletion(self, image_path):
         self._write_entry("Delete", image_path, "Image deleted.")
@@ -49,6 +60,7 @@ class ReportsManager:
 
     def reset(self):
         logger.info("Resetting reports manager. New session starting.")
+        self.close()
         self.__init__(self.report_folder)
 
     def generate_report(self):
@@ -58,26 +70,93 @@ class ReportsManager:
         - Add a footer
         - Upload to a server
         - Or simply log the completion
+
+        All entries recorded so far are written before the footer.
         """
         try:
-            with open(self.report_file, mode='a', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow([])
-                writer.writerow(["Session Completed", datetime.now().strftime("%Y-%m-%d %H:%M:%S")])
-            logger.info(f"Report finalized: {self.report_file}")
+            self._enqueue([])
+            self._enqueue(["Session Completed", datetime.now().strftime("%Y-%m-%d %H:%M:%S")])
+            self.flush()
+            logger.info("Report finalized: %s", self.report_file)
         except Exception as e:
-            logger.error(f"Error finalizing report: {e}")
+            logger.error("Error finalizing report: %s", e)
+
+    def flush(self):
+        """Block until every entry recorded so far is on disk."""
+        if not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        """Drain the queue, close the report file and stop the writer thread."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        atexit.unregister(self.close)
 
     def _write_entry(self, action, image_path, details):
+        self._enqueue([
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            action,
+            image_path,
+            details
+        ])
+        logger.debug("Report entry recorded: %s - %s - %s", action, image_path, details)
+
+    def _enqueue(self, row):
+        if not self._writer.is_alive():
+            logger.error("Report writer is stopped; dropping entry: %s", row)
+            return
+        self._queue.put(row)
+
+    def _open_report(self):
+        """Create the report file with its header row; returns the open file or None."""
         try:
-            with open(self.report_file, mode='a', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow([
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    action,
-                    image_path,
-                    details
-                ])
-            logger.debug(f"Report entry recorded: {action} - {image_path} - {details}")
+            os.makedirs(self.report_folder, exist_ok=True)
+            file = open(self.report_file, mode='a', newline='', encoding='utf-8')
+            if file.tell() == 0:
+                csv.writer(file).writerow(["Timestamp", "Action", "Image Path", "Details"])
+            logger.info("Report initialized: %s", self.report_file)
+            return file
         except Exception as e:
-            logger.error(f"Failed to write report entry: {e}")
+            logger.error("Failed to initialize report: %s", e)
+            return None
+
+    def _write_loop(self):
+        file = None
+        writer = None
+        opened = False
+        unflushed = 0
+
+        while True:
+            try:
+                item = self._queue.get(timeout=REPORT_FLUSH_SECONDS)
+            except queue.Empty:
+                item = None
+
+            try:
+                if isinstance(item, list):
+                    if not opened:
+                        opened = True
+                        file = self._open_report()
+                        writer = csv.writer(file) if file else None
+                    if writer:
+                        with metrics.timer("report_write"):
+                            writer.writerow(item)
+                        unflushed += 1
+                    if unflushed < REPORT_FLUSH_ROWS:
+                        continue
+                if file and unflushed:
+                    file.flush()
+                    unflushed = 0
+            except Exception as e:
+                logger.error("Failed to write report entry: %s", e)
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                if file:
+                    file.close()
+                return
@@ -0,0 +1,149 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from logger import get_logger
+from metrics import metrics
+
+logger = get_logger(__name__)
+
+DEFAULT_STATE_PATH = "state.db"
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+# Scope for state that is not tied to a folder, e.g. the last folder opened.
+GLOBAL_SCOPE = ""
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store():
+    """Return the process-wide StateStore, creating it on first use."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = StateStore()
+        return _default_store
+
+
+class StateStore:
+    def __init__(self, db_path=DEFAULT_STATE_PATH, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        Session and progress state keyed by (scope, key), usually (folder, name).
+
+        Updates only touch memory; repeated updates of the same key coalesce
+        and a background thread writes them to SQLite (WAL mode) every
+        flush_interval seconds in a single transaction. close() and process
+        exit flush whatever is pending.
+        """
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self._values = {}
+        self._dirty = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._closed = False
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "scope TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, updated TEXT NOT NULL, "
+            "PRIMARY KEY (scope, key))"
+        )
+        self._conn.commit()
+
+        self._wakeup = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="state-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def get(self, scope, key, default=None):
+        """Return the latest value, pending or stored, for a key."""
+        with self._lock:
+            if (scope, key) in self._values:
+                return self._values[(scope, key)]
+
+        with self._db_lock:
+            if self._closed:
+                return default
+            row = self._conn.execute(
+                "SELECT value FROM state WHERE scope = ? AND key = ?", (scope, key)
+            ).fetchone()
+        value = json.loads(row[0]) if row else default
+
+        with self._lock:
+            return self._values.setdefault((scope, key), value)
+
+    def put(self, scope, key, value):
+        """Record a new value. Does no disk I/O; the value is written on the next flush."""
+        with self._lock:
+            self._values[(scope, key)] = value
+            self._dirty[(scope, key)] = value
+
+    def flush(self):
+        """Write all pending updates in one transaction."""
+        with self._lock:
+            if not self._dirty:
+                return
+            pending, self._dirty = self._dirty, {}
+
+        updated = datetime.now().isoformat()
+        rows = [(scope, key, json.dumps(value), updated) for (scope, key), value in pending.items()]
+        try:
+            with self._db_lock, metrics.timer("state_flush"):
+                if self._closed:
+                    return
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO state (scope, key, value, updated) VALUES (?, ?, ?, ?)", rows
+                    )
+            logger.debug("State flushed (%d keys).", len(rows))
+        except sqlite3.Error as e:
+            logger.error("Failed to flush state: %s", e)
+            with self._lock:
+                # Keep the failed updates unless they were superseded meanwhile.
+                for item, value in pending.items():
+                    self._dirty.setdefault(item, value)
+
+    def close(self):
+        """Stop the background flusher and write everything still pending."""
+        if self._closed:
+            return
+        self._wakeup.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self._closed = True
+            self._conn.close()
+        atexit.unregister(self.close)
+        logger.info("State store closed.")
+
+    def _flush_loop(self):
+        while not self._wakeup.wait(self.flush_interval):
+            self.flush()
@@ -18,21 +18,75 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from tkinter import filedialog, messagebox, simpledialog
 from PIL import ImageTk
+from prefetcher import Prefetcher
+from grid_view import THUMB_CACHE_MB, THUMB_SIZE, THUMB_WORKERS, ThumbnailGrid
+from zoom_view import TilePyramid, ZoomView
+from decode_scheduler import DecodeScheduler
+from exporter import Exporter, describe_export
+from image_processor import DECODE_DISK, ImageProcessor
+from metrics import metrics
 from logger import get_logger
 
 logger = get_logger(__name__)
 
+# How often to check whether the decode of the image navigated to, or the
+# full-quality render of a preview, is ready.
+REFINE_POLL_MS = 15
+
+# How often to merge results from a running folder scan.
+SCAN_POLL_MS = 50
+
+# Window resizes are re-rendered once they have paused for this long.
+RESIZE_DEBOUNCE_MS = 150
+
+# How often to check on long-running background jobs such as duplicate search.
+BACKGROUND_POLL_MS = 200
+
+# How often to look for images added, removed or renamed in the open folder.
+WATCH_INTERVAL_MS = 3000
+
+# How often to check for deletes whose move into 'deleted' failed.
+DELETE_POLL_MS = 1000
+
+# Where "Save Metrics" and the exit dump write their JSON snapshots.
+METRICS_FOLDER = "logs"
+
 class PhotoManagerUI:
-    def __init__(self, root, file_manager, progress_manager, image_processor, reports_manager):
+    def __init__(self, root, file_manager, progress_manager, image_processor, reports_manager, prefetcher=None,
+                 duplicate_finder=None, quality_scorer=None):
         self.root = root
         self.file_manager = file_manager
         self.progress_manager = progress_manager
         self.image_processor = image_processor
         self.reports_manager = reports_manager
+        self.prefetcher = prefetcher or Prefetcher(image_processor)
+        self.navigation = DecodeScheduler(self._decode_for_display)
+        self._paint_job = None
+        self.duplicate_finder = duplicate_finder
+        self.quality_scorer = quality_scorer
+        self.metadata_index = None
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="background")
+        self._watcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="folder-watch")
+        self.exporter = Exporter()
+        self._export_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export-run")
+        self._export = None
+        self.thumbnails = None
+        self.grid = None
+        self.grid_mode = False
+        self.pyramid = None
+        self.zoom = None
+        self.zoom_mode = False
         self.photo = None
+        self._image_item = None
+        self._resize_job = None
+        self.recursive_scan = tk.BooleanVar(value=False)
+        self.collect_metrics = tk.BooleanVar(value=metrics.enabled)
 
         self.root.title("Photo Manager")
         self.canvas = tk.Canvas(root, bg='black')
@@ -40,21 +94,62 @@ class PhotoManagerUI:
 
         self.setup_ui()
 
+        # Fit previews to the canvas rather than a fixed size, and follow window resizes.
+        self.root.update_idletasks()
+        self._fit_to_canvas()
+        self.canvas.bind("<Configure>", self._on_canvas_configure)
+
         # Bind the close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
+        if self.file_manager.snapshot is not None:
+            self.root.after(WATCH_INTERVAL_MS, self._watch_folder)
+        self.root.after(DELETE_POLL_MS, self._poll_failed_deletes)
+
     def setup_ui(self):
         try:
             menu = tk.Menu(self.root)
             file_menu = tk.Menu(menu, tearoff=0)
             file_menu.add_command(label="Browse Folder", command=self.select_folder)
+            file_menu.add_command(label="Add Folder...", command=self.select_extra_folder)
+            file_menu.add_checkbutton(label="Include Subfolders", variable=self.recursive_scan)
             file_menu.add_command(label="Pause", command=self.pause)
             file_menu.add_command(label="Resume", command=self.resume)
             file_menu.add_command(label="Start Over", command=self.start_over)
             file_menu.add_command(label="Generate Report", command=self.generate_report)
+            file_menu.add_command(label="Export Kept Photos...", command=self.export_photos)
+            file_menu.add_separator()
+            file_menu.add_checkbutton(label="Collect Metrics", variable=self.collect_metrics,
+                                      command=self.toggle_metrics)
+            file_menu.add_command(label="Save Metrics", command=self.save_metrics)
             file_menu.add_separator()
             file_menu.add_command(label="Exit", command=self.exit_application)
             menu.add_cascade(label="File", menu=file_menu)
+
+            review_menu = tk.Menu(menu, tearoff=0)
+            review_menu.add_command(label="Find Duplicates", command=self.find_duplicates)
+            review_menu.add_command(label="Next Group", command=self.show_next_group)
+            review_menu.add_command(label="Previous Group", command=self.show_previous_group)
+            review_menu.add_command(label="Find Bursts", command=self.find_bursts)
+            review_menu.add_command(label="Keep Current, Delete Rest", accelerator="Ctrl+K",
+                                    command=self.keep_one_in_group)
+            review_menu.add_separator()
+            review_menu.add_command(label="Worst First", command=self.sort_worst_first)
+            review_menu.add_command(label="Filename Order", command=self.sort_by_filename)
+            review_menu.add_command(label="Capture Time Order", command=lambda: self.sort_by_metadata("captured"))
+            review_menu.add_command(label="Camera Order", command=lambda: self.sort_by_metadata("camera"))
+            review_menu.add_command(label="Smallest First", command=lambda: self.sort_by_metadata("pixels"))
+            review_menu.add_separator()
+            review_menu.add_command(label="Filter by Camera...", command=self.filter_by_camera)
+            review_menu.add_command(label="Filter by Date...", command=self.filter_by_date)
+            review_menu.add_command(label="Filter by Minimum Size...", command=self.filter_by_size)
+            review_menu.add_command(label="Clear Filter", command=self.clear_filter)
+            menu.add_cascade(label="Review", menu=review_menu)
+
+            view_menu = tk.Menu(menu, tearoff=0)
+            view_menu.add_command(label="Grid View", accelerator="Ctrl+G", command=self.toggle_grid)
+            view_menu.add_command(label="Zoom 100%", accelerator="Z", command=self.toggle_zoom)
+            menu.add_cascade(label="View", menu=view_menu)
             self.root.config(menu=menu)
 
             control_frame = tk.Frame(self.root)
@@ -63,74 +158,636 @@ class PhotoManagerUI:
             tk.Button(control_frame, text="Back", command=self.show_previous).pack(side="left", padx=5)
             tk.Button(control_frame, text="Next", command=self.show_next).pack(side="left", padx=5)
             tk.Button(control_frame, text="Delete", command=self.delete_image).pack(side="left", padx=5)
+            tk.Button(control_frame, text="Undo", command=self.undo_delete).pack(side="left", padx=5)
+            self.root.bind("<Right>", lambda event: self._on_arrow(self.show_next))
+            self.root.bind("<Left>", lambda event: self._on_arrow(self.show_previous))
+            self.root.bind("<Control-z>", lambda event: self.undo_delete())
+            self.root.bind("<Control-g>", lambda event: self.toggle_grid())
+            self.root.bind("<Control-k>", lambda event: self.keep_one_in_group())
+            self.root.bind("<z>", lambda event: self.toggle_zoom())
+            self.canvas.bind("<Double-Button-1>", self._zoom_at_click)
         except Exception as e:
-            logger.error(f"Error setting up UI: {e}")
+            logger.error("Error setting up UI: %s", e)
 
     def select_folder(self):
         folder_selected = filedialog.askdirectory()
         if folder_selected:
-            try:
-                self.file_manager.load_images(folder_selected)
-                self.progress_manager.load_progress()
+            self._open_folder(folder_selected, self.recursive_scan.get())
+
+    def select_extra_folder(self):
+        """Show another folder's images together with the ones already loaded."""
+        folder_selected = filedialog.askdirectory()
+        if folder_selected:
+            self._add_folder(folder_selected, self.recursive_scan.get())
+
+    def _add_folder(self, folder, recursive):
+        def on_scanned(images):
+            added = self.file_manager.add_folder(folder, recursive, images)
+            self.root.title(f"Photo Manager - {added} photos added")
+            self.show_image()
+
+        self._run_in_background("scanning", lambda: self.file_manager.scan_folder(folder, recursive), on_scanned)
+
+    def resume_last_session(self):
+        """
+        Reopen the last folder at the image the user was on.
+
+        The image is painted straight from the preview cache, before the
+        folder scan that restores the session has finished.
+        """
+        session = self.file_manager.last_session()
+        if not session:
+            return
+        recursive = session.get("recursive", False)
+        self.recursive_scan.set(recursive)
+        shown = False
+        image_path = session.get("image")
+        if image_path and self.image_processor.preview_cache is not None:
+            img = self.image_processor.preview_cache.get(
+                image_path, (self.image_processor.max_width, self.image_processor.max_height)
+            )
+            if img:
+                self._display(img)
+                shown = True
+        logger.info("Resuming last session in: %s", session["folder"])
+        self._open_folder(session["folder"], recursive, shown, session.get("folders", ()))
+
+    def _open_folder(self, folder, recursive, shown=False, extra_folders=()):
+        try:
+            self.file_manager.start_scan(folder, recursive=recursive)
+            self.progress_manager.load_progress(folder)
+            self.root.after(SCAN_POLL_MS, self._poll_scan, shown, extra_folders)
+        except Exception as e:
+            logger.error("Error selecting folder: %s", e)
+            messagebox.showerror("Error", f"Failed to load images: {e}")
+
+    def _poll_scan(self, shown, extra_folders=()):
+        """Show the first image as soon as it is found and keep merging the rest, then add extra_folders."""
+        try:
+            scanning = self.file_manager.poll_scan()
+            count = len(self.file_manager.images)
+            if scanning:
+                self.root.title(f"Photo Manager - scanning ({count} images found)")
+                if count and not shown:
+                    self.show_image()
+                    shown = True
+                self.root.after(SCAN_POLL_MS, self._poll_scan, shown, extra_folders)
+            else:
+                self.root.title("Photo Manager")
                 self.show_image()
-            except Exception as e:
-                logger.error(f"Error selecting folder: {e}")
-                messagebox.showerror("Error", f"Failed to load images: {e}")
+                for folder, recursive in extra_folders:
+                    if os.path.isdir(folder):
+                        self._add_folder(folder, recursive)
+        except Exception as e:
+            logger.error("Error scanning folder: %s", e)
+            messagebox.showerror("Error", f"Failed to load images: {e}")
 
-    def show_image(self):
+    def _watch_folder(self):
+        """Check the open folder for changes off the UI thread every WATCH_INTERVAL_MS."""
+        if not self.file_manager.folder or self.file_manager.scanning:
+            self.root.after(WATCH_INTERVAL_MS, self._watch_folder)
+            return
+        folder = self.file_manager.folder
+        future = self._watcher.submit(self.file_manager.check_changes)
+        self.root.after(BACKGROUND_POLL_MS, self._apply_folder_changes, folder, future)
+
+    def _apply_folder_changes(self, folder, future):
+        if not future.done():
+            self.root.after(BACKGROUND_POLL_MS, self._apply_folder_changes, folder, future)
+            return
+        self.root.after(WATCH_INTERVAL_MS, self._watch_folder)
         try:
-            self.canvas.delete("all")
+            changes = future.result()
+            if folder == self.file_manager.folder and not self.file_manager.scanning:
+                current = self.file_manager.get_current_image()
+                if self.file_manager.apply_changes(*changes):
+                    if self.grid_mode or current != self.file_manager.get_current_image():
+                        self.show_image()
+                    else:
+                        self.progress_manager.update_progress(self.file_manager.index, len(self.file_manager.images))
+        except Exception as e:
+            logger.error("Error checking folder for changes: %s", e)
+
+    def show_image(self):
+        if self.grid_mode:
+            self.grid.set_images(self.file_manager.images, self.file_manager.index)
+            return
+        if self.zoom_mode:
+            # Keep the zoom level and position, e.g. to compare focus across a burst.
             image_path = self.file_manager.get_current_image()
-            if image_path:
-                img = self.image_processor.process_image(image_path)
-                if img: 
-                    self.photo = ImageTk.PhotoImage(img)
-                    self.canvas.create_image(
-                        self.canvas.winfo_width() // 2,
-                        self.canvas.winfo_height() // 2,
-                        anchor="center",
-                        image=self.photo
-                    )
-                    self.progress_manager.update_progress(self.file_manager.index, len(self.file_manager.images))
-                    logger.info(f"Displayed image: {image_path}")
-                else:
-                    logger.error(f"Failed to load image: {image_path}")
+            if image_path and self.zoom.open(image_path, self.zoom.level, self.zoom.relative_center()):
+                self.progress_manager.update_progress(self.file_manager.index, len(self.file_manager.images))
             else:
-                self.canvas.delete("all")
+                self.show_unzoomed()
+            return
+        try:
+            image_path = self.file_manager.get_current_image()
+            if not image_path:
+                self._clear_display()
                 messagebox.showinfo("Done", "No more images to display.")
+                return
+            self.navigation.set_target(image_path)
+            img = self.prefetcher.get_cached(image_path)
+            if img is not None:
+                self._paint(image_path, img)
+                return
+            # Navigation outran the prefetch window; its queued decodes are
+            # for images already passed, so make way for the target.
+            self.prefetcher.retain([image_path])
+            self._paint_when_ready(image_path, self.navigation.decode_target())
         except Exception as e:
-            logger.error(f"Error displaying image: {e}")
+            logger.error("Error displaying image: %s", e)
             messagebox.showerror("Error", f"Failed to display image: {e}")
 
+    def _decode_for_display(self, image_path):
+        # Runs on the decode scheduler's worker.
+        if self.image_processor.fast_preview:
+            return self.image_processor.process_preview(image_path)
+        return self.prefetcher.get_image(image_path)
+
+    def _paint_when_ready(self, image_path, future):
+        """
+        Paint an image once its decode finishes.
+
+        If navigation moved on meanwhile the image is still painted as
+        feedback, unless a newer one already was; only the target is refined.
+        """
+        if future.cancelled() or not self.navigation.wanted(image_path) or self.grid_mode or self.zoom_mode:
+            return
+        if not future.done():
+            self.root.after(REFINE_POLL_MS, self._paint_when_ready, image_path, future)
+            return
+        try:
+            img = future.result()
+            if not img:
+                self._clear_display()
+                logger.error("Failed to load image: %s", image_path)
+                return
+            self._paint(image_path, img)
+            if (image_path == self.navigation.target and self.image_processor.fast_preview
+                    and img.info.get("decode_path") != DECODE_DISK):
+                self.root.after(REFINE_POLL_MS, self._refine_image, image_path, self.prefetcher.submit(image_path))
+        except Exception as e:
+            logger.error("Error displaying image: %s", e)
+
+    def _paint(self, image_path, img):
+        with metrics.timer("frame"):
+            self._display(img)
+        self.navigation.painted(image_path)
+        self.progress_manager.update_progress(self.file_manager.index, len(self.file_manager.images))
+        logger.info("Displayed image: %s (%s)", image_path, img.info.get("decode_path"))
+        self.prefetcher.prefetch(self.file_manager.images, self.file_manager.index)
+
+    def _display(self, img):
+        """
+        Show an image on the canvas.
+
+        The canvas keeps one image item. When the new image has the size of
+        the one shown, as consecutive fitted photos and a preview and its
+        refinement usually do, its pixels are pasted into the existing
+        PhotoImage instead of allocating a new one.
+        """
+        with metrics.timer("photoimage"):
+            if self.photo is not None and (self.photo.width(), self.photo.height()) == img.size:
+                self.photo.paste(img)
+            else:
+                self.photo = ImageTk.PhotoImage(img)
+        with metrics.timer("draw"):
+            center = (self.canvas.winfo_width() // 2, self.canvas.winfo_height() // 2)
+            if self._image_item is None:
+                self._image_item = self.canvas.create_image(*center, anchor="center", image=self.photo)
+            else:
+                self.canvas.itemconfigure(self._image_item, image=self.photo, state="normal")
+                self.canvas.coords(self._image_item, *center)
+            if metrics.enabled:
+                # Tk paints at idle time; flush it here so the paint is counted.
+                self.canvas.update_idletasks()
+
+    def _clear_display(self):
+        if self._image_item is not None:
+            self.canvas.itemconfigure(self._image_item, state="hidden")
+
+    def _fit_to_canvas(self):
+        """
+        Make the canvas size the target size of rendered images.
+
+        Returns:
+            bool: True if the target size changed.
+        """
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return False
+        if (width, height) == (self.image_processor.max_width, self.image_processor.max_height):
+            return False
+        self.image_processor.set_target_size(width, height)
+        return True
+
+    def _on_canvas_configure(self, event):
+        # A window drag fires a stream of these; render once it settles.
+        if self._resize_job is not None:
+            self.root.after_cancel(self._resize_job)
+        self._resize_job = self.root.after(RESIZE_DEBOUNCE_MS, self._apply_resize)
+
+    def _apply_resize(self):
+        self._resize_job = None
+        if self._fit_to_canvas() and self.file_manager.images and not self.grid_mode and not self.zoom_mode:
+            self.show_image()
+        elif self._image_item is not None:
+            self.canvas.coords(
+                self._image_item, self.canvas.winfo_width() // 2, self.canvas.winfo_height() // 2
+            )
+
+    def _refine_image(self, image_path, future):
+        """Swap the coarse preview for the full-quality render once it is decoded."""
+        if not future.done():
+            self.root.after(REFINE_POLL_MS, self._refine_image, image_path, future)
+            return
+        if future.cancelled() or image_path != self.file_manager.get_current_image():
+            return
+        try:
+            img = future.result()
+            if img:
+                self._display(img)
+                logger.debug("Refined preview for: %s", image_path)
+        except Exception as e:
+            logger.error("Error refining image: %s", e)
+
     def delete_image(self):
         try:
-            self.file_manager.delete_image()
+            deleted_path = self.file_manager.delete_image()
+            if deleted_path:
+                self.reports_manager.record_deletion(deleted_path)
+                self.progress_manager.increment_deleted()
             self.show_image()
         except Exception as e:
-            logger.error(f"Error deleting image: {e}")
+            logger.error("Error deleting image: %s", e)
             messagebox.showerror("Error", f"Failed to delete image: {e}")
 
-    def show_next(self):
+    def _poll_failed_deletes(self):
+        """Bring back photos the delete queue could not move and tell the user why."""
+        self.root.after(DELETE_POLL_MS, self._poll_failed_deletes)
+        try:
+            current = self.file_manager.get_current_image() if self.file_manager.images else None
+            failed = self.file_manager.poll_failed_deletes()
+            if not failed:
+                return
+            for job in failed:
+                self.reports_manager.record_action("Delete Failed", job.source, str(job.error))
+                self.progress_manager.decrement_deleted()
+            if self.grid_mode or current != self.file_manager.get_current_image():
+                self.show_image()
+            else:
+                self.progress_manager.update_progress(self.file_manager.index, len(self.file_manager.images))
+            reasons = "\n".join(f"{os.path.basename(job.source)}: {job.error}" for job in failed[:5])
+            messagebox.showerror(
+                "Delete Failed", f"{len(failed)} photos could not be moved to the deleted folder:\n{reasons}"
+            )
+        except Exception as e:
+            logger.error("Error checking for failed deletes: %s", e)
+
+    def undo_delete(self):
         try:
-            self.file_manager.next_image()
+            restored_path = self.file_manager.undo_delete()
+            if restored_path:
+                self.reports_manager.record_action("Undo Delete", restored_path, "Image restored.")
+                self.progress_manager.decrement_deleted()
+                self.show_image()
+        except Exception as e:
+            logger.error("Error undoing delete: %s", e)
+            messagebox.showerror("Error", f"Failed to undo delete: {e}")
+
+    def toggle_grid(self):
+        if self.grid_mode:
+            self.show_single()
+        else:
+            self.show_grid()
+
+    def show_grid(self):
+        """Switch to the thumbnail grid. Select with click, Ctrl+click and Shift+click; Delete removes the selection."""
+        if not self.file_manager.images:
+            messagebox.showinfo("Grid View", "Load a folder first.")
+            return
+        if self.zoom_mode:
+            self.zoom.frame.pack_forget()
+            self.zoom_mode = False
+        if self.grid is None:
+            thumbnail_processor = ImageProcessor(
+                THUMB_SIZE, THUMB_SIZE, preview_cache=self.image_processor.preview_cache,
+                memory_budget=self.image_processor.memory_budget
+            )
+            self.thumbnails = Prefetcher(
+                thumbnail_processor, ahead=0, behind=0, workers=THUMB_WORKERS,
+                cache_bytes=THUMB_CACHE_MB * 1024 * 1024
+            )
+            self.grid = ThumbnailGrid(
+                self.root, self.thumbnails, on_open=self._open_from_grid, on_delete=self._delete_from_grid
+            )
+        self.canvas.pack_forget()
+        self.grid.frame.pack(fill=tk.BOTH, expand=True)
+        self.grid_mode = True
+        self.grid.canvas.focus_set()
+        self.show_image()
+
+    def show_single(self):
+        if self.grid is not None:
+            self.grid.frame.pack_forget()
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.grid_mode = False
+        self.show_image()
+
+    def toggle_zoom(self):
+        if self.zoom_mode:
+            self.show_unzoomed()
+        else:
+            self.show_zoomed()
+
+    def show_zoomed(self, center=(0.5, 0.5)):
+        """
+        Look at the current image at 100%, centred on a point given as fractions of its size.
+
+        Drag or use the arrow keys to pan, the mouse wheel or +/- to zoom and
+        Escape (or Z) to go back.
+        """
+        image_path = self.file_manager.get_current_image()
+        if self.grid_mode or not image_path:
+            return
+        if self.zoom is None:
+            self.pyramid = TilePyramid(self.image_processor.memory_budget, self.image_processor.decode_budget)
+            self.zoom = ZoomView(self.root, self.pyramid, on_close=self.show_unzoomed)
+        self.canvas.pack_forget()
+        self.zoom.frame.pack(fill=tk.BOTH, expand=True)
+        # The view's size decides the pyramid levels, so let it be laid out first.
+        self.zoom.frame.update_idletasks()
+        self.zoom_mode = True
+        self.zoom.canvas.focus_set()
+        if not self.zoom.open(image_path, 0, center):
+            self.show_unzoomed()
+
+    def show_unzoomed(self):
+        if self.zoom is not None:
+            self.zoom.frame.pack_forget()
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.zoom_mode = False
+        self.show_image()
+
+    def _zoom_at_click(self, event):
+        """Zoom to 100% on the point double-clicked in the fitted image."""
+        if self.photo is None:
+            return
+        width, height = self.photo.width(), self.photo.height()
+        x = (event.x - (self.canvas.winfo_width() - width) / 2) / width
+        y = (event.y - (self.canvas.winfo_height() - height) / 2) / height
+        if 0 <= x <= 1 and 0 <= y <= 1:
+            self.show_zoomed((x, y))
+
+    def _open_from_grid(self, index):
+        self.file_manager.index = index
+        self.file_manager.save_session()
+        self.show_single()
+
+    def _delete_from_grid(self, paths):
+        try:
+            for deleted_path in self.file_manager.delete_images(paths):
+                self.reports_manager.record_deletion(deleted_path)
+                self.progress_manager.increment_deleted()
             self.show_image()
         except Exception as e:
-            logger.error(f"Error showing next image: {e}")
-            messagebox.showerror("Error", f"Failed to show next image: {e}")
+            logger.error("Error deleting images: %s", e)
+            messagebox.showerror("Error", f"Failed to delete images: {e}")
+
+    def show_next(self):
+        self._navigate(self.file_manager.next_image, "next")
 
     def show_previous(self):
+        self._navigate(self.file_manager.previous_image, "previous")
+
+    def _on_arrow(self, step):
+        # In the grid and zoom views the arrow keys scroll and pan instead.
+        if not self.grid_mode and not self.zoom_mode:
+            step()
+
+    def _navigate(self, move, label):
+        """
+        Move through the list and paint the new image once Tk is idle.
+
+        Key repeat delivers steps faster than images decode; the steps that
+        arrive before the paint runs are coalesced into a single paint of the
+        image the user ended up on.
+        """
+        try:
+            move()
+            image_path = self.file_manager.get_current_image()
+            if image_path and not self.grid_mode and not self.zoom_mode:
+                self.navigation.set_target(image_path)
+            if self._paint_job is None:
+                self._paint_job = self.root.after_idle(self._paint_latest)
+            else:
+                metrics.increment("navigation_coalesced")
+        except Exception as e:
+            logger.error("Error showing %s image: %s", label, e)
+            messagebox.showerror("Error", f"Failed to show {label} image: {e}")
+
+    def _paint_latest(self):
+        self._paint_job = None
+        self.show_image()
+
+    def find_duplicates(self):
+        if not self.file_manager.images:
+            messagebox.showinfo("Duplicates", "Load a folder first.")
+            return
+        if self.duplicate_finder is None:
+            # Imported on first use to keep NumPy out of startup.
+            from duplicate_finder import DuplicateFinder
+            self.duplicate_finder = DuplicateFinder()
+        paths = list(self.file_manager.images)
+        self._run_in_background(
+            "finding duplicates",
+            lambda: self.duplicate_finder.find_groups(paths),
+            self._on_duplicates_found
+        )
+
+    def _on_duplicates_found(self, groups):
+        self.file_manager.set_groups(groups)
+        if self.file_manager.groups:
+            self._show_group()
+            messagebox.showinfo("Duplicates", f"Found {len(self.file_manager.groups)} groups of similar photos.")
+        else:
+            messagebox.showinfo("Duplicates", "No similar photos found.")
+
+    def find_bursts(self):
+        """Group photos shot within a few seconds of each other, using capture time or mtime."""
+        if not self.file_manager.images:
+            messagebox.showinfo("Bursts", "Load a folder first.")
+            return
+        if self.metadata_index is None:
+            from metadata_index import MetadataIndex
+            self.metadata_index = MetadataIndex()
+        from metadata_index import find_bursts
+        paths = list(self.file_manager.images)
+        self._run_in_background(
+            "finding bursts",
+            lambda: find_bursts(paths, self.metadata_index.read_all(paths)),
+            self._on_bursts_found
+        )
+
+    def _on_bursts_found(self, bursts):
+        self.file_manager.set_groups(bursts)
+        if self.file_manager.groups:
+            self._show_group()
+            messagebox.showinfo("Bursts", f"Found {len(self.file_manager.groups)} bursts.")
+        else:
+            messagebox.showinfo("Bursts", "No bursts found.")
+
+    def keep_one_in_group(self):
+        try:
+            deleted = self.file_manager.keep_one_in_group()
+            for deleted_path in deleted:
+                self.reports_manager.record_deletion(deleted_path)
+                self.progress_manager.increment_deleted()
+            if deleted:
+                self._show_group()
+        except Exception as e:
+            logger.error("Error resolving group: %s", e)
+            messagebox.showerror("Error", f"Failed to delete the rest of the group: {e}")
+
+    def show_next_group(self):
+        try:
+            self.file_manager.next_group()
+            self._show_group()
+        except Exception as e:
+            logger.error("Error showing next group: %s", e)
+            messagebox.showerror("Error", f"Failed to show next group: {e}")
+
+    def show_previous_group(self):
+        try:
+            self.file_manager.previous_group()
+            self._show_group()
+        except Exception as e:
+            logger.error("Error showing previous group: %s", e)
+            messagebox.showerror("Error", f"Failed to show previous group: {e}")
+
+    def _show_group(self):
+        group = self.file_manager.get_current_group()
+        if group:
+            self.root.title(
+                f"Photo Manager - group {self.file_manager.group_index + 1}/{len(self.file_manager.groups)} "
+                f"({len(group)} photos)"
+            )
+        else:
+            self.root.title("Photo Manager")
+        self.show_image()
+
+    def sort_worst_first(self):
+        if not self.file_manager.images:
+            messagebox.showinfo("Worst First", "Load a folder first.")
+            return
+        if self.quality_scorer is None:
+            from quality_scorer import QualityScorer
+            self.quality_scorer = QualityScorer()
+        paths = list(self.file_manager.images)
+        self._run_in_background(
+            "scoring photo quality",
+            lambda: self.quality_scorer.worst_first(paths),
+            self._on_worst_first
+        )
+
+    def _on_worst_first(self, ordered_paths):
+        self.file_manager.set_order(ordered_paths)
+        self.show_image()
+
+    def sort_by_filename(self):
         try:
-            self.file_manager.previous_image()
+            self.file_manager.sort_images()
             self.show_image()
         except Exception as e:
-            logger.error(f"Error showing previous image: {e}")
-            messagebox.showerror("Error", f"Failed to show previous image: {e}")
+            logger.error("Error sorting images: %s", e)
+            messagebox.showerror("Error", f"Failed to sort images: {e}")
+
+    def sort_by_metadata(self, field):
+        def on_ready(metadata):
+            self.file_manager.sort_by_metadata(metadata, field)
+            self.show_image()
+
+        self._with_metadata("Sort", on_ready)
+
+    def filter_by_camera(self):
+        camera = simpledialog.askstring("Filter", "Show photos from cameras named like:", parent=self.root)
+        if camera and camera.strip():
+            self._apply_filter(camera=camera.strip())
+
+    def filter_by_date(self):
+        value = simpledialog.askstring(
+            "Filter", "Capture dates as YYYY-MM-DD..YYYY-MM-DD (either end may be left out):", parent=self.root
+        )
+        if value:
+            date_from, _, date_to = value.partition("..")
+            self._apply_filter(date_from=date_from.strip() or None, date_to=date_to.strip() or None)
+
+    def filter_by_size(self):
+        value = simpledialog.askstring("Filter", "Minimum size as WIDTHxHEIGHT:", parent=self.root)
+        if not value:
+            return
+        try:
+            min_width, min_height = (int(part) for part in value.lower().split("x"))
+        except ValueError:
+            messagebox.showerror("Filter", f"Not a size: {value}")
+            return
+        self._apply_filter(min_width=min_width, min_height=min_height)
+
+    def clear_filter(self):
+        self.file_manager.clear_filter()
+        self.root.title("Photo Manager")
+        self.show_image()
+
+    def _apply_filter(self, **conditions):
+        def on_ready(metadata):
+            shown = self.file_manager.filter_images(metadata, **conditions)
+            if not shown:
+                self.file_manager.clear_filter()
+                messagebox.showinfo("Filter", "No photos match.")
+                return
+            self.root.title(f"Photo Manager - filtered ({shown} photos)")
+            self.show_image()
+
+        self._with_metadata("Filter", on_ready)
+
+    def _with_metadata(self, label, on_ready):
+        """Look up (or read, for new files) header metadata off the UI thread, then call on_ready(metadata)."""
+        if not self.file_manager.images:
+            messagebox.showinfo(label, "Load a folder first.")
+            return
+        if self.metadata_index is None:
+            from metadata_index import MetadataIndex
+            self.metadata_index = MetadataIndex()
+        paths = self.file_manager.all_images()
+        self._run_in_background("reading photo metadata", lambda: self.metadata_index.read_all(paths), on_ready)
+
+    def _run_in_background(self, label, work, on_done):
+        """Run work() off the UI thread and hand its result to on_done() on the UI thread."""
+        self.root.title(f"Photo Manager - {label}...")
+        future = self._background.submit(work)
+        self.root.after(BACKGROUND_POLL_MS, self._poll_background, future, on_done)
+
+    def _poll_background(self, future, on_done):
+        if not future.done():
+            self.root.after(BACKGROUND_POLL_MS, self._poll_background, future, on_done)
+            return
+        self.root.title("Photo Manager")
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error("Background task failed: %s", e)
+            messagebox.showerror("Error", f"Background task failed: {e}")
+            return
+        on_done(result)
 
     def pause(self):
+        self.progress_manager.pause()
         logger.info("Paused")
         messagebox.showinfo("Paused", "Processing paused.")
 
     def resume(self):
+        self.progress_manager.resume()
         logger.info("Resumed")
         messagebox.showinfo("Resumed", "Processing resumed.")
 
@@ -142,7 +799,7 @@ class PhotoManagerUI:
                 self.show_image()
                 logger.info("Session restarted from the beginning.")
             except Exception as e:
-                logger.error(f"Error starting over: {e}")
+                logger.error("Error starting over: %s", e)
                 messagebox.showerror("Error", f"Failed to start over: {e}")
 
     def generate_report(self):
@@ -150,12 +807,101 @@ class PhotoManagerUI:
             self.reports_manager.generate_report()
             messagebox.showinfo("Report", "Report generated successfully.")
         except Exception as e:
-            logger.error(f"Error generating report: {e}")
+            logger.error("Error generating report: %s", e)
             messagebox.showerror("Error", f"Failed to generate report: {e}")
 
+    def export_photos(self):
+        """Copy every loaded photo, so none of the deleted ones, to a backup folder."""
+        if not self.file_manager.images:
+            messagebox.showinfo("Export", "Load a folder first.")
+            return
+        if self._export is not None and not self._export.done():
+            messagebox.showinfo("Export", "An export is already running.")
+            return
+        destination = filedialog.askdirectory(title="Export kept photos to")
+        if not destination:
+            return
+        groups = self.file_manager.images_by_folder()
+
+        def work():
+            summaries = []
+            for folder, paths in groups.items():
+                # Each loaded folder gets its own subfolder when there are several.
+                target = destination
+                if len(groups) > 1:
+                    target = os.path.join(destination, os.path.basename(os.path.normpath(folder)))
+                summaries.append(self.exporter.export(folder, target, paths))
+                if summaries[-1]["stopped"]:
+                    break
+            return summaries
+
+        self.root.title("Photo Manager - exporting...")
+        self._export = self._export_runner.submit(work)
+        self.root.after(BACKGROUND_POLL_MS, self._poll_export)
+
+    def _poll_export(self):
+        """
+        Show the export's progress in the title bar, then its outcome.
+
+        The progress is handed to the progress manager here, on the UI
+        thread, rather than by the export workers.
+        """
+        export = self.exporter.progress()
+        if export:
+            self.progress_manager.update_export(export)
+        if not self._export.done():
+            if export:
+                self.root.title(f"Photo Manager - exporting {describe_export(export)}")
+            self.root.after(BACKGROUND_POLL_MS, self._poll_export)
+            return
+        self.root.title("Photo Manager")
+        try:
+            summaries = self._export.result()
+        except Exception as e:
+            logger.error("Export failed: %s", e)
+            messagebox.showerror("Error", f"Export failed: {e}")
+            return
+        copied = sum(summary["copied"] for summary in summaries)
+        skipped = sum(summary["skipped"] for summary in summaries)
+        failed = sum(summary["failed"] for summary in summaries)
+        message = f"Copied {copied} photos; {skipped} were already backed up."
+        if failed:
+            messagebox.showwarning("Export", f"{message} {failed} could not be copied, see the log.")
+        else:
+            messagebox.showinfo("Export", message)
+
+    def toggle_metrics(self):
+        metrics.enable(self.collect_metrics.get())
+
+    def save_metrics(self, show_message=True):
+        path = os.path.join(METRICS_FOLDER, f"metrics_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.json")
+        saved = metrics.dump(path)
+        if show_message:
+            if saved:
+                messagebox.showinfo("Metrics", f"Metrics saved to {saved}.")
+            else:
+                messagebox.showerror("Error", "Failed to save metrics.")
+
+    def _shutdown(self):
+        """Save metrics, apply outstanding deletes and stop every background worker before the window goes."""
+        if metrics.enabled:
+            self.save_metrics(show_message=False)
+        self.file_manager.close()
+        self.prefetcher.shutdown()
+        self.navigation.shutdown()
+        self.exporter.stop()
+        self._export_runner.shutdown(wait=False, cancel_futures=True)
+        if self.thumbnails is not None:
+            self.thumbnails.shutdown()
+        if self.pyramid is not None:
+            self.pyramid.shutdown()
+        self._background.shutdown(wait=False, cancel_futures=True)
+        self._watcher.shutdown(wait=False, cancel_futures=True)
+
     def exit_application(self):
         if messagebox.askokcancel("Exit", "Do you really want to quit?"):
             logger.info("Application exited by user.")
+            self._shutdown()
             self.root.quit()
 
     def on_close(self):
@@ -164,5 +910,6 @@ class PhotoManagerUI:
             try:
                 self.reports_manager.generate_report()
             except Exception as e:
-                logger.error(f"Error generating final report on close: {e}")
+                logger.error("Error generating final report on close: %s", e)
+            self._shutdown()
             self.root.destroy()
\ No newline at end of file
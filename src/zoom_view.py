@@ -0,0 +1,534 @@
+# Copyright (c) 2025 Ketan Kolge
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import threading
+import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
+from PIL import Image, ImageTk
+from image_processor import decoded_nbytes, open_header
+from logger import get_logger
+from metrics import metrics
+from prefetcher import ImageCache
+
+logger = get_logger(__name__)
+
+# Pyramid level n shows the image at 1/2**n scale and is cut into square
+# tiles of this size; level 0 is 100%.
+TILE_SIZE = 256
+
+# Tile decode threads, and the memory budgets of decoded levels and of cut tiles.
+ZOOM_WORKERS = 2
+LEVEL_CACHE_MB = 384
+TILE_CACHE_MB = 64
+
+# How often to paint tiles that finished decoding.
+TILE_POLL_MS = 15
+
+# Pixels panned per arrow key press, and extra tile rows/columns cut ahead
+# of the viewport in the direction of the last pan.
+PAN_STEP = TILE_SIZE // 2
+PREFETCH_TILES = 1
+
+TILE_BACKGROUND = (0, 0, 0)
+
+
+def level_size(width, height, level):
+    """Size of an image at a pyramid level, rounded up like JPEG reduced-scale decoding."""
+    scale = 1 << level
+    return -(-width // scale), -(-height // scale)
+
+
+def level_count(width, height, view_width, view_height):
+    """Number of levels, from 100% down to the first one that fits the view."""
+    level = 0
+    while True:
+        level_width, level_height = level_size(width, height, level)
+        if level_width <= view_width and level_height <= view_height:
+            return level + 1
+        level += 1
+
+
+def clamp_origin(origin, extent, view):
+    """Keep the view inside the image along one axis, or centre the image when it is smaller."""
+    if extent <= view:
+        return -((view - extent) // 2)
+    return min(max(0, origin), extent - view)
+
+
+def tile_range(left, top, view_width, view_height, level_width, level_height):
+    """Return (first_column, first_row, last_column, last_row), last exclusive, of the tiles in view."""
+    columns = -(-level_width // TILE_SIZE)
+    rows = -(-level_height // TILE_SIZE)
+    return (
+        max(0, left // TILE_SIZE),
+        max(0, top // TILE_SIZE),
+        min(columns, (left + view_width - 1) // TILE_SIZE + 1),
+        min(rows, (top + view_height - 1) // TILE_SIZE + 1),
+    )
+
+
+def extend_range(tiles, dx, dy, level_width, level_height, extra=PREFETCH_TILES):
+    """Grow a tile range by extra tiles on the sides the view is moving towards."""
+    first_column, first_row, last_column, last_row = tiles
+    columns = -(-level_width // TILE_SIZE)
+    rows = -(-level_height // TILE_SIZE)
+    if dx > 0:
+        last_column = min(columns, last_column + extra)
+    elif dx < 0:
+        first_column = max(0, first_column - extra)
+    if dy > 0:
+        last_row = min(rows, last_row + extra)
+    elif dy < 0:
+        first_row = max(0, first_row - extra)
+    return first_column, first_row, last_column, last_row
+
+
+def zoom_origin(origin, point, old_level, new_level):
+    """Origin along one axis that keeps the image pixel under point fixed across a level change."""
+    position = (origin + point) * (1 << old_level) / (1 << new_level)
+    return int(round(position - point))
+
+
+class ZoomSource:
+    __slots__ = ("path", "stamp", "width", "height", "is_jpeg", "failed")
+
+    def __init__(self, path, stamp, width, height, is_jpeg):
+        self.path = path
+        self.stamp = stamp
+        self.width = width
+        self.height = height
+        self.is_jpeg = is_jpeg
+        self.failed = set()
+
+
+class TilePyramid:
+    def __init__(self, memory_budget, decode_budget, workers=ZOOM_WORKERS,
+                 level_cache_bytes=LEVEL_CACHE_MB * 1024 * 1024, tile_cache_bytes=TILE_CACHE_MB * 1024 * 1024):
+        """
+        Decode pyramid levels and cut them into tiles on demand.
+
+        A level is decoded once, at the reduced JPEG scale closest to it, the
+        first time one of its tiles is asked for; tiles are cut from it as the
+        view reaches them. Levels and tiles live in separate byte-bounded LRU
+        caches, so moving back over a region or between burst shots reuses
+        them. Decodes reserve their size from the image processor's
+        MemoryBudget and respect its per-decode budget.
+
+        Args:
+            memory_budget (MemoryBudget): Shared cap on decodes in flight.
+            decode_budget (int): Largest single decode, in bytes.
+        """
+        self.memory_budget = memory_budget
+        self.decode_budget = decode_budget
+        self.levels = ImageCache(level_cache_bytes)
+        self.tiles = ImageCache(tile_cache_bytes)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zoom")
+        self._pending = {}
+        self._decoding = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def open(path):
+        """Read an image's header. Returns a ZoomSource, or None if the file cannot be opened."""
+        try:
+            stamp = os.stat(path).st_mtime_ns
+            with open_header(path) as img:
+                return ZoomSource(path, stamp, img.width, img.height, img.format == "JPEG")
+        except Exception as e:
+            logger.error("Failed to open '%s' for zoom: %s", path, e)
+            return None
+
+    def get_tile(self, source, level, column, row):
+        """Return a cut tile from the cache, or None."""
+        return self.tiles.get((source.path, source.stamp, level, column, row))
+
+    def fallback_tile(self, source, level, column, row, below=None):
+        """
+        Stand-in for a tile that is not ready: the same region of the nearest
+        coarser level already decoded, scaled up.
+
+        Args:
+            below (int): Only consider levels finer than this one, e.g. the
+                level of the stand-in already shown.
+
+        Returns:
+            tuple: (tile, level it came from), or (None, None) if no coarser level is decoded.
+        """
+        if below is None:
+            below = level_count(source.width, source.height, 1, 1)
+        for coarser in range(level + 1, below):
+            key = (source.path, source.stamp, coarser)
+            img = self.levels.get(key) if key in self.levels else None
+            if img is None:
+                continue
+            scale = 1 << (coarser - level)
+            x0 = column * TILE_SIZE / scale
+            y0 = row * TILE_SIZE / scale
+            x1 = min(x0 + TILE_SIZE / scale, img.width)
+            y1 = min(y0 + TILE_SIZE / scale, img.height)
+            if x1 <= x0 or y1 <= y0:
+                break
+            size = (max(1, round((x1 - x0) * scale)), max(1, round((y1 - y0) * scale)))
+            return self._pad(img.resize(size, Image.BILINEAR, box=(x0, y0, x1, y1))), coarser
+        return None, None
+
+    def request(self, source, level, column, row):
+        """Schedule cutting a tile (decoding its level first if needed). Returns a Future of the tile or None."""
+        key = (source.path, source.stamp, level, column, row)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None or future.cancelled():
+                future = self._executor.submit(self._cut_tile, source, level, column, row)
+                self._pending[key] = future
+        return future
+
+    def request_level(self, source, level):
+        """Schedule decoding a whole level, e.g. the coarsest one as a stand-in for the others."""
+        return self._executor.submit(self._level, source, level)
+
+    def retain(self, keys):
+        """Cancel queued tiles not in keys, given as (path, stamp, level, column, row)."""
+        with self._lock:
+            for key, future in list(self._pending.items()):
+                if key not in keys and future.cancel():
+                    del self._pending[key]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.levels.clear()
+        self.tiles.clear()
+
+    def _cut_tile(self, source, level, column, row):
+        key = (source.path, source.stamp, level, column, row)
+        try:
+            img = self._level(source, level)
+            if img is None:
+                return None
+            with metrics.timer("tile_cut"):
+                box = (
+                    column * TILE_SIZE,
+                    row * TILE_SIZE,
+                    min((column + 1) * TILE_SIZE, img.width),
+                    min((row + 1) * TILE_SIZE, img.height),
+                )
+                tile = self._pad(img.crop(box))
+            self.tiles.put(key, tile)
+            return tile
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _level(self, source, level):
+        """Return a decoded level, decoding it on this thread unless another thread already is."""
+        key = (source.path, source.stamp, level)
+        img = self.levels.get(key)
+        if img is not None or level in source.failed:
+            return img
+
+        with self._lock:
+            future = self._decoding.get(key)
+            owner = future is None
+            if owner:
+                future = self._decoding[key] = Future()
+        if not owner:
+            # The decoding thread is already running, so waiting cannot starve the pool.
+            return future.result()
+
+        img = None
+        try:
+            img = self._decode_level(source, level)
+        except Exception as e:
+            logger.error("Failed to decode '%s' at zoom level %s: %s", source.path, level, e)
+        finally:
+            if img is None:
+                source.failed.add(level)
+            else:
+                self.levels.put(key, img)
+            with self._lock:
+                del self._decoding[key]
+            future.set_result(img)
+        return img
+
+    def _decode_level(self, source, level):
+        width, height = level_size(source.width, source.height, level)
+        if not source.is_jpeg and level > 0:
+            # Only JPEG decodes at a reduced scale; other formats are reduced from 100%.
+            base = self._level(source, 0)
+            return base.reduce(1 << level) if base is not None else None
+
+        with open_header(source.path) as img:
+            if source.is_jpeg:
+                img.draft(None, (width, height))
+            nbytes = decoded_nbytes(img)
+            if nbytes > self.decode_budget:
+                logger.warning(
+                    "Zoom level %d of '%s' needs %.0f MB, over the %.0f MB decode budget.",
+                    level, source.path, nbytes / (1024 * 1024), self.decode_budget / (1024 * 1024)
+                )
+                return None
+            if not self.memory_budget.acquire(nbytes):
+                logger.warning("Zoom level %d of '%s' refused: decode memory is in use.", level, source.path)
+                return None
+            try:
+                with metrics.timer("zoom_decode"):
+                    img.load()
+            finally:
+                self.memory_budget.release(nbytes)
+            factor = round(img.width / width)
+            result = img.reduce(factor) if factor > 1 else img
+        if result.mode != "RGB":
+            result = result.convert("RGB")
+        logger.debug("Decoded zoom level %d of '%s' at %s.", level, source.path, result.size)
+        return result
+
+    @staticmethod
+    def _pad(tile):
+        if tile.size == (TILE_SIZE, TILE_SIZE):
+            return tile
+        square = Image.new("RGB", (TILE_SIZE, TILE_SIZE), TILE_BACKGROUND)
+        square.paste(tile, (0, 0))
+        return square
+
+
+class _Tile:
+    __slots__ = ("photo", "item", "key", "shown_level")
+
+    def __init__(self, canvas, placeholder):
+        self.photo = ImageTk.PhotoImage(placeholder)
+        self.item = canvas.create_image(0, 0, anchor="nw", image=self.photo)
+        self.key = None
+        # Level the painted pixels came from; None for the placeholder.
+        self.shown_level = None
+
+
+class ZoomView:
+    def __init__(self, parent, pyramid, on_close=None):
+        """
+        Zoom and pan over one image, down to 100%, one screen of tiles at a time.
+
+        Only the tiles overlapping the viewport are cut and turned into Tk
+        images; tiles leaving it are recycled, PhotoImage and canvas item
+        included, like the grid view's. Missing tiles show the nearest
+        coarser level scaled up until they are ready.
+
+        Args:
+            parent (tk.Widget): Container for the view frame.
+            pyramid (TilePyramid): Decodes levels and cuts tiles.
+            on_close (callable): Called on Escape.
+        """
+        self.pyramid = pyramid
+        self.on_close = on_close
+        self.source = None
+        self.level = 0
+        self.levels = 1
+        self.left = 0
+        self.top = 0
+        self._direction = (0, 0)
+        self._drag = None
+        self._tiles = {}
+        self._free = []
+        self._futures = {}
+        self._polling = False
+        self._placeholder = Image.new("RGB", (TILE_SIZE, TILE_SIZE), TILE_BACKGROUND)
+
+        self.frame = tk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, bg="black", highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<Configure>", lambda event: self._layout())
+        self.canvas.bind("<ButtonPress-1>", self._start_drag)
+        self.canvas.bind("<B1-Motion>", self._on_drag)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.zoom_at(self.level - 1, event.x, event.y))
+        self.canvas.bind("<Button-5>", lambda event: self.zoom_at(self.level + 1, event.x, event.y))
+        self.canvas.bind("<Left>", lambda event: self.pan_by(-PAN_STEP, 0))
+        self.canvas.bind("<Right>", lambda event: self.pan_by(PAN_STEP, 0))
+        self.canvas.bind("<Up>", lambda event: self.pan_by(0, -PAN_STEP))
+        self.canvas.bind("<Down>", lambda event: self.pan_by(0, PAN_STEP))
+        self.canvas.bind("<plus>", lambda event: self.zoom_at(self.level - 1))
+        self.canvas.bind("<equal>", lambda event: self.zoom_at(self.level - 1))
+        self.canvas.bind("<minus>", lambda event: self.zoom_at(self.level + 1))
+        self.canvas.bind("<Escape>", lambda event: self.on_close and self.on_close())
+
+    def open(self, path, level=0, center=(0.5, 0.5)):
+        """
+        Show an image at a pyramid level, centred on a point given as fractions of its width and height.
+
+        Returns:
+            bool: False if the image could not be opened.
+        """
+        source = self.pyramid.open(path)
+        if source is None:
+            return False
+        self.source = source
+        self.levels = level_count(source.width, source.height, *self._view_size())
+        self.level = min(max(0, level), self.levels - 1)
+        width, height = level_size(source.width, source.height, self.level)
+        view_width, view_height = self._view_size()
+        self.left = int(center[0] * width) - view_width // 2
+        self.top = int(center[1] * height) - view_height // 2
+        self._direction = (0, 0)
+        # The coarsest level is cheap to decode and stands in for every tile meanwhile.
+        self.pyramid.request_level(source, self.levels - 1)
+        self._layout()
+        return True
+
+    def relative_center(self):
+        """The point in the middle of the view, as fractions of the image's width and height."""
+        if self.source is None:
+            return 0.5, 0.5
+        width, height = level_size(self.source.width, self.source.height, self.level)
+        view_width, view_height = self._view_size()
+        return (
+            min(max(0.0, (self.left + view_width / 2) / width), 1.0),
+            min(max(0.0, (self.top + view_height / 2) / height), 1.0),
+        )
+
+    def zoom_at(self, level, x=None, y=None):
+        """Change level keeping the image point under view position (x, y), the centre by default, in place."""
+        if self.source is None:
+            return
+        level = min(max(0, level), self.levels - 1)
+        if level == self.level:
+            return
+        view_width, view_height = self._view_size()
+        x = view_width // 2 if x is None else x
+        y = view_height // 2 if y is None else y
+        self.left = zoom_origin(self.left, x, self.level, level)
+        self.top = zoom_origin(self.top, y, self.level, level)
+        self.level = level
+        self._direction = (0, 0)
+        self._layout()
+
+    def pan_by(self, dx, dy):
+        self.left += dx
+        self.top += dy
+        self._direction = (dx, dy)
+        self._layout()
+
+    def _view_size(self):
+        return max(1, self.canvas.winfo_width()), max(1, self.canvas.winfo_height())
+
+    def _start_drag(self, event):
+        self.canvas.focus_set()
+        self._drag = (event.x, event.y)
+
+    def _on_drag(self, event):
+        if self._drag is not None:
+            self.pan_by(self._drag[0] - event.x, self._drag[1] - event.y)
+            self._drag = (event.x, event.y)
+
+    def _on_wheel(self, event):
+        self.zoom_at(self.level + (1 if event.delta < 0 else -1), event.x, event.y)
+
+    def _layout(self):
+        """Place, recycle and request the tiles for the current level and position."""
+        source = self.source
+        if source is None:
+            return
+        view_width, view_height = self._view_size()
+        self.levels = level_count(source.width, source.height, view_width, view_height)
+        self.level = min(self.level, self.levels - 1)
+        width, height = level_size(source.width, source.height, self.level)
+        self.left = clamp_origin(self.left, width, view_width)
+        self.top = clamp_origin(self.top, height, view_height)
+
+        first_column, first_row, last_column, last_row = tile_range(
+            self.left, self.top, view_width, view_height, width, height
+        )
+        visible = {
+            (source.path, source.stamp, self.level, column, row)
+            for row in range(first_row, last_row)
+            for column in range(first_column, last_column)
+        }
+
+        for key in [key for key in self._tiles if key not in visible]:
+            tile = self._tiles.pop(key)
+            self.canvas.itemconfigure(tile.item, state="hidden")
+            self._free.append(tile)
+
+        for key in visible:
+            tile = self._tiles.get(key)
+            if tile is None:
+                tile = self._free.pop() if self._free else _Tile(self.canvas, self._placeholder)
+                self._tiles[key] = tile
+                tile.key = key
+                img = self.pyramid.get_tile(source, *key[2:])
+                if img is None:
+                    self._futures[key] = self.pyramid.request(source, *key[2:])
+                    self._paint(tile, *self.pyramid.fallback_tile(source, *key[2:]))
+                else:
+                    self._paint(tile, img, self.level)
+            self.canvas.coords(tile.item, key[3] * TILE_SIZE - self.left, key[4] * TILE_SIZE - self.top)
+            self.canvas.itemconfigure(tile.item, state="normal")
+
+        # Cut the tiles just beyond the view on the side it is moving towards.
+        ahead = set()
+        if self._direction != (0, 0):
+            first_column, first_row, last_column, last_row = extend_range(
+                (first_column, first_row, last_column, last_row), *self._direction, width, height
+            )
+            for row in range(first_row, last_row):
+                for column in range(first_column, last_column):
+                    key = (source.path, source.stamp, self.level, column, row)
+                    if key not in visible and self.pyramid.get_tile(source, self.level, column, row) is None:
+                        ahead.add(key)
+        self.pyramid.retain(visible | ahead)
+        for key in ahead:
+            self.pyramid.request(source, *key[2:])
+
+        if self._futures and not self._polling:
+            self._polling = True
+            self.canvas.after(TILE_POLL_MS, self._poll_tiles)
+
+    def _paint(self, tile, img, level):
+        tile.photo.paste(img if img is not None else self._placeholder)
+        tile.shown_level = level
+
+    def _poll_tiles(self):
+        for key, future in list(self._futures.items()):
+            tile = self._tiles.get(key)
+            if tile is None:
+                del self._futures[key]
+                continue
+            if not future.done():
+                continue
+            del self._futures[key]
+            if future.cancelled():
+                continue
+            try:
+                img = future.result()
+                if img is not None:
+                    self._paint(tile, img, key[2])
+            except Exception as e:
+                logger.error("Failed to cut zoom tile %s of '%s': %s", key[2:], key[0], e)
+
+        # Tiles still waiting get a sharper stand-in once a finer level is decoded.
+        for key in self._futures:
+            tile = self._tiles[key]
+            img, level = self.pyramid.fallback_tile(self.source, *key[2:], below=tile.shown_level)
+            if img is not None:
+                self._paint(tile, img, level)
+
+        if self._futures:
+            self.canvas.after(TILE_POLL_MS, self._poll_tiles)
+        else:
+            self._polling = False
@@ -0,0 +1,113 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import pytest
+from PIL import Image, ImageDraw
+
+from src.cli import is_screenshot_shape, main
+
+
+@pytest.fixture
+def photo_tree():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        nested = os.path.join(temp_dir, "2024")
+        os.makedirs(nested)
+        paths = {
+            "tiny": os.path.join(temp_dir, "tiny.jpg"),
+            "photo": os.path.join(nested, "photo.jpg"),
+            "screenshot": os.path.join(nested, "screen.png"),
+        }
+        Image.new('RGB', (100, 80), color='red').save(paths["tiny"])
+        photo = Image.new('RGB', (800, 600), color='white')
+        ImageDraw.Draw(photo).rectangle((100, 100, 400, 400), fill='black')
+        photo.save(paths["photo"])
+        Image.new('RGB', (1080, 2340), color='blue').save(paths["screenshot"])
+        yield temp_dir, paths
+
+
+def read_report(report_folder):
+    report_file = os.path.join(report_folder, os.listdir(report_folder)[0])
+    with open(report_file, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_screenshot_shape():
+    assert is_screenshot_shape(1080, 2340)
+    assert is_screenshot_shape(1920, 1080)
+    assert not is_screenshot_shape(4000, 3000)
+
+
+def test_dry_run_reports_without_moving(photo_tree):
+    temp_dir, paths = photo_tree
+    report_folder = os.path.join(temp_dir, "reports")
+
+    code = main([temp_dir, "--min-width", "640", "--screenshots", "--workers", "2",
+                 "--report-folder", report_folder, "--dry-run"])
+
+    report = read_report(report_folder)
+    assert code == 0
+    assert f"Would Delete,{paths['tiny']},too small (100x80)" in report
+    assert paths["screenshot"] in report
+    assert paths["photo"] not in report
+    assert all(os.path.exists(path) for path in paths.values())
+
+
+def test_apply_moves_flagged_images(photo_tree):
+    temp_dir, paths = photo_tree
+    report_folder = os.path.join(temp_dir, "reports")
+
+    main([temp_dir, "--min-width", "640", "--workers", "2", "--report-folder", report_folder])
+
+    assert not os.path.exists(paths["tiny"])
+    assert os.path.exists(os.path.join(temp_dir, "deleted", "tiny.jpg"))
+    assert os.path.exists(paths["photo"])
+
+
+def test_failed_move_is_reported_once_and_fails_the_run(photo_tree, monkeypatch):
+    temp_dir, paths = photo_tree
+    report_folder = os.path.join(temp_dir, "reports")
+    delete_queue = sys.modules["delete_queue"]
+    move_file = delete_queue.move_file
+
+    def failing_move(source, destination):
+        if source == paths["tiny"]:
+            raise OSError("disk full")
+        move_file(source, destination)
+
+    monkeypatch.setattr(delete_queue, "move_file", failing_move)
+    code = main([temp_dir, "--min-width", "640", "--screenshots", "--workers", "2",
+                 "--report-folder", report_folder])
+
+    report = read_report(report_folder)
+    assert code == 1
+    assert f"Delete Failed,{paths['tiny']},disk full" in report
+    assert f"Delete,{paths['tiny']}" not in report
+    assert f"Delete,{paths['screenshot']}" in report
+    assert os.path.exists(paths["tiny"])
+
+
+def test_export_copies_only_kept_images(photo_tree):
+    temp_dir, paths = photo_tree
+    backup = os.path.join(os.path.dirname(temp_dir), os.path.basename(temp_dir) + "_backup")
+    try:
+        code = main([temp_dir, "--min-width", "640", "--workers", "2", "--export", backup,
+                     "--report-folder", os.path.join(temp_dir, "reports")])
+        assert code == 0
+        assert os.path.exists(os.path.join(backup, "2024", "photo.jpg"))
+        assert os.path.exists(os.path.join(backup, "2024", "screen.png"))
+        assert not os.path.exists(os.path.join(backup, "tiny.jpg"))
+        assert not os.path.exists(os.path.join(backup, "deleted"))
+    finally:
+        shutil.rmtree(backup, ignore_errors=True)
+
+
+def test_cli_does_not_import_tkinter():
+    src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, cli; print('tkinter' in sys.modules)"],
+        cwd=tempfile.gettempdir(), env={**os.environ, "PYTHONPATH": os.path.abspath(src_dir)},
+        capture_output=True, text=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == "False"
@@ -0,0 +1,70 @@
+import threading
+
+from src.decode_scheduler import DecodeScheduler
+
+
+class BlockingDecoder:
+    """Decodes paths to themselves, each one waiting until released."""
+
+    def __init__(self):
+        self.started = []
+        self.running = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, path):
+        self.started.append(path)
+        self.running.set()
+        self.release.wait(5)
+        return path
+
+
+def test_latest_target_wins():
+    decoder = BlockingDecoder()
+    scheduler = DecodeScheduler(decoder)
+    scheduler.set_target("a.jpg")
+    running = scheduler.decode_target()
+    assert decoder.running.wait(5)
+    # Key repeat: b and c are passed over while a is still decoding.
+    waiting = []
+    for path in ("b.jpg", "c.jpg", "d.jpg"):
+        scheduler.set_target(path)
+        waiting.append(scheduler.decode_target())
+    decoder.release.set()
+
+    assert running.result(5) == "a.jpg"
+    assert waiting[-1].result(5) == "d.jpg"
+    assert all(future.cancelled() for future in waiting[:-1])
+    assert decoder.started == ["a.jpg", "d.jpg"]
+    assert scheduler.superseded == 2
+    scheduler.shutdown()
+
+
+def test_same_target_reuses_its_decode():
+    decoder = BlockingDecoder()
+    scheduler = DecodeScheduler(decoder)
+    scheduler.set_target("a.jpg")
+    first = scheduler.decode_target()
+    assert decoder.running.wait(5)
+    scheduler.set_target("b.jpg")
+    scheduler.set_target("a.jpg")
+    assert scheduler.decode_target() is first
+    decoder.release.set()
+    assert first.result(5) == "a.jpg"
+    scheduler.shutdown()
+
+
+def test_latency_runs_from_each_press_to_its_paint():
+    now = [10.0]
+    scheduler = DecodeScheduler(lambda path: path, clock=lambda: now[0])
+    for path in ("a.jpg", "b.jpg", "c.jpg"):
+        scheduler.set_target(path)
+        now[0] += 0.05
+    # b finished decoding first; a was passed over and is no longer worth painting.
+    now[0] = 10.3
+    assert round(scheduler.painted("b.jpg")) == 250
+    assert not scheduler.wanted("a.jpg") and scheduler.painted("a.jpg") is None
+    assert scheduler.wanted("c.jpg")
+    now[0] = 10.35
+    assert round(scheduler.painted("c.jpg")) == 250
+    assert scheduler.painted("c.jpg") is None
+    scheduler.shutdown()
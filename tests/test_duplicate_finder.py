@@ -0,0 +1,115 @@
+import os
+import tempfile
+import pytest
+from PIL import Image, ImageDraw
+
+from src.duplicate_finder import BKTree, DuplicateFinder, dhash, hamming, hash_file, phash
+from src.file_index import FileIndex, update_index_paths
+from src.file_manager import FileManager
+
+
+def make_scene(seed):
+    img = Image.new('RGB', (640, 480), color=(seed * 30 % 255, 80, 160))
+    draw = ImageDraw.Draw(img)
+    for i in range(6):
+        x = (seed * 97 + i * 131) % 560
+        y = (seed * 53 + i * 71) % 400
+        draw.ellipse((x, y, x + 80, y + 80), fill=((i * 40) % 255, 255 - i * 30, seed * 20 % 255))
+    return img
+
+
+@pytest.fixture
+def photo_folder():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = {}
+        for seed in range(3):
+            scene = make_scene(seed)
+            paths[f"scene_{seed}"] = os.path.join(temp_dir, f"scene_{seed}.jpg")
+            scene.save(paths[f"scene_{seed}"], quality=90)
+        # A recompressed, slightly resized copy of scene_0.
+        paths["copy"] = os.path.join(temp_dir, "scene_0_copy.jpg")
+        make_scene(0).resize((600, 450)).save(paths["copy"], quality=60)
+        yield temp_dir, paths
+
+
+def test_hashes_are_stable_under_resize():
+    scene = make_scene(1).convert('L')
+    smaller = scene.resize((320, 240))
+
+    assert hamming(dhash(scene), dhash(smaller)) <= 4
+    assert hamming(phash(scene), phash(smaller)) <= 4
+
+
+def test_bktree_range_search():
+    tree = BKTree()
+    for value in (0b0000, 0b0001, 0b0111, 0b1111):
+        tree.add(value, value)
+
+    found = sorted(item for _, item in tree.search(0b0000, 1))
+    assert found == [0b0000, 0b0001]
+
+
+def test_find_groups_and_reuse_index(photo_folder):
+    temp_dir, paths = photo_folder
+    index = FileIndex(os.path.join(temp_dir, "index.db"), table="image_hashes")
+    finder = DuplicateFinder(index=index, workers=2)
+
+    groups = finder.find_groups(list(paths.values()))
+    assert groups == [sorted([paths["scene_0"], paths["copy"]])]
+
+    found, missing = index.lookup(list(paths.values()))
+    assert len(found) == 4 and missing == []
+    index.close()
+
+
+def test_index_entries_follow_renames(photo_folder):
+    temp_dir, paths = photo_folder
+    db_path = os.path.join(temp_dir, "index.db")
+    index = FileIndex(db_path, table="image_hashes")
+    for path in paths.values():
+        index.put(path, {"name": os.path.basename(path)})
+
+    renamed = os.path.join(temp_dir, "renamed.jpg")
+    os.rename(paths["scene_1"], renamed)
+    os.remove(paths["scene_2"])
+    update_index_paths([(paths["scene_1"], renamed)], [paths["scene_2"]], db_path=db_path)
+
+    assert index.get(renamed) == {"name": "scene_1.jpg"}
+    found, missing = index.lookup([renamed, paths["scene_0"], paths["copy"]])
+    assert len(found) == 3 and missing == []
+    assert index._conn.execute("SELECT COUNT(*) FROM image_hashes").fetchone()[0] == 3
+    index.close()
+
+
+def test_lookup_reads_only_the_requested_paths(photo_folder, monkeypatch):
+    temp_dir, paths = photo_folder
+    index = FileIndex(os.path.join(temp_dir, "index.db"), table="image_hashes")
+    index.put_many((os.path.join(temp_dir, "other", f"{i}.jpg"), 1, 1, {}) for i in range(1200))
+    for path in paths.values():
+        index.put(path, {"name": os.path.basename(path)})
+
+    monkeypatch.setattr("src.file_index.LOOKUP_BATCH", 3)
+    requested = list(paths.values()) + [os.path.join(temp_dir, "new.jpg")]
+    found, missing = index.lookup(requested)
+    assert found == {path: {"name": os.path.basename(path)} for path in paths.values()}
+    assert missing == [os.path.join(temp_dir, "new.jpg")]
+    index.close()
+
+
+def test_hashing_refuses_decodes_over_the_budget(photo_folder):
+    temp_dir, _ = photo_folder
+    path = os.path.join(temp_dir, "large.png")
+    Image.new('RGB', (1000, 1000), color='green').save(path)
+
+    assert hash_file(path, decode_budget=1024 * 1024)[1:] == (None, None, None)
+    assert hash_file(path)[3] is not None
+
+
+def test_file_manager_group_navigation(photo_folder):
+    temp_dir, paths = photo_folder
+    fm = FileManager()
+    fm.load_images(temp_dir)
+    fm.set_groups([[paths["scene_0"], paths["copy"]], [paths["scene_1"], "missing.jpg"]])
+
+    assert len(fm.groups) == 1
+    assert fm.get_current_image() == paths["scene_0"]
@@ -0,0 +1,110 @@
+import errno
+import hashlib
+import json
+import os
+import tempfile
+import pytest
+
+from src import exporter
+from src.exporter import EXPORT_MANIFEST, Exporter, copy_file, describe_export, file_digest
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+@pytest.fixture
+def photo_tree():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "photos")
+        write(os.path.join(source, "a.jpg"), os.urandom(300_000))
+        write(os.path.join(source, "2024", "b.jpg"), os.urandom(5_000))
+        write(os.path.join(source, "2024", "notes.txt"), b"not a photo")
+        write(os.path.join(source, "deleted", "c.jpg"), b"deleted photo")
+        yield source, os.path.join(temp_dir, "backup")
+
+
+def test_exports_kept_photos_and_resumes(photo_tree):
+    source, destination = photo_tree
+    exporter = Exporter(workers=2)
+    assert exporter.progress() is None
+    summary = exporter.export(source, destination)
+
+    assert (summary["copied"], summary["skipped"], summary["failed"]) == (2, 0, 0)
+    assert summary["bytes_copied"] == 305_000
+    for relative in ("a.jpg", os.path.join("2024", "b.jpg")):
+        original, copy = os.path.join(source, relative), os.path.join(destination, relative)
+        assert file_digest(copy) == file_digest(original)
+        assert os.stat(copy).st_mtime_ns == os.stat(original).st_mtime_ns
+    assert not os.path.exists(os.path.join(destination, "deleted"))
+    assert not os.path.exists(os.path.join(destination, "2024", "notes.txt"))
+    with open(os.path.join(destination, EXPORT_MANIFEST)) as f:
+        assert sorted(json.loads(line)["path"] for line in f) == [os.path.join("2024", "b.jpg"), "a.jpg"]
+    final = exporter.progress()
+    assert (final["files_done"], final["files_total"], final["bytes_done"]) == (2, 2, 305_000)
+    assert final["eta_seconds"] == 0.0
+    assert "2/2 photos" in describe_export(final)
+
+    # Only the changed photo is copied again.
+    write(os.path.join(source, "2024", "b.jpg"), b"edited")
+    summary = Exporter().export(source, destination)
+    assert (summary["copied"], summary["skipped"]) == (1, 1)
+    with open(os.path.join(destination, "2024", "b.jpg"), "rb") as f:
+        assert f.read() == b"edited"
+
+
+def test_failed_verification_leaves_nothing_behind(photo_tree, monkeypatch):
+    source, destination = photo_tree
+
+    def corrupt_copy(source_path, destination_path, buffer=None, digest=None):
+        write(destination_path, b"corrupt")
+        return 7
+
+    monkeypatch.setattr(exporter, "copy_file", corrupt_copy)
+    summary = Exporter().export(source, destination, [os.path.join(source, "a.jpg")])
+    assert (summary["copied"], summary["failed"]) == (0, 1)
+    assert os.listdir(destination) == [EXPORT_MANIFEST]
+
+    monkeypatch.undo()
+    assert Exporter().export(source, destination, [os.path.join(source, "a.jpg")])["copied"] == 1
+
+
+def test_copy_falls_back_when_the_kernel_cannot_copy(monkeypatch):
+    def cross_device(src_fd, dst_fd, offset, count):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(exporter, "KERNEL_COPIES", [cross_device])
+    with tempfile.TemporaryDirectory() as temp_dir:
+        original, copy = os.path.join(temp_dir, "a.jpg"), os.path.join(temp_dir, "b.jpg")
+        data = os.urandom(3 * 1000 + 17)
+        write(original, data)
+        assert copy_file(original, copy, bytearray(1000)) == len(data)
+        with open(copy, "rb") as f:
+            assert f.read() == data
+
+
+def test_copy_hashes_the_source_once(monkeypatch):
+    def give_up_after_one_chunk(src_fd, dst_fd, offset, count):
+        if offset:
+            raise OSError(errno.EXDEV, "cross-device")
+        return exporter._copy_file_range(src_fd, dst_fd, offset, 1500)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        original, copy = os.path.join(temp_dir, "a.jpg"), os.path.join(temp_dir, "b.jpg")
+        data = os.urandom(5 * 1000 + 17)
+        write(original, data)
+        kernel_copies = [[], [give_up_after_one_chunk]] if hasattr(os, "copy_file_range") else [[]]
+        for copies in [exporter.KERNEL_COPIES] + kernel_copies:
+            monkeypatch.setattr(exporter, "KERNEL_COPIES", copies)
+            monkeypatch.setattr(exporter, "COPY_CHUNK", 2000)
+            digest = hashlib.blake2b()
+            assert copy_file(original, copy, bytearray(1000), digest) == len(data)
+            assert digest.hexdigest() == hashlib.blake2b(data).hexdigest() == file_digest(copy)
+
+
+def test_refuses_to_export_into_the_source(photo_tree):
+    source, _ = photo_tree
+    with pytest.raises(ValueError):
+        Exporter().export(source, os.path.join(source, "backup"))
@@ -2,10 +2,12 @@ import sys
 import os
 import shutil
 import tempfile
+import time
 import pytest
 
 from src.logger import get_logger
-from src.file_manager import FileManager
+from src import delete_queue
+from src.file_manager import FileManager, scan_images
 
 @pytest.fixture
 def temp_folder_with_images():
@@ -66,6 +68,7 @@ def test_delete_image(temp_folder_with_images):
     
     first_image = fm.get_current_image()
     fm.delete_image()
+    fm.delete_queue.flush()
     
     assert first_image not in fm.images
     assert len(fm.images) == 2
@@ -80,3 +83,182 @@ def test_reset(temp_folder_with_images):
     
     fm.reset()
     assert fm.index == 0
+
+
+def test_scan_images_recursive_skips_deleted_folder(temp_folder_with_images):
+    temp_dir, image_paths = temp_folder_with_images
+    nested = os.path.join(temp_dir, "nested")
+    os.makedirs(os.path.join(temp_dir, "deleted"))
+    os.makedirs(nested)
+    for folder in ("deleted", "nested"):
+        with open(os.path.join(temp_dir, folder, "extra.png"), 'wb') as f:
+            f.write(b"Test image content")
+
+    flat = [path for batch in scan_images(temp_dir) for path in batch]
+    deep = [path for batch in scan_images(temp_dir, recursive=True) for path in batch]
+
+    assert sorted(flat) == image_paths
+    assert sorted(deep) == sorted(image_paths + [os.path.join(nested, "extra.png")])
+
+
+def test_start_scan_streams_then_sorts(temp_folder_with_images):
+    temp_dir, image_paths = temp_folder_with_images
+    fm = FileManager()
+    fm.start_scan(temp_dir)
+
+    deadline = time.time() + 5
+    while fm.poll_scan() and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert not fm.scanning
+    assert fm.images == image_paths
+
+
+def test_delete_name_collision_and_undo(temp_folder_with_images):
+    temp_dir, image_paths = temp_folder_with_images
+    deleted_dir = os.path.join(temp_dir, "deleted")
+    os.makedirs(deleted_dir)
+    with open(os.path.join(deleted_dir, "image_0.jpg"), 'wb') as f:
+        f.write(b"Older deleted image")
+
+    fm = FileManager()
+    fm.load_images(temp_dir)
+    fm.delete_image()
+    fm.delete_queue.flush()
+
+    assert os.path.exists(os.path.join(deleted_dir, "image_0_1.jpg"))
+
+    restored = fm.undo_delete()
+    assert restored == image_paths[0]
+    assert os.path.exists(image_paths[0])
+    assert fm.get_current_image() == image_paths[0]
+    assert fm.images == image_paths
+
+
+def test_undo_pending_delete(temp_folder_with_images):
+    temp_dir, image_paths = temp_folder_with_images
+    fm = FileManager()
+    fm.load_images(temp_dir)
+    fm.next_image()
+    fm.delete_image()
+    fm.undo_delete()
+    fm.delete_queue.flush()
+
+    assert fm.images == image_paths
+    assert all(os.path.exists(path) for path in image_paths)
+
+
+def test_delete_images_and_undo_restore_order(temp_folder_with_images):
+    temp_dir, image_paths = temp_folder_with_images
+    for i in range(3, 6):
+        path = os.path.join(temp_dir, f"image_{i}.jpg")
+        with open(path, 'wb') as f:
+            f.write(b"Test image content")
+        image_paths.append(path)
+    fm = FileManager()
+    fm.load_images(temp_dir)
+    fm.index = 2
+
+    deleted = fm.delete_images([image_paths[4], image_paths[1], image_paths[2]])
+    assert deleted == [image_paths[1], image_paths[2], image_paths[4]]
+    assert fm.images == [image_paths[0], image_paths[3], image_paths[5]]
+    assert fm.get_current_image() == image_paths[3]
+
+    for _ in deleted:
+        fm.undo_delete()
+    assert fm.images == image_paths
+    fm.delete_queue.flush()
+    assert all(os.path.exists(path) for path in image_paths)
+
+
+def test_snapshot_detects_added_removed_and_renamed(temp_folder_with_images):
+    from src.folder_snapshot import FolderSnapshot
+
+    temp_dir, image_paths = temp_folder_with_images
+    nested = os.path.join(temp_dir, "nested")
+    os.makedirs(nested)
+    snapshot = FolderSnapshot(os.path.join(temp_dir, "snapshots.db"))
+    fm = FileManager(snapshot=snapshot)
+    fm.load_images(temp_dir, recursive=True)
+    fm.index = 2
+    assert fm.check_changes() == ([], [], [])
+
+    added = os.path.join(nested, "new.png")
+    with open(added, 'wb') as f:
+        f.write(b"New image")
+    os.remove(image_paths[0])
+    renamed = os.path.join(temp_dir, "renamed.jpg")
+    os.rename(image_paths[1], renamed)
+
+    changes = fm.check_changes()
+    assert changes == ([added], [image_paths[0]], [(image_paths[1], renamed)])
+    assert fm.apply_changes(*changes)
+    assert fm.images == sorted([image_paths[2], added, renamed])
+    assert fm.get_current_image() == image_paths[2]
+    assert not fm.apply_changes(*fm.check_changes())
+
+    reopened = FileManager(snapshot=snapshot)
+    reopened.load_images(temp_dir, recursive=True)
+    assert reopened.images == fm.images
+    snapshot.close()
+
+
+def test_add_folder_keeps_deletes_and_sessions_per_folder(temp_folder_with_images):
+    from src.state_store import StateStore
+
+    temp_dir, image_paths = temp_folder_with_images
+    other_dir = tempfile.mkdtemp()
+    try:
+        other_paths = []
+        for name in ("a.jpg", "z.jpg"):
+            path = os.path.join(other_dir, name)
+            with open(path, 'wb') as f:
+                f.write(b"Test image content")
+            other_paths.append(path)
+        store = StateStore(os.path.join(temp_dir, "state.db"))
+        fm = FileManager(store)
+        fm.load_images(temp_dir)
+        fm.index = 1
+
+        assert fm.add_folder(other_dir, False, fm.scan_folder(other_dir)) == 2
+        assert fm.images == sorted(image_paths + other_paths)
+        assert fm.get_current_image() == image_paths[1]
+
+        fm.index = fm.images.index(other_paths[1])
+        fm.save_session()
+        assert store.get(os.path.abspath(other_dir), "session")["image"] == other_paths[1]
+        assert store.get(os.path.abspath(temp_dir), "session")["folders"] == [[other_dir, False]]
+
+        alone = FileManager(store)
+        alone.load_images(other_dir)
+        assert alone.get_current_image() == other_paths[1]
+
+        fm.delete_image()
+        fm.delete_queue.flush()
+        assert os.path.exists(os.path.join(other_dir, "deleted", "z.jpg"))
+        store.close()
+    finally:
+        shutil.rmtree(other_dir)
+
+
+def test_failed_delete_puts_the_image_back(temp_folder_with_images, monkeypatch):
+    temp_dir, image_paths = temp_folder_with_images
+
+    def locked(source, destination):
+        raise PermissionError(f"'{source}' is in use")
+
+    monkeypatch.setattr(delete_queue, "move_file", locked)
+    fm = FileManager(delete_queue=delete_queue.DeleteQueue())
+    fm.load_images(temp_dir)
+    fm.index = 1
+    fm.delete_image()
+    fm.delete_queue.flush()
+
+    failed = fm.poll_failed_deletes()
+    assert [job.source for job in failed] == [image_paths[1]]
+    assert isinstance(failed[0].error, PermissionError)
+    assert fm.images == image_paths
+    assert fm.get_current_image() == image_paths[2]
+    assert not fm.undo_stack
+    assert fm.poll_failed_deletes() == []
+    assert os.path.exists(image_paths[1])
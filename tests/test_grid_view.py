@@ -0,0 +1,28 @@
+from src.grid_view import TILE_PITCH, column_count, content_height, index_at, visible_range
+
+
+def test_visible_range_covers_partial_rows():
+    columns = 5
+    first, last = visible_range(TILE_PITCH + 10, 2 * TILE_PITCH, columns, 50_000)
+    # Rows 1 to 3 overlap the viewport.
+    assert (first, last) == (5, 20)
+
+
+def test_visible_range_clamps_to_count():
+    assert visible_range(0, 10 * TILE_PITCH, 4, 6) == (0, 6)
+    assert visible_range(0, 100, 4, 0) == (0, 0)
+
+
+def test_index_at_maps_positions_to_images():
+    columns = column_count(4 * TILE_PITCH + 20)
+    assert columns == 4
+    assert index_at(0, 0, 0, columns, 100) == 0
+    assert index_at(TILE_PITCH * 2 + 1, TILE_PITCH + 1, 0, columns, 100) == 6
+    assert index_at(1, 1, 3 * TILE_PITCH, columns, 100) == 12
+    assert index_at(4 * TILE_PITCH + 5, 0, 0, columns, 100) is None
+    assert index_at(TILE_PITCH, 0, 0, columns, 1) is None
+
+
+def test_content_height_rounds_up_rows():
+    assert content_height(9, 4) == 3 * TILE_PITCH
+    assert content_height(0, 4) == 0
@@ -0,0 +1,99 @@
+import os
+import random
+import tempfile
+import pytest
+
+from src import image_catalog
+from src.image_catalog import ImageCatalog, split_path
+
+
+def test_split_path_round_trips():
+    for path in ("/photos/2024/IMG_1.jpg", "/IMG_1.jpg", "IMG_1.jpg", "./a/b.png", "/photos//x.jpg"):
+        directory, name = split_path(path)
+        assert directory + name == path
+        assert os.sep not in name
+
+
+def test_behaves_like_a_list():
+    paths = [f"/photos/{folder}/IMG_{i:03d}.jpg" for folder in ("b", "a") for i in range(5)]
+    catalog = ImageCatalog(paths)
+    assert catalog == paths
+    assert len(catalog) == 10 and catalog[3] == paths[3] and catalog[-1] == paths[-1]
+    assert catalog[2:4] == paths[2:4]
+    assert paths[7] in catalog and "/photos/c/IMG_000.jpg" not in catalog
+    assert catalog.index(paths[7]) == 7
+    assert catalog.folders() == ["/photos/b/", "/photos/a/"]
+
+    catalog.sort()
+    assert catalog == sorted(paths)
+    catalog.sort(key=lambda path: path[-7:], reverse=True)
+    assert catalog == sorted(sorted(paths), key=lambda path: path[-7:], reverse=True)
+    with pytest.raises(ValueError):
+        catalog.insert(0, paths[0])
+    with pytest.raises(IndexError):
+        catalog[10]
+
+
+def test_deletes_leave_tombstones_that_undo_revives():
+    paths = [f"/photos/IMG_{i:03d}.jpg" for i in range(8)]
+    catalog = ImageCatalog(paths)
+    del catalog[5]
+    del catalog[1]
+    assert catalog == [paths[i] for i in (0, 2, 3, 4, 6, 7)]
+    assert catalog.index(paths[6]) == 4 and paths[5] not in catalog
+
+    # Reinserting at the position it was deleted from reuses the tombstone.
+    order = catalog._order
+    catalog.insert(1, paths[1])
+    catalog.insert(5, paths[5])
+    assert catalog == paths
+    assert catalog._order is order and len(order) == 8
+
+    # Anywhere else the order is shifted.
+    del catalog[0]
+    catalog.insert(3, paths[0])
+    assert catalog == paths[1:4] + [paths[0]] + paths[4:]
+    assert len(catalog._order) == 8
+
+
+def test_random_edits_match_a_list(monkeypatch):
+    monkeypatch.setattr(image_catalog, "COMPACT_MIN", 4)
+    rng = random.Random(0)
+    pool = [f"/photos/{rng.randint(0, 3)}/IMG_{i:03d}.jpg" for i in range(80)]
+    expected = pool[:40]
+    catalog = ImageCatalog(expected)
+    for _ in range(2000):
+        roll = rng.random()
+        if roll < 0.4 and expected:
+            position = rng.randrange(len(expected))
+            del expected[position]
+            del catalog[position]
+        elif roll < 0.8:
+            path = rng.choice(pool)
+            if path not in expected:
+                position = rng.randint(0, len(expected))
+                expected.insert(position, path)
+                catalog.insert(position, path)
+        elif roll < 0.85:
+            expected.sort()
+            catalog.sort()
+        else:
+            new = [path for path in rng.sample(pool, 3) if path not in expected]
+            expected.extend(new)
+            catalog.extend(new)
+        assert len(catalog) == len(expected)
+    assert catalog == expected
+    assert [catalog.index(path) for path in expected] == list(range(len(expected)))
+
+
+def test_stat_is_read_once():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "image.jpg")
+        with open(path, "wb") as f:
+            f.write(b"12345")
+        catalog = ImageCatalog([path])
+        size, mtime_ns = catalog.stat(path)
+        assert size == 5 and mtime_ns == os.stat(path).st_mtime_ns
+        with open(path, "wb") as f:
+            f.write(b"123456789")
+        assert catalog.stat(path) == (5, mtime_ns)
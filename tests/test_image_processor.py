@@ -1,11 +1,14 @@
+import io
+import struct
 import sys
+import threading
 import pytest
 import tempfile
 import os
 from PIL import Image
 
 from src.logger import get_logger
-from src.image_processor import ImageProcessor
+from src.image_processor import ImageProcessor, MemoryBudget, read_embedded_thumbnail
 
 
 @pytest.fixture
@@ -34,3 +37,146 @@ def test_process_image(sample_image, image_processor):
 def test_process_image_invalid_path(image_processor):
     with pytest.raises(FileNotFoundError):
         image_processor.process_image("invalid_path.jpg", 800, 600)
+
+
+def test_process_preview_uses_draft_for_jpeg(image_processor):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_path = os.path.join(temp_dir, "large.jpg")
+        Image.new('RGB', (4000, 3000), color='blue').save(image_path)
+
+        preview = image_processor.process_preview(image_path)
+
+        assert preview is not None
+        assert preview.info["decode_path"].startswith("draft")
+        assert preview.width <= image_processor.max_width
+        assert preview.height <= image_processor.max_height
+
+
+def test_process_preview_reduces_png(image_processor):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_path = os.path.join(temp_dir, "large.png")
+        Image.new('RGB', (4000, 3000), color='green').save(image_path)
+
+        preview = image_processor.process_preview(image_path)
+
+        assert preview.info["decode_path"] == "reduce"
+        assert preview.width <= image_processor.max_width
+
+
+def test_process_preview_handles_palette_and_bilevel_png(image_processor):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for mode in ('P', '1', 'I;16'):
+            image_path = os.path.join(temp_dir, "large.png")
+            Image.new('RGB', (4000, 3000), color='green').convert(mode).save(image_path)
+
+            preview = image_processor.process_preview(image_path)
+
+            assert preview is not None, mode
+            assert preview.width <= image_processor.max_width
+            assert preview.height <= image_processor.max_height
+
+
+def test_over_budget_jpeg_is_drafted_down():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_path = os.path.join(temp_dir, "panorama.jpg")
+        Image.new('RGB', (8000, 2000), color='blue').save(image_path)
+        processor = ImageProcessor(decode_budget=16 * 1024 * 1024)
+
+        img = processor.process_image(image_path)
+
+        assert img is not None
+        assert img.info["decode_path"] == "draft"
+        assert img.width <= processor.max_width
+        assert processor.memory_budget.peak <= 16 * 1024 * 1024
+        assert processor.memory_budget.in_use == 0
+
+
+def test_over_budget_png_is_refused():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_path = os.path.join(temp_dir, "huge.png")
+        Image.new('RGB', (4000, 3000), color='green').save(image_path)
+        processor = ImageProcessor(decode_budget=16 * 1024 * 1024)
+
+        assert processor.process_image(image_path) is None
+        assert processor.process_preview(image_path) is None
+        assert processor.memory_budget.in_use == 0
+
+
+def test_image_over_the_pillow_limit_is_sized_by_the_budget(monkeypatch):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        jpeg_path = os.path.join(temp_dir, "panorama.jpg")
+        png_path = os.path.join(temp_dir, "panorama.png")
+        Image.new('RGB', (6000, 2000), color='blue').save(jpeg_path)
+        Image.new('RGB', (6000, 2000), color='blue').save(png_path)
+        # Pillow raises DecompressionBombError in Image.open above twice this.
+        monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1_000_000)
+        processor = ImageProcessor(decode_budget=16 * 1024 * 1024)
+        # Other threads opening images meanwhile must keep the limit.
+        limits = []
+        pillow_open = Image.open
+
+        def watched_open(*args, **kwargs):
+            limits.append(Image.MAX_IMAGE_PIXELS)
+            return pillow_open(*args, **kwargs)
+
+        monkeypatch.setattr(Image, "open", watched_open)
+
+        img = processor.process_image(jpeg_path)
+        assert img is not None and img.info["decode_path"] == "draft"
+        assert processor.process_preview(jpeg_path) is not None
+        assert processor.process_image(png_path) is None
+        assert limits and set(limits) == {1_000_000}
+        with pytest.raises(Image.DecompressionBombError):
+            Image.open(png_path)
+        assert processor.memory_budget.in_use == 0
+
+
+def test_memory_budget_waits_for_release():
+    budget = MemoryBudget(100)
+    assert budget.acquire(80)
+    assert not budget.acquire(40, timeout=0.01)
+    threading.Timer(0.05, budget.release, args=(80,)).start()
+    assert budget.acquire(40, timeout=2)
+    assert budget.in_use == 40 and budget.peak == 80
+
+
+def save_with_exif_thumbnail(path, size, thumbnail_size):
+    """Save a JPEG whose EXIF IFD1 holds a thumbnail, as cameras write them."""
+    img = Image.new('RGB', size, color='orange')
+    buffer = io.BytesIO()
+    img.resize(thumbnail_size).save(buffer, "JPEG")
+    thumbnail = buffer.getvalue()
+    offset = 8 + 6 + 2 + 24 + 4
+    tiff = b"II*\x00" + struct.pack("<IHI", 8, 0, 14) + struct.pack("<H", 2)
+    tiff += struct.pack("<HHII", 0x0201, 4, 1, offset) + struct.pack("<HHII", 0x0202, 4, 1, len(thumbnail))
+    tiff += struct.pack("<I", 0) + thumbnail
+    img.save(path, exif=b"Exif\x00\x00" + tiff)
+    return thumbnail
+
+
+def test_preview_comes_from_embedded_thumbnail():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_path = os.path.join(temp_dir, "camera.jpg")
+        thumbnail = save_with_exif_thumbnail(image_path, (4000, 3000), (160, 120))
+        assert read_embedded_thumbnail(image_path) == (thumbnail, (4000, 3000))
+
+        processor = ImageProcessor()
+        preview = processor.process_preview(image_path)
+        assert preview.info["decode_path"] == "exif"
+        assert preview.size == (933, 700)
+
+        # Too small to stand in for the full render, but enough for a grid tile.
+        assert processor.process_image(image_path).info["decode_path"] == "full"
+        assert ImageProcessor(160, 160).process_image(image_path).info["decode_path"] == "exif"
+
+
+def test_files_without_embedded_thumbnail():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        jpeg_path = os.path.join(temp_dir, "plain.jpg")
+        png_path = os.path.join(temp_dir, "plain.png")
+        Image.new('RGB', (800, 600), color='blue').save(jpeg_path)
+        Image.new('RGB', (800, 600), color='blue').save(png_path)
+
+        assert read_embedded_thumbnail(jpeg_path) == (None, (800, 600))
+        assert read_embedded_thumbnail(png_path) == (None, None)
+        assert ImageProcessor().process_preview(jpeg_path).info["decode_path"] == "resample"
@@ -0,0 +1,38 @@
+import logging
+
+from src.logger import RateLimitFilter, parse_levels
+
+
+def make_record(msg, level=logging.INFO):
+    return logging.LogRecord("ui", level, __file__, 1, msg, ("a.jpg",), None)
+
+
+def test_rate_limit_drops_repeats_within_window():
+    rate_filter = RateLimitFilter(count=3, seconds=3600)
+    passed = [rate_filter.filter(make_record("Displayed image: %s")) for _ in range(10)]
+    assert passed.count(True) == 3
+
+
+def test_rate_limit_reports_suppressed_count_in_next_window():
+    rate_filter = RateLimitFilter(count=1, seconds=0)
+    rate_filter.seconds = 3600
+    rate_filter.filter(make_record("Displayed image: %s"))
+    rate_filter.filter(make_record("Displayed image: %s"))
+    rate_filter.seconds = 0
+
+    record = make_record("Displayed image: %s")
+    assert rate_filter.filter(record)
+    assert record.getMessage() == "Displayed image: a.jpg (1 similar messages suppressed)"
+
+
+def test_rate_limit_lets_warnings_through():
+    rate_filter = RateLimitFilter(count=1, seconds=3600)
+    assert all(rate_filter.filter(make_record("Failed: %s", logging.ERROR)) for _ in range(5))
+
+
+def test_parse_levels():
+    assert parse_levels("image_processor=debug, ui=WARNING,bogus=LOUD,") == {
+        "image_processor": logging.DEBUG,
+        "ui": logging.WARNING,
+    }
+    assert parse_levels(None) == {}
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import pytest
+from PIL import Image
+
+from src.file_index import FileIndex
+from src.file_manager import FileManager
+from src.metadata_index import (
+    EXIF_DATETIME_ORIGINAL, EXIF_IFD, EXIF_MAKE, EXIF_MODEL, EXIF_ORIENTATION,
+    MetadataIndex, camera_name, find_bursts, parse_exif_datetime, read_metadata
+)
+
+
+def save_photo(path, size, captured=None, make=None, model=None, orientation=None):
+    exif = Image.Exif()
+    if make:
+        exif[EXIF_MAKE] = make
+    if model:
+        exif[EXIF_MODEL] = model
+    if orientation:
+        exif[EXIF_ORIENTATION] = orientation
+    if captured:
+        exif.get_ifd(EXIF_IFD)[EXIF_DATETIME_ORIGINAL] = captured
+    Image.new('RGB', size, color=(90, 120, 150)).save(path, exif=exif)
+
+
+@pytest.fixture
+def photo_folder():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = {
+            "new": os.path.join(temp_dir, "a.jpg"),
+            "old": os.path.join(temp_dir, "b.jpg"),
+            "plain": os.path.join(temp_dir, "c.jpg"),
+        }
+        save_photo(paths["new"], (640, 480), "2024:06:01 10:00:00", "Canon", "Canon EOS R6")
+        save_photo(paths["old"], (400, 300), "2019:01:15 08:30:00", "NIKON CORPORATION", "NIKON D750", 6)
+        save_photo(paths["plain"], (200, 100))
+        yield temp_dir, paths
+
+
+def test_helpers():
+    assert parse_exif_datetime("2024:06:01 10:00:00") == "2024-06-01 10:00:00"
+    assert parse_exif_datetime("0000:00:00 00:00:00") is None
+    assert parse_exif_datetime(None) is None
+    assert camera_name("Canon", "Canon EOS R6") == "Canon EOS R6"
+    assert camera_name("Apple", "iPhone 12") == "Apple iPhone 12"
+    assert camera_name(None, None) is None
+
+
+def test_read_metadata(photo_folder):
+    _, paths = photo_folder
+    _, _, _, new = read_metadata(paths["new"])
+    assert new == {
+        "captured": "2024-06-01 10:00:00", "camera": "Canon EOS R6", "orientation": 1, "width": 640, "height": 480
+    }
+    # Orientation 6 is rotated, so the displayed size is portrait.
+    _, _, _, old = read_metadata(paths["old"])
+    assert (old["width"], old["height"], old["camera"]) == (300, 400, "NIKON D750")
+    assert read_metadata(paths["plain"])[3]["captured"] is None
+
+
+def test_metadata_is_indexed(photo_folder):
+    temp_dir, paths = photo_folder
+    index = FileIndex(os.path.join(temp_dir, "index.db"), table="image_metadata")
+    metadata = MetadataIndex(index=index, workers=1).read_all(list(paths.values()))
+    assert len(metadata) == 3
+
+    found, missing = index.lookup(list(paths.values()))
+    assert missing == [] and found == metadata
+    index.close()
+
+
+def test_sort_and_filter_by_metadata(photo_folder):
+    temp_dir, paths = photo_folder
+    index = FileIndex(os.path.join(temp_dir, "index.db"), table="image_metadata")
+    metadata = MetadataIndex(index=index, workers=1).read_all(list(paths.values()))
+    index.close()
+
+    fm = FileManager()
+    fm.load_images(temp_dir)
+    fm.sort_by_metadata(metadata, "captured")
+    assert fm.images == [paths["old"], paths["new"], paths["plain"]]
+    fm.sort_by_metadata(metadata, "pixels")
+    assert fm.images == [paths["plain"], paths["old"], paths["new"]]
+
+    assert fm.filter_images(metadata, date_from="2020-01-01") == 1
+    assert fm.images == [paths["new"]]
+    assert fm.filter_images(metadata, camera="nikon") == 1
+    # Filters replace each other rather than stacking.
+    assert fm.filter_images(metadata, min_width=300, min_height=300) == 2
+    assert fm.get_current_image() == paths["old"]
+
+    fm.delete_image()
+    fm.clear_filter()
+    assert sorted(fm.images) == [paths["new"], paths["plain"]]
+    fm.undo_delete()
+    fm.delete_queue.flush()
+
+
+def test_find_bursts_sweeps_by_gap():
+    metadata = {
+        "a1.jpg": {"captured": "2024-06-01 10:00:00"},
+        "a2.jpg": {"captured": "2024-06-01 10:00:01"},
+        "a3.jpg": {"captured": "2024-06-01 10:00:03"},
+        "single.jpg": {"captured": "2024-06-01 11:00:00"},
+        "b1.jpg": {"captured": "2024-06-02 09:00:00"},
+        "b2.jpg": {"captured": "2024-06-02 09:00:00"},
+    }
+    paths = sorted(metadata, reverse=True)
+    assert find_bursts(paths, metadata, max_gap=2) == [["a1.jpg", "a2.jpg", "a3.jpg"], ["b1.jpg", "b2.jpg"]]
+    assert find_bursts(paths, metadata, max_gap=1) == [["a1.jpg", "a2.jpg"], ["b1.jpg", "b2.jpg"]]
+
+
+def test_find_bursts_falls_back_to_mtime(photo_folder):
+    _, paths = photo_folder
+    os.utime(paths["plain"], (1_000_000, 1_000_000))
+    other = paths["plain"] + ".copy.jpg"
+    save_photo(other, (10, 10))
+    os.utime(other, (1_000_001, 1_000_001))
+    assert find_bursts([paths["plain"], other], {}) == [[paths["plain"], other]]
+
+
+def test_keep_one_in_group(photo_folder):
+    temp_dir, paths = photo_folder
+    fm = FileManager()
+    fm.load_images(temp_dir)
+    fm.set_groups([[paths["new"], paths["old"], paths["plain"]]])
+    fm.next_image()
+
+    deleted = fm.keep_one_in_group()
+    assert deleted == [paths["new"], paths["plain"]]
+    assert fm.images == [paths["old"]]
+    assert fm.groups == []
+    fm.delete_queue.flush()
+    assert os.path.exists(os.path.join(temp_dir, "deleted", "a.jpg"))
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+
+from src.metrics import Histogram, Metrics
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics()
+    with metrics.timer("decode"):
+        pass
+    metrics.increment("cache_hits")
+
+    snapshot = metrics.snapshot()
+    assert snapshot["stages"] == {}
+    assert snapshot["counters"] == {}
+
+
+def test_timer_and_counters_are_recorded():
+    metrics = Metrics(enabled=True)
+    for _ in range(3):
+        with metrics.timer("decode"):
+            pass
+    metrics.increment("decode_bytes", 100)
+    metrics.increment("decode_bytes", 50)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["stages"]["decode"]["count"] == 3
+    assert snapshot["counters"] == {"decode_bytes": 150}
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.add(float(value))
+
+    summary = histogram.summary()
+    assert summary["p50_ms"] == 51.0
+    assert summary["p95_ms"] == 96.0
+    assert summary["p99_ms"] == 100.0
+    assert summary["max_ms"] == 100.0
+    assert summary["mean_ms"] == 50.5
+
+
+def test_dump_writes_json():
+    metrics = Metrics(enabled=True)
+    metrics.record("draw", 2.5)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = metrics.dump(os.path.join(temp_dir, "logs", "metrics.json"))
+        with open(path) as f:
+            data = json.load(f)
+    assert data["stages"]["draw"]["count"] == 1
+
+
+def test_reset_clears_everything():
+    metrics = Metrics(enabled=True)
+    metrics.record("scan", 1.0)
+    metrics.increment("deletes")
+    metrics.reset()
+    assert metrics.snapshot()["stages"] == {}
+    assert metrics.snapshot()["counters"] == {}
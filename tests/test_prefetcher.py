@@ -0,0 +1,63 @@
+import os
+import tempfile
+import pytest
+from PIL import Image
+
+from src.image_processor import ImageProcessor
+from src.prefetcher import ImageCache, Prefetcher
+
+
+@pytest.fixture
+def sample_images():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = []
+        for i in range(5):
+            path = os.path.join(temp_dir, f"image_{i}.jpg")
+            Image.new('RGB', (400, 300), color=(i * 40, 0, 0)).save(path)
+            paths.append(path)
+        yield paths
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ImageCache(max_bytes=2 * 10 * 10 * 3)
+    for name in ("a", "b", "c"):
+        cache.put(name, Image.new('RGB', (10, 10)))
+
+    assert "a" not in cache
+    assert "b" in cache and "c" in cache
+    assert cache.current_bytes <= cache.max_bytes
+
+
+def test_cache_key_changes_with_target_size(sample_images):
+    key_small = ImageCache.make_key(sample_images[0], (100, 100))
+    key_large = ImageCache.make_key(sample_images[0], (200, 200))
+
+    assert key_small != key_large
+    assert ImageCache.make_key("missing.jpg", (100, 100)) is None
+
+
+def test_prefetch_warms_cache(sample_images):
+    prefetcher = Prefetcher(ImageProcessor(200, 200), ahead=2, behind=1, workers=2)
+    try:
+        prefetcher.prefetch(sample_images, 0)
+        for path in (sample_images[1], sample_images[2], sample_images[-1]):
+            img = prefetcher.get_image(path)
+            assert img is not None
+            assert img.width <= 200 and img.height <= 200
+
+        hits_before = prefetcher.cache.hits
+        prefetcher.get_image(sample_images[1])
+        assert prefetcher.cache.hits == hits_before + 1
+    finally:
+        prefetcher.shutdown()
+
+
+def test_retain_cancels_queued_decodes(sample_images):
+    prefetcher = Prefetcher(ImageProcessor(200, 200), ahead=0, behind=0, workers=1)
+    try:
+        futures = [prefetcher.submit(path) for path in sample_images]
+        prefetcher.retain(sample_images[:1])
+        assert futures[-1].cancelled()
+        assert futures[0].result() is not None
+    finally:
+        prefetcher.shutdown()
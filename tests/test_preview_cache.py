@@ -0,0 +1,70 @@
+import os
+import tempfile
+import pytest
+from PIL import Image
+
+from src.image_processor import ImageProcessor
+from src.preview_cache import PreviewCache
+
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+
+@pytest.fixture
+def sample_image(temp_dir):
+    image_path = os.path.join(temp_dir, "photo.jpg")
+    Image.new('RGB', (1600, 1200), color='red').save(image_path)
+    return image_path
+
+
+def test_put_and_get(temp_dir, sample_image):
+    cache = PreviewCache(os.path.join(temp_dir, "cache"))
+    cache.put(sample_image, (400, 300), Image.new('RGB', (400, 300)))
+
+    img = cache.get(sample_image, (400, 300))
+    assert img is not None
+    assert img.size == (400, 300)
+    assert cache.get(sample_image, (800, 600)) is None
+
+
+def test_entry_invalidated_when_source_changes(temp_dir, sample_image):
+    cache = PreviewCache(os.path.join(temp_dir, "cache"))
+    cache.put(sample_image, (400, 300), Image.new('RGB', (400, 300)))
+
+    st = os.stat(sample_image)
+    os.utime(sample_image, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert cache.get(sample_image, (400, 300)) is None
+
+
+def test_rewriting_an_entry_keeps_the_size_exact(temp_dir, sample_image):
+    cache = PreviewCache(os.path.join(temp_dir, "cache"))
+    assert cache.size_on_disk() == 0
+    for _ in range(3):
+        cache.put(sample_image, (400, 300), Image.new('RGB', (400, 300), color='blue'))
+    assert cache.size_on_disk() == sum(entry[2] for entry in cache._scan())
+
+
+def test_eviction_respects_cap(temp_dir):
+    cache = PreviewCache(os.path.join(temp_dir, "cache"), max_bytes=20 * 1024)
+    for i in range(10):
+        path = os.path.join(temp_dir, f"image_{i}.jpg")
+        Image.new('RGB', (10, 10)).save(path)
+        noisy = Image.effect_noise((200, 200), 64).convert('RGB')
+        cache.put(path, (200, 200), noisy)
+
+    assert cache.size_on_disk() <= cache.max_bytes
+
+
+def test_image_processor_reads_cache(temp_dir, sample_image):
+    cache = PreviewCache(os.path.join(temp_dir, "cache"))
+    processor = ImageProcessor(400, 300, preview_cache=cache)
+
+    first = processor.process_image(sample_image)
+    second = processor.process_image(sample_image)
+
+    assert first.info["decode_path"] == "full"
+    assert second.info["decode_path"] == "disk"
+    assert second.size == first.size
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFilter
+
+from src.file_index import FileIndex
+from src.image_processor import DECODE_BUDGET_MB, LIVE_BUDGET_MB, pool_decode_budget
+from src.quality_scorer import QualityScorer, analyze, score_file
+
+
+def make_sharp_image():
+    img = Image.new('L', (400, 300), color=128)
+    draw = ImageDraw.Draw(img)
+    for x in range(0, 400, 20):
+        draw.line((x, 0, x, 300), fill=255 if (x // 20) % 2 else 0, width=3)
+    return img
+
+
+@pytest.fixture
+def scored_folder():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sharp = make_sharp_image()
+        paths = {
+            "sharp": os.path.join(temp_dir, "sharp.png"),
+            "blurred": os.path.join(temp_dir, "blurred.png"),
+            "pocket": os.path.join(temp_dir, "pocket.png"),
+        }
+        sharp.save(paths["sharp"])
+        sharp.filter(ImageFilter.GaussianBlur(8)).save(paths["blurred"])
+        Image.new('L', (400, 300), color=3).save(paths["pocket"])
+        yield temp_dir, paths
+
+
+def test_analyze_detects_blur():
+    sharp = analyze(np.asarray(make_sharp_image()))
+    blurred = analyze(np.asarray(make_sharp_image().filter(ImageFilter.GaussianBlur(8))))
+
+    assert sharp["sharpness"] > blurred["sharpness"]
+    assert blurred["badness"] > sharp["badness"]
+
+
+def test_analyze_flags_near_black():
+    scores = analyze(np.full((100, 100), 2, dtype=np.uint8))
+
+    assert scores["near_black"]
+    assert scores["underexposed"] == 1.0
+
+
+def test_worst_first_order_and_persistence(scored_folder):
+    temp_dir, paths = scored_folder
+    index = FileIndex(os.path.join(temp_dir, "index.db"), table="quality_scores")
+    scorer = QualityScorer(index=index, workers=2)
+
+    ordered = scorer.worst_first([paths["sharp"], paths["blurred"], paths["pocket"]])
+    assert ordered == [paths["pocket"], paths["blurred"], paths["sharp"]]
+
+    _, missing = index.lookup(list(paths.values()))
+    assert missing == []
+    index.close()
+
+
+def test_scoring_refuses_decodes_over_the_budget():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "large.png")
+        Image.new('RGB', (1000, 1000), color='green').save(path)
+
+        # A PNG cannot be drafted, so its 4 MB decode is refused.
+        assert score_file(path, decode_budget=1024 * 1024)[1:] == (None, None, None)
+        assert score_file(path)[3] is not None
+
+    assert pool_decode_budget(1) == DECODE_BUDGET_MB * 1024 * 1024
+    assert pool_decode_budget(8) == LIVE_BUDGET_MB * 1024 * 1024 // 8
@@ -43,3 +43,40 @@ def test_generate_report_empty(temp_report_dir):
         assert "Session ID: " in content
         assert "Total Images Processed: 0" in content
         assert "Total Images Deleted: 0" in content
+
+
+def test_entries_written_in_order_on_generate_report(temp_report_dir):
+    reports_manager = ReportsManager(temp_report_dir)
+    for i in range(1000):
+        reports_manager.record_deletion(f"image_{i}.jpg")
+    reports_manager.generate_report()
+
+    with open(reports_manager.report_file, "r", encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    reports_manager.close()
+
+    assert lines[0] == "Timestamp,Action,Image Path,Details"
+    assert lines[1].endswith("Delete,image_0.jpg,Image deleted.")
+    assert lines[1000].endswith("Delete,image_999.jpg,Image deleted.")
+    assert lines[-1].startswith("Session Completed")
+
+
+def test_close_drains_pending_entries(temp_report_dir):
+    reports_manager = ReportsManager(temp_report_dir)
+    reports_manager.record_action("Skip", "a.jpg", "kept")
+    reports_manager.close()
+
+    with open(reports_manager.report_file, "r", encoding="utf-8") as file:
+        assert "Skip,a.jpg,kept" in file.read()
+
+
+def test_report_file_created_on_first_entry(temp_report_dir):
+    reports_manager = ReportsManager(temp_report_dir)
+    reports_manager.flush()
+    assert not os.path.exists(reports_manager.report_file)
+
+    reports_manager.record_action("Skip", "a.jpg", "kept")
+    reports_manager.flush()
+    with open(reports_manager.report_file, "r", encoding="utf-8") as file:
+        assert file.readline().startswith("Timestamp,Action")
+    reports_manager.close()
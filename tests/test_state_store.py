@@ -0,0 +1,92 @@
+import os
+import sqlite3
+import tempfile
+import pytest
+
+from src.file_manager import FileManager
+from src.state_store import StateStore
+
+
+@pytest.fixture
+def state_path():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield os.path.join(temp_dir, "state.db")
+
+
+def stored_keys(path):
+    with sqlite3.connect(path) as conn:
+        return [row[0] for row in conn.execute("SELECT key FROM state")]
+
+
+def test_put_is_deferred_until_flush(state_path):
+    store = StateStore(state_path, flush_interval=3600)
+    store.put("/photos", "session", {"index": 1})
+    store.put("/photos", "session", {"index": 2})
+
+    assert store.get("/photos", "session") == {"index": 2}
+    assert stored_keys(state_path) == []
+
+    store.flush()
+    assert stored_keys(state_path) == ["session"]
+    store.close()
+
+
+def test_close_flushes_and_reopen_restores(state_path):
+    store = StateStore(state_path, flush_interval=3600)
+    store.put("/photos", "progress", {"deleted_images": 3})
+    store.close()
+
+    reopened = StateStore(state_path)
+    assert reopened.get("/photos", "progress") == {"deleted_images": 3}
+    assert reopened.get("/other", "progress", "missing") == "missing"
+    reopened.close()
+
+
+def test_file_manager_sessions_are_per_folder(state_path):
+    store = StateStore(state_path, flush_interval=3600)
+    with tempfile.TemporaryDirectory() as folder_a, tempfile.TemporaryDirectory() as folder_b:
+        for folder in (folder_a, folder_b):
+            for i in range(3):
+                with open(os.path.join(folder, f"image_{i}.jpg"), 'wb') as f:
+                    f.write(b"Test image content")
+
+        fm = FileManager(store)
+        fm.load_images(folder_a)
+        fm.next_image()
+        fm.next_image()
+        fm.load_images(folder_b)
+        fm.next_image()
+
+        resumed = FileManager(store)
+        resumed.load_images(folder_a)
+        assert resumed.index == 2
+        resumed.load_images(folder_b)
+        assert resumed.index == 1
+    store.close()
+
+
+def test_last_session_resumes_at_same_image(state_path):
+    store = StateStore(state_path, flush_interval=3600)
+    with tempfile.TemporaryDirectory() as folder:
+        for i in range(3):
+            with open(os.path.join(folder, f"image_{i}.jpg"), 'wb') as f:
+                f.write(b"Test image content")
+
+        fm = FileManager(store)
+        fm.load_images(folder, recursive=True)
+        fm.next_image()
+        store.close()
+
+        reopened = StateStore(state_path)
+        session = FileManager(reopened).last_session()
+        assert session["folder"] == folder
+        assert session["image"] == os.path.join(folder, "image_1.jpg")
+        assert session["recursive"] is True
+
+        # An image added in front must not shift the resumed position.
+        with open(os.path.join(folder, "image_0a.jpg"), 'wb') as f:
+            f.write(b"Test image content")
+        resumed = FileManager(reopened)
+        resumed.load_images(folder)
+        assert resumed.get_current_image() == session["image"]
+    reopened.close()
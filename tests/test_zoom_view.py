@@ -0,0 +1,81 @@
+import os
+import tempfile
+import pytest
+from PIL import Image
+
+from src.image_processor import MemoryBudget
+from src.zoom_view import (
+    TILE_SIZE, TilePyramid, clamp_origin, extend_range, level_count, level_size, tile_range, zoom_origin
+)
+
+
+@pytest.fixture
+def large_jpeg():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "large.jpg")
+        img = Image.new('RGB', (4000, 3000), color=(0, 0, 255))
+        img.paste((255, 0, 0), (0, 0, 2000, 1500))
+        img.save(path, quality=95)
+        yield path
+
+
+def test_levels_stop_at_the_first_that_fits():
+    assert level_size(4000, 3000, 0) == (4000, 3000)
+    assert level_size(4001, 3000, 3) == (501, 375)
+    assert level_count(4000, 3000, 1000, 800) == 3
+    assert level_count(800, 600, 1000, 800) == 1
+
+
+def test_tile_range_and_prefetch_direction():
+    tiles = tile_range(TILE_SIZE + 10, 0, 2 * TILE_SIZE, TILE_SIZE, 10 * TILE_SIZE, 3 * TILE_SIZE)
+    assert tiles == (1, 0, 4, 1)
+    assert extend_range(tiles, 5, 0, 10 * TILE_SIZE, 3 * TILE_SIZE) == (1, 0, 5, 1)
+    assert extend_range(tiles, 0, -5, 10 * TILE_SIZE, 3 * TILE_SIZE) == (1, 0, 4, 1)
+    assert extend_range(tiles, -5, 5, 10 * TILE_SIZE, 3 * TILE_SIZE) == (0, 0, 4, 2)
+
+
+def test_origin_clamping_and_zoom_anchor():
+    assert clamp_origin(-50, 1000, 400) == 0
+    assert clamp_origin(900, 1000, 400) == 600
+    assert clamp_origin(0, 300, 400) == -50
+    # The pixel under the cursor stays put: (100 + 50) * 2 = 300 at the finer level.
+    assert zoom_origin(100, 50, 1, 0) == 250
+    assert zoom_origin(250, 50, 0, 1) == 100
+
+
+def test_pyramid_cuts_tiles_and_falls_back_to_coarser_levels(large_jpeg):
+    pyramid = TilePyramid(MemoryBudget(), 512 * 1024 * 1024, workers=2)
+    source = pyramid.open(large_jpeg)
+    assert (source.width, source.height) == (4000, 3000)
+
+    coarse = pyramid.request_level(source, 2).result()
+    assert coarse.size == level_size(4000, 3000, 2)
+
+    assert pyramid.get_tile(source, 0, 0, 0) is None
+    stand_in, from_level = pyramid.fallback_tile(source, 0, 0, 0)
+    assert from_level == 2 and stand_in.size == (TILE_SIZE, TILE_SIZE)
+
+    tile = pyramid.request(source, 0, 0, 0).result()
+    assert tile.size == (TILE_SIZE, TILE_SIZE)
+    assert tile.getpixel((10, 10))[0] > 200
+    assert pyramid.get_tile(source, 0, 0, 0) is tile
+
+    # Edge tiles are padded to full size.
+    last_column = 4000 // TILE_SIZE
+    edge = pyramid.request(source, 0, last_column, 0).result()
+    assert edge.size == (TILE_SIZE, TILE_SIZE)
+    assert edge.getpixel((TILE_SIZE - 1, 0)) == (0, 0, 0)
+    pyramid.shutdown()
+
+
+def test_pyramid_refuses_levels_over_the_decode_budget():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "huge.png")
+        Image.new('RGB', (2000, 2000), color='green').save(path)
+        pyramid = TilePyramid(MemoryBudget(), 1024 * 1024)
+        source = pyramid.open(path)
+
+        assert pyramid.request(source, 0, 0, 0).result() is None
+        assert pyramid.request(source, 1, 0, 0).result() is None
+        assert 0 in source.failed
+        pyramid.shutdown()